@@ -1,28 +1,101 @@
+import multiprocessing
+from typing import List, Optional
 import discord
 from discord.ext import commands
-from quiz_bot import config, QuizCommands
+from quiz_bot import config, db, QuizCommands
+from quiz_bot.answer_buffer import answer_buffer
+from quiz_bot.ai_service import ai_service
+from quiz_bot.ai_workers import AIWorkerPool
+from quiz_bot.recommendations import recommendation_engine
+from quiz_bot.scheduler import study_scheduler
+from quiz_bot.study_manager import study_manager
+from quiz_bot.sharding import recommended_shard_count, split_shards
+from quiz_bot.utils import user_cache
+
+class IlhamBot(commands.AutoShardedBot):
+    async def setup_hook(self):
+        # Replay unsaved answers and start background flushing
+        await answer_buffer.start()
+        if config.AI_WORKERS > 0:
+            ai_service.workers = AIWorkerPool(config.AI_WORKERS)
+            await ai_service.workers.start()
+        ai_service.response_cache.load()
+        db.add_performance_listener(ai_service.invalidate_suggestion)
+        db.add_performance_listener(recommendation_engine.mark_stale)
+        # Resume study timers that were running before the restart
+        await study_scheduler.start()
+        await study_manager.restore_sessions(self)
+
+    async def close(self):
+        # Flush pending writes before the event loop goes away
+        await study_scheduler.stop()
+        await answer_buffer.stop()
+        if ai_service.workers:
+            ai_service.workers.stop()
+        ai_service.response_cache.save()
+        stats = ai_service.response_cache.stats()
+        print(f"📦 Cache jawaban: {stats['hits']} hit, {stats['misses']} miss")
+        stats = user_cache.stats()
+        print(f"👤 Cache user: {stats['hits']} hit, {stats['misses']} miss "
+              f"({stats['hit_rate']:.0%}), {stats['size']} user")
+        for name, counts in ai_service.scheduler.stats().items():
+            print(f"🤖 Request AI {name}: {counts['completed']} selesai, {counts['shed']} dibatalkan, "
+                  f"tunggu maks {counts['max_wait']:.1f} dtk")
+        await db.close()
+        await super().close()
+
+def run_bot(shard_ids: Optional[List[int]] = None, shard_count: Optional[int] = None):
+    """Run one bot process, optionally limited to a subset of shards."""
+    if shard_ids:
+        # Each process needs its own spill file for unsaved answers
+        answer_buffer.spill_path = f"{config.ANSWER_SPILL_PATH}.{shard_ids[0]}"
 
-def main():
     # Initialize bot with intents
     intents = discord.Intents.default()
-    bot = commands.Bot(command_prefix="/", intents=intents)
+    bot = IlhamBot(command_prefix="/", intents=intents, shard_ids=shard_ids, shard_count=shard_count)
 
     @bot.event
     async def on_ready():
-        print(f"✅ Bot siap login sebagai {bot.user}")
+        print(f"✅ Bot siap login sebagai {bot.user} (shard {bot.shard_ids or 'auto'})")
         try:
             # Create a single command group instance
             quiz_commands = QuizCommands(bot)
             # Add the entire group to the command tree
             bot.tree.add_command(quiz_commands)
-            # Sync the command tree
-            synced = await bot.tree.sync()
-            print(f"✅ Sinkronisasi {len(synced)} slash command")
+            # Commands are global, so only the process with shard 0 syncs them
+            if not shard_ids or 0 in shard_ids:
+                synced = await bot.tree.sync()
+                print(f"✅ Sinkronisasi {len(synced)} slash command")
         except Exception as e:
             print(f"❌ Error sync command: {e}")
 
     # Run the bot
     bot.run(config.DISCORD_TOKEN)
 
+def main():
+    if config.BOT_PROCESSES <= 1:
+        run_bot(shard_count=config.SHARD_COUNT or None)
+        return
+
+    # Multi-process mode: split the shards over several processes that share
+    # quiz and study sessions through QUIZ_SESSION_STORE
+    if config.QUIZ_SESSION_STORE == "memory":
+        print("⚠️ QUIZ_SESSION_STORE=memory tidak dibagi antar proses; gunakan sqlite atau redis")
+    shard_count = config.SHARD_COUNT or max(recommended_shard_count(config.DISCORD_TOKEN), config.BOT_PROCESSES)
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_bot, args=(shard_ids, shard_count), name=f"bot-shards-{shard_ids[0]}")
+        for shard_ids in split_shards(shard_count, config.BOT_PROCESSES)
+    ]
+    for process in processes:
+        process.start()
+    print(f"🚀 Menjalankan {shard_count} shard di {len(processes)} proses")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,115 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import AsyncIterator, Deque, Dict, Optional, Tuple
+
+class Priority(IntEnum):
+    """AI request classes; lower values are served first."""
+    INTERACTIVE = 0  # Questions asked during a study interval
+    QUIZ = 1         # Quiz parsing/generation and study plans
+    BACKGROUND = 2   # Summaries, suggestions and recommendations
+
+class AIOverloaded(Exception):
+    """Raised when background AI work is shed because the queue is saturated."""
+
+class AIRequestScheduler:
+    """Hands out AI request slots by priority.
+
+    At most ``max_concurrency`` requests run at once, and each class is also
+    limited by its own cap so slow background calls cannot occupy every slot.
+    Freed slots go to the highest-priority waiter first. Background requests
+    are shed right away when ``queue_limit`` requests are already waiting, and
+    are dropped if they wait longer than ``background_deadline`` seconds.
+    """
+    def __init__(self, max_concurrency: int, caps: Optional[Dict[Priority, int]] = None,
+                 queue_limit: int = 20, background_deadline: float = 30.0):
+        self.max_concurrency = max_concurrency
+        self.caps = {p: max_concurrency for p in Priority}
+        self.caps.update(caps or {})
+        self.queue_limit = queue_limit
+        self.background_deadline = background_deadline
+        self.running: Dict[Priority, int] = {p: 0 for p in Priority}
+        self.waiters: Dict[Priority, Deque[Tuple[asyncio.Future, float]]] = {p: deque() for p in Priority}
+        self.completed: Dict[Priority, int] = {p: 0 for p in Priority}
+        self.shed: Dict[Priority, int] = {p: 0 for p in Priority}
+        self.max_wait: Dict[Priority, float] = {p: 0.0 for p in Priority}
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority) -> AsyncIterator[None]:
+        """Hold one request slot of the given class for the duration of the block."""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    async def acquire(self, priority: Priority) -> None:
+        """Wait for a slot, raising AIOverloaded if background work is shed."""
+        if self._can_start(priority) and not any(self.waiters[p] for p in Priority if p <= priority):
+            self.running[priority] += 1
+            return
+
+        if priority == Priority.BACKGROUND and self.queued() >= self.queue_limit:
+            self._shed(priority, "antrean penuh")
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (future, time.monotonic())
+        self.waiters[priority].append(entry)
+        timeout = self.background_deadline if priority == Priority.BACKGROUND else None
+        try:
+            await asyncio.wait_for(future, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # The slot was granted just as we gave up; hand it on
+                self.release(priority, completed=False)
+            elif entry in self.waiters[priority]:
+                self.waiters[priority].remove(entry)
+            if isinstance(e, asyncio.TimeoutError):
+                self._shed(priority, "melewati batas waktu antrean")
+            raise
+
+    def release(self, priority: Priority, completed: bool = True) -> None:
+        """Return a slot and pass it to the next waiter."""
+        self.running[priority] -= 1
+        if completed:
+            self.completed[priority] += 1
+        self._dispatch()
+
+    def queued(self) -> int:
+        return sum(len(w) for w in self.waiters.values())
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-class running/queued counts, completed and shed totals, and the longest queue wait."""
+        return {
+            p.name.lower(): {
+                "running": self.running[p],
+                "queued": len(self.waiters[p]),
+                "completed": self.completed[p],
+                "shed": self.shed[p],
+                "max_wait": self.max_wait[p],
+            }
+            for p in Priority
+        }
+
+    def _can_start(self, priority: Priority) -> bool:
+        return (sum(self.running.values()) < self.max_concurrency
+                and self.running[priority] < self.caps[priority])
+
+    def _dispatch(self) -> None:
+        """Grant free slots to waiters, highest priority first."""
+        for priority in Priority:
+            waiters = self.waiters[priority]
+            while waiters and self._can_start(priority):
+                future, queued_at = waiters.popleft()
+                if future.done():
+                    continue
+                self.running[priority] += 1
+                self.max_wait[priority] = max(self.max_wait[priority], time.monotonic() - queued_at)
+                future.set_result(None)
+
+    def _shed(self, priority: Priority, reason: str) -> None:
+        self.shed[priority] += 1
+        print(f"⚠️ Request AI {priority.name.lower()} dibatalkan: {reason} ({self.queued()} menunggu)")
+        raise AIOverloaded(reason)
@@ -1,25 +1,273 @@
-from groq import Groq
+from groq import AsyncGroq, APIConnectionError, InternalServerError, RateLimitError
+import asyncio
+import functools
+import hashlib
 import json
-from typing import Dict, List, Tuple
+import random
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from .config import config
+from .ai_scheduler import AIOverloaded, AIRequestScheduler, Priority
+from .rate_limiter import CircuitBreaker, RateLimiter, backoff_delay
+from .topic_matcher import TopicMatcher
+from .prompt_parser import MAX_QUESTION_COUNT, parse_quiz_prompt
+from .json_stream import JsonObjectStream
+from .response_cache import ResponseCache
+from .single_flight import SingleFlight
+
+MAIN_MODEL = "llama-3.3-70b-versatile"
+FAST_MODEL = "llama-3.1-8b-instant"
+RECOMMENDATIONS_ERROR = "Failed to generate recommendations. Please try again later."
+STUDY_ANSWER_ERROR = "Maaf, saya mengalami kesulitan dalam menghasilkan jawaban. Silakan coba lagi."
+STUDY_SUMMARY_ERROR = "Failed to generate study session summary."
+# Rough completion size added to the prompt estimate when budgeting tokens
+COMPLETION_TOKEN_ESTIMATE = 800
+
+def offloadable(priority: Priority, fallback=None):
+    """Run the method on the attached AI worker pool, falling back to this process if the pool breaks.
+
+    Offloaded jobs first take a ``priority`` slot from this process's scheduler,
+    so class caps and shedding apply before work reaches the pool; a shed job
+    returns ``fallback``.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            if self.workers is not None:
+                try:
+                    async with self.scheduler.slot(priority):
+                        return await self.workers.run(method.__name__, *args, **kwargs)
+                except AIOverloaded:
+                    return fallback
+                except BrokenProcessPool as e:
+                    print(f"❌ AI worker pool berhenti, memproses di proses utama: {e}")
+                    self.workers = None
+            return await method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+def offloadable_stream(priority: Priority):
+    """Streaming counterpart of offloadable: items produced on a worker are yielded as they arrive."""
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            produced = False
+            if self.workers is not None:
+                try:
+                    async with self.scheduler.slot(priority):
+                        async for item in self.workers.stream(method.__name__, *args, **kwargs):
+                            produced = True
+                            yield item
+                    return
+                except BrokenProcessPool as e:
+                    if produced:
+                        raise
+                    print(f"❌ AI worker pool berhenti, memproses di proses utama: {e}")
+                    self.workers = None
+            async for item in method(self, *args, **kwargs):
+                yield item
+        return wrapper
+    return decorator
 
 class AIService:
     def __init__(self):
-        self.groq_client = Groq(api_key=config.GROQ_API_KEY)
+        # Retries are handled by _create_completion, which also respects the rate limits
+        self.groq_client = AsyncGroq(api_key=config.GROQ_API_KEY, max_retries=0)
+        # model -> client-side RPM/TPM budget
+        self.rate_limiters: Dict[str, RateLimiter] = {}
+        self.circuit_breaker = CircuitBreaker(config.GROQ_BREAKER_THRESHOLD, config.GROQ_BREAKER_RESET)
+        # Caps in-flight Groq requests so a burst of commands overlaps instead
+        # of flooding the API; study Q&A is served before quiz generation,
+        # and both before summaries and recommendations.
+        self.scheduler = AIRequestScheduler(
+            config.GROQ_MAX_CONCURRENCY,
+            caps={Priority.QUIZ: config.AI_QUIZ_CONCURRENCY, Priority.BACKGROUND: config.AI_BACKGROUND_CONCURRENCY},
+            queue_limit=config.AI_QUEUE_LIMIT,
+            background_deadline=config.AI_BACKGROUND_DEADLINE
+        )
+        # One fitted matcher per difficulty, refit only when its topic set changes
+        self.topic_matchers: Dict[str, TopicMatcher] = {}
+        # user_id -> (performance fingerprint, suggestion)
+        self.suggestion_cache: Dict[str, Tuple[str, str]] = {}
+        # Answers to study questions, shared across sessions and users
+        self.response_cache = ResponseCache(
+            max_bytes=config.RESPONSE_CACHE_MAX_BYTES,
+            ttl=config.RESPONSE_CACHE_TTL,
+            similarity=config.RESPONSE_CACHE_SIMILARITY,
+            path=config.RESPONSE_CACHE_PATH or None
+        )
+        # Identical quiz generation requests in flight share one model call
+        self.single_flight = SingleFlight()
+        # Optional AIWorkerPool; offloadable methods run there when set
+        self.workers = None
+
+    async def _chat(self, prompt: str, priority: Priority, json_mode: bool = False, model: str = MAIN_MODEL) -> str:
+        """Run a chat completion on the async client and return the stripped content."""
+        kwargs = {"response_format": {"type": "json_object"}} if json_mode else {}
+        async with self.scheduler.slot(priority):
+            chat_completion = await self._create_completion(prompt, model, **kwargs)
+        return chat_completion.choices[0].message.content.strip()
+
+    async def _stream_chat(self, prompt: str, priority: Priority, model: str = MAIN_MODEL) -> AsyncIterator[str]:
+        """Stream a chat completion, yielding content deltas as they arrive."""
+        async with self.scheduler.slot(priority):
+            stream = await self._create_completion(prompt, model, stream=True)
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+
+    async def _create_completion(self, prompt: str, model: str, **kwargs):
+        """Call Groq within the client-side rate limits.
+
+        Throttled (429), server-side and connection failures are retried with
+        jittered exponential backoff, honouring Retry-After; a 429 also pauses
+        every other request to the model. Repeated server or connection
+        failures open the circuit breaker so calls fail fast until Groq recovers.
+        """
+        limiter = self._rate_limiter(model)
+        estimated_tokens = len(prompt) // 4 + COMPLETION_TOKEN_ESTIMATE
+        for attempt in range(config.GROQ_MAX_RETRIES + 1):
+            self.circuit_breaker.before_call()
+            await limiter.acquire(estimated_tokens)
+            try:
+                completion = await self.groq_client.chat.completions.create(
+                    messages=[{"role": "user", "content": prompt}],
+                    model=model,
+                    **kwargs
+                )
+            except (RateLimitError, InternalServerError, APIConnectionError) as e:
+                if not isinstance(e, RateLimitError):
+                    self.circuit_breaker.record_failure()
+                if attempt == config.GROQ_MAX_RETRIES:
+                    raise
+                delay = self._retry_after(e) or backoff_delay(attempt, cap=config.GROQ_BACKOFF_MAX)
+                print(f"⚠️ Request Groq gagal ({type(e).__name__}), mencoba lagi dalam {delay:.1f} detik")
+                if isinstance(e, RateLimitError):
+                    limiter.pause(delay)  # The next acquire() waits it out
+                else:
+                    await asyncio.sleep(delay)
+                continue
+
+            self.circuit_breaker.record_success()
+            total_tokens = getattr(getattr(completion, "usage", None), "total_tokens", None)
+            if isinstance(total_tokens, int):
+                limiter.record_usage(estimated_tokens, total_tokens)
+            return completion
+
+    def _rate_limiter(self, model: str) -> RateLimiter:
+        """Groq limits each model separately, so each gets its own budget."""
+        limiter = self.rate_limiters.get(model)
+        if limiter is None:
+            limiter = RateLimiter(config.GROQ_REQUESTS_PER_MINUTE, config.GROQ_TOKENS_PER_MINUTE)
+            self.rate_limiters[model] = limiter
+        return limiter
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        """Seconds from the Retry-After header of a failed response, if present."""
+        response = getattr(error, "response", None)
+        try:
+            return float(response.headers["retry-after"])
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return None
 
     async def generate_soal(self, full_prompt: str) -> Tuple[str, str, int, List[Dict]]:
         """Generate quiz questions using Groq AI."""
+        topic_keyword, difficulty, jumlah_soal = await self.parse_quiz_request(full_prompt)
+        questions = await self.generate_questions(topic_keyword, difficulty, jumlah_soal)
+        if not questions:
+            return "Topik Umum", "sedang", 0, []
+        return topic_keyword, difficulty, jumlah_soal, questions
+
+    async def parse_quiz_request(self, full_prompt: str) -> Tuple[str, str, int]:
+        """Extract topic, difficulty and question count from a quiz prompt.
+
+        Rule-based parsing handles the usual prompt shapes instantly; the small
+        model is only asked when the rules cannot isolate a topic keyword.
+        """
+        parsed = parse_quiz_prompt(full_prompt)
+        if parsed:
+            return parsed
+
         prompt = f"""
         Dari permintaan pengguna berikut: "{full_prompt}",
-        lakukan 2 langkah:
-        1. Ekstrak 'topic' (kata kunci utama), 'difficulty' (wajib: mudah, sedang, atau sulit), dan 'jumlah_soal' (wajib: integer). Jika tidak disebutkan, gunakan default: difficulty='sedang', jumlah_soal=5.
-        2. Buat soal kuis berdasarkan metadata yang diekstrak.
+        ekstrak 'topic' (kata kunci utama), 'difficulty' (wajib: mudah, sedang, atau sulit), dan 'jumlah_soal' (wajib: integer). Jika tidak disebutkan, gunakan default: difficulty='sedang', jumlah_soal=5.
+        
+        Formatkan hasil **HANYA dalam JSON OBJECT** seperti ini tanpa teks tambahan:
+        {{"topic": "kata kunci topik yang diekstrak", "difficulty": "mudah/sedang/sulit", "jumlah_soal": 5}}
+        """
+
+        try:
+            data = self._load_json(await self._chat(prompt, Priority.QUIZ, json_mode=True, model=FAST_MODEL))
+            return (
+                data.get("topic", "Topik Umum"),
+                data.get("difficulty", "sedang").lower(),
+                min(max(int(data.get("jumlah_soal", 5)), 1), MAX_QUESTION_COUNT)
+            )
+        except Exception as e:
+            print(f"❌ Error parsing quiz request: {e}")
+            return "Topik Umum", "sedang", 5
+
+    async def generate_questions(self, topic: str, difficulty: str, count: int) -> List[Dict]:
+        """Generate quiz questions for already-parsed metadata.
+
+        Concurrent requests for the same topic, difficulty and count share one
+        model call; callers that joined another's call get the options shuffled.
+        """
+        questions, shared = await self.single_flight.run(
+            self._questions_key(topic, difficulty, count),
+            lambda: self._generate_questions(topic, difficulty, count)
+        )
+        return [self.shuffle_options(q) for q in questions] if shared else questions
+
+    @offloadable(Priority.QUIZ, fallback=[])
+    async def _generate_questions(self, topic: str, difficulty: str, count: int) -> List[Dict]:
+        try:
+            data = self._load_json(await self._chat(self._questions_prompt(topic, difficulty, count), Priority.QUIZ, json_mode=True))
+            return [self.normalize_question(s) for s in data.get("questions", [])]
+        except Exception as e:
+            print(f"❌ Error generating questions: {e}")
+            return []
+
+    async def stream_questions(self, topic: str, difficulty: str, count: int) -> AsyncIterator[Dict]:
+        """Yield generated questions one by one, sharing the stream with identical requests in flight."""
+        stream, shared = self.single_flight.stream(
+            self._questions_key(topic, difficulty, count),
+            lambda: self._stream_questions(topic, difficulty, count)
+        )
+        try:
+            async for q in stream:
+                yield self.shuffle_options(q) if shared else q
+        finally:
+            await stream.aclose()
+
+    @offloadable_stream(Priority.QUIZ)
+    async def _stream_questions(self, topic: str, difficulty: str, count: int) -> AsyncIterator[Dict]:
+        """Yield generated questions one by one as soon as each is complete in the token stream."""
+        parser = JsonObjectStream()
+        produced = 0
+        try:
+            async for delta in self._stream_chat(self._questions_prompt(topic, difficulty, count), Priority.QUIZ):
+                for q in parser.feed(delta):
+                    yield self.normalize_question(q)
+                    produced += 1
+                    if produced >= count:
+                        return
+        except Exception as e:
+            print(f"❌ Error streaming questions: {e}")
+
+    @staticmethod
+    def _questions_key(topic: str, difficulty: str, count: int) -> Tuple[str, str, int]:
+        return TopicMatcher.normalize(topic), difficulty.lower(), count
+
+    @staticmethod
+    def _questions_prompt(topic: str, difficulty: str, count: int) -> str:
+        return f"""
+        Buat {count} soal kuis pilihan ganda tentang "{topic}" dengan tingkat kesulitan {difficulty}.
         
         Formatkan hasil **HANYA dalam JSON OBJECT** seperti ini tanpa teks tambahan:
         {{
-          "topic": "kata kunci topik yang diekstrak",
-          "difficulty": "mudah/sedang/sulit",
-          "jumlah_soal": 5,
           "questions": [
             {{
               "question": "Soal pertama...",
@@ -30,41 +278,29 @@ class AIService:
           ]
         }}
         """
-        
-        try:
-            chat_completion = self.groq_client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model="llama-3.3-70b-versatile",
-                response_format={"type": "json_object"}
-            )
-            result_text = chat_completion.choices[0].message.content.strip()
-            
-            # Clean up response
-            result_text = result_text.strip('`').strip()
-            if result_text.lower().startswith("json"):
-                result_text = result_text[4:].strip()
-                
-            data = json.loads(result_text.replace("'", '"'))
-            
-            # Extract data
-            topic_keyword = data.get("topic", "Topik Umum")
-            extracted_difficulty = data.get("difficulty", "sedang").lower()
-            extracted_jumlah_soal = int(data.get("jumlah_soal", 5))
-            soal_list = data.get("questions", [])
-            
-            valid_soal = [self.normalize_question(s) for s in soal_list]
-            
-            return topic_keyword, extracted_difficulty, extracted_jumlah_soal, valid_soal
-            
-        except Exception as e:
-            print(f"❌ Error generating questions: {e}")
-            return "Topik Umum", "sedang", 0, []
 
     async def match_topic(self, new_topic: str, current_difficulty: str, existing_topics: List[str]) -> str:
-        """Match new topic with existing topics."""
+        """Match new topic with existing topics.
+
+        A local n-gram matcher resolves clear matches and clear misses; only
+        ambiguous scores fall back to the LLM, and then only with the closest
+        few candidates instead of the whole catalogue.
+        """
         if not existing_topics or new_topic in existing_topics:
             return new_topic
 
+        matcher = self.topic_matchers.setdefault(current_difficulty, TopicMatcher())
+        matcher.ensure_fitted(existing_topics)
+        candidates = matcher.top_matches(new_topic, k=5)
+        best_topic, best_score = candidates[0]
+        runner_up_score = candidates[1][1] if len(candidates) > 1 else 0.0
+
+        if best_score >= config.TOPIC_MATCH_THRESHOLD and best_score - runner_up_score >= config.TOPIC_MATCH_MARGIN:
+            return best_topic
+        if best_score < config.TOPIC_MATCH_MIN_SCORE:
+            return new_topic
+
+        existing_topics = [topic for topic, _ in candidates]
         topic_list = ", ".join(existing_topics)
         prompt = f"""
         Anda adalah penormalisasi topik. Tugas Anda adalah mencocokkan Topik Baru dengan salah satu Topik yang Sudah Ada, MENGINGAT KESULITANNYA SAMA.
@@ -81,17 +317,7 @@ class AIService:
         """
         
         try:
-            chat_completion = self.groq_client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model="llama-3.3-70b-versatile",
-                response_format={"type": "json_object"}
-            )
-            result_text = chat_completion.choices[0].message.content.strip()
-            result_text = result_text.strip('`').strip()
-            if result_text.lower().startswith("json"):
-                result_text = result_text[4:].strip()
-                
-            data = json.loads(result_text.replace("'", '"'))
+            data = self._load_json(await self._chat(prompt, Priority.QUIZ, json_mode=True))
             matched_topic = data.get("matched_topic", new_topic).lower()
             
             return matched_topic if matched_topic in existing_topics else new_topic
@@ -100,8 +326,14 @@ class AIService:
             print(f"❌ Error matching topic: {e}")
             return new_topic
 
-    async def generate_performance_suggestion(self, performance_data: List[Dict]) -> str:
-        """Generate performance analysis and suggestions."""
+    async def generate_performance_suggestion(self, performance_data: List[Dict], user_id: Optional[str] = None) -> str:
+        """Generate performance analysis and suggestions, reusing the last one if the data is unchanged."""
+        snapshot = self.performance_fingerprint(performance_data)
+        if user_id is not None:
+            cached = self.suggestion_cache.get(user_id)
+            if cached and cached[0] == snapshot:
+                return cached[1]
+
         data_string = "\n".join([
             f"Topik: {d['topic']}, Kesulitan: {d['difficulty']}, Akurasi: {d['avg_score']:.2f}%, Total Soal: {d['total_questions']}"
             for d in performance_data
@@ -119,18 +351,63 @@ class AIService:
         """
 
         try:
-            chat_completion = self.groq_client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model="llama-3.3-70b-versatile",
-            )
-            return chat_completion.choices[0].message.content.strip()
+            suggestion = await self._chat(prompt, Priority.BACKGROUND)
+            if user_id is not None:
+                self.suggestion_cache[user_id] = (snapshot, suggestion)
+            return suggestion
         except Exception as e:
             print(f"❌ Error generating suggestion: {e}")
             return "\n---\n## ⚠️ Analisis Gagal\nGagal mendapatkan saran dari AI. Coba lagi nanti."
 
+    def invalidate_suggestion(self, user_id: str) -> None:
+        """Forget a user's cached suggestion after their performance changes."""
+        self.suggestion_cache.pop(user_id, None)
+
+    @staticmethod
+    def performance_fingerprint(performance_data: List[Dict]) -> str:
+        """Hash the parts of the performance rows that the suggestion is based on."""
+        rows = sorted(
+            (d["topic"], d["difficulty"], d["total_questions"], d.get("total_correct"), round(float(d["avg_score"]), 2))
+            for d in performance_data
+        )
+        return hashlib.sha256(json.dumps(rows).encode()).hexdigest()
+
     async def answer_study_question(self, topic: str, question: str) -> str:
         """Answer a question during study session."""
-        prompt = f"""
+        cached = self.response_cache.get(topic, question)
+        if cached is not None:
+            return cached
+        try:
+            answer = await self._chat(self._study_answer_prompt(topic, question), Priority.INTERACTIVE)
+            self.response_cache.put(topic, question, answer)
+            return answer
+        except Exception as e:
+            print(f"❌ Error generating answer: {e}")
+            return STUDY_ANSWER_ERROR
+
+    async def stream_study_answer(self, topic: str, question: str) -> AsyncIterator[str]:
+        """Stream the answer to a study question as text deltas."""
+        cached = self.response_cache.get(topic, question)
+        if cached is not None:
+            yield cached
+            return
+
+        produced = False
+        answer = ""
+        try:
+            async for delta in self._stream_chat(self._study_answer_prompt(topic, question), Priority.INTERACTIVE):
+                produced = True
+                answer += delta
+                yield delta
+            self.response_cache.put(topic, question, answer)
+        except Exception as e:
+            print(f"❌ Error streaming answer: {e}")
+            if not produced:
+                yield STUDY_ANSWER_ERROR
+
+    @staticmethod
+    def _study_answer_prompt(topic: str, question: str) -> str:
+        return f"""
         Sebagai asisten belajar, jawablah pertanyaan tentang {topic} ini:
 
         Pertanyaan: {question}
@@ -140,16 +417,7 @@ class AIService:
         Gunakan Bahasa Indonesia yang baik dan benar.
         """
 
-        try:
-            chat_completion = self.groq_client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model="llama-3.3-70b-versatile",
-            )
-            return chat_completion.choices[0].message.content.strip()
-        except Exception as e:
-            print(f"❌ Error generating answer: {e}")
-            return "Maaf, saya mengalami kesulitan dalam menghasilkan jawaban. Silakan coba lagi."
-
+    @offloadable(Priority.BACKGROUND, fallback=RECOMMENDATIONS_ERROR)
     async def generate_recommendations(self, learning_history: Dict) -> str:
         """Generate personalized study and quiz recommendations."""
         topics_data = learning_history["topics_data"]
@@ -192,15 +460,12 @@ class AIService:
         """
 
         try:
-            chat_completion = self.groq_client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model="llama-3.3-70b-versatile",
-            )
-            return chat_completion.choices[0].message.content.strip()
+            return await self._chat(prompt, Priority.BACKGROUND)
         except Exception as e:
             print(f"❌ Error generating recommendations: {e}")
-            return "Failed to generate recommendations. Please try again later."
+            return RECOMMENDATIONS_ERROR
 
+    @offloadable(Priority.BACKGROUND, fallback=STUDY_SUMMARY_ERROR)
     async def generate_study_summary(self, topic: str, duration_minutes: float, 
                                    completed_intervals: int, questions: List[Dict]) -> str:
         """Generate a summary of the study session with interval details."""
@@ -232,15 +497,12 @@ class AIService:
         """
 
         try:
-            chat_completion = self.groq_client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model="llama-3.3-70b-versatile",
-            )
-            return chat_completion.choices[0].message.content.strip()
+            return await self._chat(prompt, Priority.BACKGROUND)
         except Exception as e:
             print(f"❌ Error generating summary: {e}")
-            return "Failed to generate study session summary."
+            return STUDY_SUMMARY_ERROR
 
+    @offloadable(Priority.QUIZ)
     async def generate_study_plan(self, prompt: str) -> Dict:
         """Generate a study plan based on user's natural language prompt."""
         ai_prompt = f"""
@@ -272,12 +534,8 @@ class AIService:
         """
 
         try:
-            chat_completion = self.groq_client.chat.completions.create(
-                messages=[{"role": "user", "content": ai_prompt}],
-                model="llama-3.3-70b-versatile",
-                response_format={"type": "json_object"}
-            )
-            result = json.loads(chat_completion.choices[0].message.content.strip())
+            result_text = await self._chat(ai_prompt, Priority.QUIZ, json_mode=True)
+            result = json.loads(result_text)
             
             # Validate plan format
             if not all(key in result for key in ["topic", "total_duration_minutes", "sessions", "description"]):
@@ -289,6 +547,25 @@ class AIService:
             print(f"❌ Error generating study plan: {e}")
             return None
 
+    @staticmethod
+    def _load_json(result_text: str) -> Dict:
+        """Parse a JSON reply, tolerating code fences and single quotes."""
+        result_text = result_text.strip('`').strip()
+        if result_text.lower().startswith("json"):
+            result_text = result_text[4:].strip()
+        return json.loads(result_text.replace("'", '"'))
+
+    @staticmethod
+    def shuffle_options(q: Dict) -> Dict:
+        """Return a copy of the question with its options reordered and the answer letter remapped."""
+        options = list(q["options"])
+        correct = ord(str(q["answer"]).strip().upper()[:1] or "?") - 65
+        if not 0 <= correct < len(options):
+            return dict(q)  # Answer is not a plain option letter, keep the original order
+        order = list(range(len(options)))
+        random.shuffle(order)
+        return {**q, "options": [options[i] for i in order], "answer": chr(65 + order.index(correct))}
+
     @staticmethod
     def normalize_question(q: Dict) -> Dict:
         """Normalize question structure."""
@@ -0,0 +1,97 @@
+import asyncio
+import multiprocessing
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Optional
+
+# Per-process state of a worker; set up once by _init_worker
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_service = None
+
+def _init_worker() -> None:
+    """Give the worker its own event loop and AIService, reused for every job."""
+    global _worker_loop, _worker_service
+    from .ai_service import AIService
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+    _worker_service = AIService()
+
+def _run_job(method: str, args: tuple, kwargs: dict) -> Any:
+    """Run one AIService method to completion inside the worker."""
+    return _worker_loop.run_until_complete(getattr(_worker_service, method)(*args, **kwargs))
+
+def _run_stream_job(method: str, args: tuple, kwargs: dict, results) -> None:
+    """Drain an AIService async generator inside the worker, passing each item back through ``results``."""
+    async def pump():
+        async for item in getattr(_worker_service, method)(*args, **kwargs):
+            results.put(("item", item))
+    try:
+        _worker_loop.run_until_complete(pump())
+        results.put(("done", None))
+    except Exception as e:
+        results.put(("error", str(e)))
+
+def _ping() -> bool:
+    return True
+
+class AIWorkerPool:
+    """Runs AIService jobs in separate worker processes.
+
+    Prompt building, the Groq round trip and parsing of large JSON replies
+    happen in the workers, so the bot's event loop only awaits a future and
+    stays free for Discord traffic. Each worker handles one job at a time.
+    Streaming jobs send their items back through a manager queue as they are
+    produced.
+    """
+    # How long to block on a stream's queue before checking the job is still alive
+    STREAM_POLL = 1.0
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        context = multiprocessing.get_context("spawn")
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker
+        )
+        self.manager = context.Manager()
+
+    async def start(self) -> None:
+        """Spawn the workers up front so the first command does not pay for process start-up."""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _ping) for _ in range(self.workers)))
+        print(f"🧵 {self.workers} AI worker siap")
+
+    async def run(self, method: str, *args, **kwargs) -> Any:
+        """Run ``AIService.<method>(*args, **kwargs)`` on a worker and return its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, _run_job, method, args, kwargs)
+
+    async def stream(self, method: str, *args, **kwargs) -> AsyncIterator[Any]:
+        """Run the async generator ``AIService.<method>`` on a worker, yielding items as they arrive.
+
+        If the reader stops early the worker still finishes the job; its
+        remaining items are discarded.
+        """
+        loop = asyncio.get_running_loop()
+        results = self.manager.Queue()
+        job = loop.run_in_executor(self.executor, _run_stream_job, method, args, kwargs, results)
+        while True:
+            try:
+                kind, value = await loop.run_in_executor(None, results.get, True, self.STREAM_POLL)
+            except queue.Empty:
+                if job.done():
+                    job.result()  # Raises if the worker died
+                    return
+                continue
+            if kind == "item":
+                yield value
+            elif kind == "error":
+                raise RuntimeError(value)
+            else:
+                return
+
+    def stop(self) -> None:
+        """Shut the workers down, dropping jobs that have not started."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.manager.shutdown()
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import os
+import uuid
+from typing import Dict, List, Optional, Tuple
+from .config import config
+from .database import db
+
+PerformanceKey = Tuple[str, str, str]  # (user_id, topic, difficulty)
+
+class AnswerBuffer:
+    """Write-behind queue for quiz answers.
+
+    Answers are acknowledged as soon as they are appended to a local spill file.
+    A background task flushes them to ``quiz_answers`` in one bulk request and
+    applies coalesced per-user/per-topic performance deltas, either every
+    ``flush_interval`` seconds or once ``max_batch`` answers are pending.
+    Anything not yet flushed is replayed from the spill file on the next start.
+    """
+    def __init__(self, database, spill_path: str, flush_interval: float = 2.0, max_batch: int = 50):
+        self.database = database
+        self.spill_path = spill_path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.answers: List[Dict] = []
+        # Deltas whose answers are already stored but whose performance update is still pending
+        self.extra_deltas: Dict[PerformanceKey, List[int]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Replay spilled answers and start the periodic flush task."""
+        self._replay_spill_file()
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the flush task and write out everything still pending."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def add_answer(self, quiz_question_id: str, user_id: str, user_answer: str, is_correct: bool,
+                   duration_seconds: float, topic: str, difficulty: str) -> None:
+        """Queue an answer and its performance delta without waiting for the database."""
+        record = {
+            "type": "answer",
+            "id": str(uuid.uuid4()),
+            "quiz_question_id": quiz_question_id,
+            "user_id": user_id,
+            "user_answer": user_answer,
+            "is_correct": is_correct,
+            "duration_seconds": duration_seconds,
+            "topic": topic,
+            "difficulty": difficulty,
+        }
+        self._append_spill([record])
+        self.answers.append(record)
+
+        if len(self.answers) >= self.max_batch:
+            asyncio.create_task(self.flush())
+
+    async def flush(self) -> None:
+        """Write pending answers in one request and apply coalesced performance deltas."""
+        async with self._flush_lock:
+            answers, self.answers = self.answers, []
+            previous_extra, self.extra_deltas = self.extra_deltas, {}
+            if not answers and not previous_extra:
+                return
+
+            deltas = self.coalesce(answers)
+            for key, (questions, correct) in previous_extra.items():
+                self._add_delta(deltas, key, questions, correct)
+
+            try:
+                if answers:
+                    await self.database.save_answers_bulk([self._answer_row(a) for a in answers])
+            except Exception as e:
+                print(f"❌ Error flushing answers: {e}")
+                self.answers = answers + self.answers
+                for key, (questions, correct) in previous_extra.items():
+                    self._add_delta(self.extra_deltas, key, questions, correct)
+                return
+
+            # The answers are stored, so only their performance deltas may be replayed
+            # after a crash; each one leaves the spill file as soon as it is applied
+            for key, (questions, correct) in deltas.items():
+                self._add_delta(self.extra_deltas, key, questions, correct)
+            self._rewrite_spill_file()
+
+            for key, (questions, correct) in deltas.items():
+                try:
+                    await self.database.increment_performance(*key, questions, correct)
+                except Exception as e:
+                    print(f"❌ Error updating performance: {e}")
+                    continue
+                del self.extra_deltas[key]
+                self._rewrite_spill_file()
+
+    @staticmethod
+    def coalesce(answers: List[Dict]) -> Dict[PerformanceKey, List[int]]:
+        """Sum answers into one (questions, correct) delta per user, topic and difficulty."""
+        deltas: Dict[PerformanceKey, List[int]] = {}
+        for a in answers:
+            AnswerBuffer._add_delta(deltas, (a["user_id"], a["topic"], a["difficulty"]),
+                                    1, 1 if a["is_correct"] else 0)
+        return deltas
+
+    @staticmethod
+    def _add_delta(deltas: Dict[PerformanceKey, List[int]], key: PerformanceKey,
+                   questions: int, correct: int) -> None:
+        delta = deltas.setdefault(key, [0, 0])
+        delta[0] += questions
+        delta[1] += correct
+
+    @staticmethod
+    def _answer_row(record: Dict) -> Dict:
+        """Strip buffer-only fields from a record to get a quiz_answers row."""
+        return {
+            "id": record["id"],
+            "quiz_question_id": record["quiz_question_id"],
+            "user_id": record["user_id"],
+            "user_answer": record["user_answer"],
+            "is_correct": record["is_correct"],
+            "duration_seconds": record["duration_seconds"],
+        }
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def _append_spill(self, records: List[Dict]) -> None:
+        os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+
+    def _rewrite_spill_file(self) -> None:
+        """Replace the spill file with only what is still pending."""
+        records = list(self.answers) + [
+            {"type": "performance", "user_id": u, "topic": t, "difficulty": d,
+             "questions": questions, "correct": correct}
+            for (u, t, d), (questions, correct) in self.extra_deltas.items()
+        ]
+        if not records:
+            if os.path.exists(self.spill_path):
+                os.remove(self.spill_path)
+            return
+
+        tmp_path = self.spill_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        os.replace(tmp_path, self.spill_path)
+
+    def _replay_spill_file(self) -> None:
+        if not os.path.exists(self.spill_path):
+            return
+
+        with open(self.spill_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partially written line from a crash
+                if record.get("type") == "performance":
+                    self._add_delta(self.extra_deltas,
+                                    (record["user_id"], record["topic"], record["difficulty"]),
+                                    record["questions"], record["correct"])
+                else:
+                    self.answers.append(record)
+
+        if self.answers or self.extra_deltas:
+            print(f"♻️ Memulihkan {len(self.answers)} jawaban yang belum tersimpan")
+
+answer_buffer = AnswerBuffer(
+    db,
+    config.ANSWER_SPILL_PATH,
+    flush_interval=config.ANSWER_FLUSH_INTERVAL,
+    max_batch=config.ANSWER_BATCH_SIZE,
+)
@@ -1,13 +1,58 @@
+import asyncio
 import uuid
 import discord
 from discord.ext import commands
 from discord import app_commands
-from typing import Dict, List
+from typing import AsyncIterator, Dict, List
+from .config import config
 from .database import db
+from .answer_buffer import answer_buffer
 from .ai_service import ai_service
-from .quiz_manager import quiz_manager
+from .quiz_manager import quiz_manager, QuizSession
+from .recommendations import recommendation_engine
 from .study_manager import study_manager, StudySessionState
-from .utils import send_long_message, ensure_user_registered
+from .utils import send_long_message, send_streamed_message, ensure_user_registered
+
+async def continue_quiz_generation(session: QuizSession, stream: AsyncIterator[Dict], expected_total: int) -> None:
+    """Save and append the remaining streamed questions to a quiz that has already started.
+
+    Questions are appended through quiz_manager.update_session, so answers
+    another bot process records in the meantime are kept, not overwritten.
+    """
+    total = len(session.questions)
+    try:
+        async for question in stream:
+            current = await quiz_manager.get_session(session.user_id)
+            if current is None or current.session_id != session.session_id:
+                break  # Quiz ended or was replaced by a new one
+            question_ids = await db.save_questions_bulk(session.topic, session.difficulty, [question])
+            quiz_question_ids = await db.save_quiz_questions_bulk(
+                session.session_id, question_ids, start_sequence=len(current.questions) + 1
+            )
+            if not quiz_question_ids:
+                continue
+            current = await quiz_manager.update_session(
+                session.user_id, session.session_id,
+                lambda s: s.append_question(question, quiz_question_ids[0])
+            )
+            if current is None:
+                break
+            total = len(current.questions)
+    except Exception as e:
+        print(f"❌ Error continuing quiz generation: {e}")
+    finally:
+        session.finish_generating()
+        current = await quiz_manager.update_session(session.user_id, session.session_id,
+                                                    QuizSession.finish_generating)
+        if current is not None:
+            total = len(current.questions)
+        await stream.aclose()
+
+    if total != expected_total:
+        try:
+            await db.update_quiz_session_total(session.session_id, total)
+        except Exception as e:
+            print(f"❌ Error updating quiz total: {e}")
 
 class StudyConfirmationView(discord.ui.View):
     def __init__(self, command_instance, study_plan: dict, channel: discord.TextChannel, original_prompt: str):
@@ -22,7 +67,7 @@ class StudyConfirmationView(discord.ui.View):
         user_id = str(interaction.user.id)
         
         try:
-            session = study_manager.create_session(
+            session = await study_manager.create_session(
                 user_id,
                 self.study_plan["topic"],
                 self.study_plan,
@@ -172,51 +217,72 @@ class QuizCommands(app_commands.Group):
     async def quiz(self, interaction: discord.Interaction, prompt: str):
         await interaction.response.defer(ephemeral=True)
         user_id = str(interaction.user.id)
-        username = interaction.user.name
-        
-        # Save or update user
-        db.upsert_user(user_id, username)
 
-        # Generate questions
-        topic_keyword, difficulty, jumlah_soal, questions = await ai_service.generate_soal(prompt)
+        # Parse the request first so stored questions can be reused before generating
+        topic_keyword, difficulty, jumlah_soal = await ai_service.parse_quiz_request(prompt)
+
+        # Match topic with existing ones
+        existing_topics = await db.get_existing_topics(difficulty)
+        topic_to_save = await ai_service.match_topic(topic_keyword, difficulty, existing_topics)
+
+        # Serve unseen questions from the bank and only generate the shortfall
+        banked_questions = []
+        if config.QUESTION_BANK_ENABLED:
+            banked_questions = await db.get_unseen_questions(user_id, topic_to_save, difficulty, jumlah_soal)
+        missing = jumlah_soal - len(banked_questions)
+
+        # In streaming mode the quiz starts with what is ready (banked questions or the
+        # first generated one) and the rest is appended while the user answers
+        stream = None
+        new_questions = []
+        if missing > 0 and config.QUIZ_STREAMING:
+            stream = ai_service.stream_questions(topic_to_save, difficulty, missing)
+            if not banked_questions:
+                first_question = await anext(stream, None)
+                new_questions = [first_question] if first_question else []
+        elif missing > 0:
+            new_questions = await ai_service.generate_questions(topic_to_save, difficulty, missing)
+        questions = banked_questions + new_questions
         
         if not questions:
+            if stream:
+                await stream.aclose()
             await interaction.followup.send(f"❌ Gagal membuat soal dari prompt Anda: *{prompt}*. Coba lagi dengan format yang lebih jelas.")
             return
-            
-        # Match topic with existing ones
-        existing_topics = db.get_existing_topics(difficulty)
-        topic_to_save = await ai_service.match_topic(topic_keyword, difficulty, existing_topics)
+
+        await db.register_topic(topic_to_save, difficulty)
         
         # Create quiz session in database
-        session = quiz_manager.get_session(user_id)
+        session = await quiz_manager.get_session(user_id)
         if session:
-            quiz_manager.end_session(user_id)
+            await quiz_manager.end_session(user_id)
             
-        session_id = quiz_manager.create_session(user_id, questions, topic_to_save, difficulty, []).session_id
-        db.create_quiz_session(session_id, user_id, topic_to_save, difficulty, len(questions))
+        session_id = str(uuid.uuid4())
+        total_questions = jumlah_soal if stream else len(questions)
+        await db.create_quiz_session(session_id, user_id, topic_to_save, difficulty, total_questions)
         
-        # Save questions and get IDs
-        quiz_question_ids = []
-        for i, q in enumerate(questions):
-            qid = str(uuid.uuid4())
-            db.save_question(qid, topic_to_save, difficulty, q["question"], q["answer"], q["explanation"])
-            qq_id = db.save_quiz_question(session_id, qid, i + 1)
-            if qq_id:
-                quiz_question_ids.append(qq_id)
-            else:
-                await interaction.followup.send("❌ Kesalahan fatal (DB-ID). Silakan coba lagi.")
-                return
+        # Save new questions and all quiz links in one request each
+        question_ids = [q["id"] for q in banked_questions]
+        question_ids += await db.save_questions_bulk(topic_to_save, difficulty, new_questions)
+        quiz_question_ids = await db.save_quiz_questions_bulk(session_id, question_ids)
+        if len(quiz_question_ids) != len(questions):
+            if stream:
+                await stream.aclose()
+            await interaction.followup.send("❌ Kesalahan fatal (DB-ID). Silakan coba lagi.")
+            return
 
-        # Create new session with question IDs
-        session = quiz_manager.create_session(user_id, questions, topic_to_save, difficulty, quiz_question_ids)
+        session = await quiz_manager.create_session(user_id, questions, topic_to_save, difficulty,
+                                              quiz_question_ids, session_id=session_id,
+                                              generating=stream is not None)
+        if stream:
+            asyncio.create_task(continue_quiz_generation(session, stream, total_questions))
         
         # Send first question
         first_question = session.get_current_question()
         options_text = "\n".join([f"{chr(65+i)}. {opt}" for i, opt in enumerate(first_question["options"])])
         await interaction.followup.send(
             f"🎯 **Kuis Dimulai!**\nTopik: **{topic_to_save.title()}**\nKesulitan: **{difficulty.upper()}**\n"
-            f"Jumlah Soal: **{len(questions)}**\n\n"
+            f"Jumlah Soal: **{total_questions}**\n\n"
             f"**Pertanyaan 1:** {first_question['question']}\n\n{options_text}\n\n"
             f"Balas dengan `/answer <huruf>` untuk menjawab."
         )
@@ -225,24 +291,21 @@ class QuizCommands(app_commands.Group):
     @ensure_user_registered()
     async def answer(self, interaction: discord.Interaction, pilihan: str):
         user_id = str(interaction.user.id)
-        session = quiz_manager.get_session(user_id)
+        session = await quiz_manager.get_session(user_id)
         
         if not session:
             await interaction.response.send_message("❌ Kamu belum memulai kuis.")
             return
 
         # Check answer
+        answered = session.current
         is_correct = session.check_answer(pilihan)
-        if is_correct:
-            session.score += 1
             
-        # Save answer to database
+        # Queue answer and performance update; the buffer writes them in the background
         qq_id = session.get_current_question_id()
         duration = session.get_answer_duration()
-        db.save_answer(qq_id, user_id, pilihan.upper(), is_correct, duration)
-        
-        # Update performance summary
-        db.update_performance(user_id, session.topic, session.difficulty, is_correct)
+        answer_buffer.add_answer(qq_id, user_id, pilihan.upper(), is_correct, duration,
+                                 session.topic, session.difficulty)
 
         # Send feedback
         current_q = session.get_current_question()
@@ -250,11 +313,19 @@ class QuizCommands(app_commands.Group):
         feedback += f"Penjelasan: {current_q['explanation']}" if not is_correct else ""
         await interaction.response.send_message(feedback)
 
-        # Move to next question
-        session.move_to_next_question()
+        def record_answer(current: QuizSession) -> None:
+            if current.current == answered:  # Not yet recorded through another bot process
+                if is_correct:
+                    current.score += 1
+                current.move_to_next_question()
+
+        # Move to next question, waiting briefly if it is still being generated
+        session = await quiz_manager.update_session(user_id, session.session_id, record_answer)
+        if session is None:
+            return  # Quiz ended in the meantime
+        next_q = await quiz_manager.wait_for_current_question(session, config.QUIZ_NEXT_QUESTION_TIMEOUT)
         
-        if not session.is_finished():
-            next_q = session.get_current_question()
+        if next_q:
             options_text = "\n".join([f"{chr(65+i)}. {opt}" for i, opt in enumerate(next_q["options"])])
             await interaction.followup.send(
                 f"**Pertanyaan {session.current+1}:** {next_q['question']}\n\n{options_text}\n\n"
@@ -268,14 +339,16 @@ class QuizCommands(app_commands.Group):
                 f"⏱️ **Waktu Total:** {stats['total_duration']}\n"
                 f"⏳ **Rata-rata Waktu/Soal:** {stats['avg_duration_per_q']:.2f} detik"
             )
-            quiz_manager.end_session(user_id)
+            await quiz_manager.end_session(user_id)
+            recommendation_engine.schedule_refresh(user_id)
 
     @app_commands.command(name="performance", description="Lihat performa kamu dan dapatkan saran belajar")
     @ensure_user_registered()
     async def performance(self, interaction: discord.Interaction):
         await interaction.response.defer()
         user_id = str(interaction.user.id)
-        performance_data = db.get_performance_summary(user_id)
+        await answer_buffer.flush()
+        performance_data = await db.get_performance_summary(user_id)
         
         if not performance_data:
             await interaction.followup.send("📊 Belum ada data performa.")
@@ -290,7 +363,7 @@ class QuizCommands(app_commands.Group):
             data_text += f"📅 Terakhir diperbarui: {row['last_updated'][:10]}\n"
         
         # Generate AI suggestion
-        suggestion_text = await ai_service.generate_performance_suggestion(performance_data)
+        suggestion_text = await ai_service.generate_performance_suggestion(performance_data, user_id)
 
         # Send messages
         await send_long_message(interaction, data_text)
@@ -306,18 +379,15 @@ class QuizCommands(app_commands.Group):
         user_id = str(interaction.user.id)
         
         try:
-            # Get comprehensive learning history
-            learning_history = db.get_user_learning_history(user_id)
+            # Serve precomputed recommendations; they are refreshed in the background
+            recommendations = await recommendation_engine.get(user_id)
             
-            if not learning_history["topics_data"]:
+            if recommendations is None:
                 await interaction.followup.send(
                     "❌ Belum ada riwayat pembelajaran. Coba selesaikan beberapa kuis atau sesi belajar terlebih dahulu!"
                 )
                 return
             
-            # Generate recommendations
-            recommendations = await ai_service.generate_recommendations(learning_history)
-            
             # Send recommendations
             await send_long_message(
                 interaction,
@@ -344,7 +414,7 @@ class QuizCommands(app_commands.Group):
         
         try:
             # Check if user already has an active session
-            if study_manager.get_session(user_id):
+            if await study_manager.get_session(user_id):
                 await interaction.followup.send("❌ Anda sudah memiliki sesi belajar yang aktif!")
                 return
 
@@ -387,7 +457,7 @@ class QuizCommands(app_commands.Group):
             
         except Exception as e:
             await interaction.followup.send(f"❌ Error starting study session: {str(e)}")
-            study_manager.end_session(user_id)
+            await study_manager.end_session(user_id)
 
     @app_commands.command(name="ask", description="Ask a question during your study session")
     @ensure_user_registered()
@@ -396,7 +466,7 @@ class QuizCommands(app_commands.Group):
         user_id = str(interaction.user.id)
         
         # Get active session
-        session = study_manager.get_session(user_id)
+        session = await study_manager.get_session(user_id)
         if not session:
             await interaction.followup.send("❌ You don't have an active study session! Start one with `/quiz_bot study`")
             return
@@ -405,17 +475,16 @@ class QuizCommands(app_commands.Group):
             await interaction.followup.send("⏸️ You're on a break! Questions are paused during break intervals.")
             return
 
-        # Get answer from AI
-        answer = await ai_service.answer_study_question(session.topic, question)
-        
-        # Save question and answer to session history
-        session.add_question(question, answer)
-        
-        await send_long_message(
+        # Stream the answer from AI, editing the reply as tokens arrive
+        answer = await send_streamed_message(
             interaction,
-            f"📝 **Your Question:** {question}\n\n"
-            f"🤖 **Answer:**\n{answer}"
+            ai_service.stream_study_answer(session.topic, question),
+            prefix=f"📝 **Your Question:** {question}\n\n🤖 **Answer:**\n",
+            edit_interval=config.STREAM_EDIT_INTERVAL
         )
+        
+        # Save question and answer to session history
+        await session.add_question(question, answer)
 
     @app_commands.command(name="end_study", description="End your current study session")
     @ensure_user_registered()
@@ -423,11 +492,11 @@ class QuizCommands(app_commands.Group):
         await interaction.response.defer()
         user_id = str(interaction.user.id)
         
-        session = study_manager.get_session(user_id)
+        session = await study_manager.get_session(user_id)
         if not session:
             await interaction.followup.send("❌ You don't have an active study session!")
             return
 
         await session.end_session()
-        study_manager.end_session(user_id)
+        await study_manager.end_session(user_id)
         await interaction.followup.send("✅ Study session ended successfully!")
\ No newline at end of file
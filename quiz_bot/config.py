@@ -5,8 +5,47 @@ class Config:
     def __init__(self):
         load_dotenv()
         self.DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
+        self.BOT_PROCESSES = int(os.getenv("BOT_PROCESSES", "1"))
+        self.SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0"))
         self.SUPABASE_URL = os.getenv("SUPABASE_URL")
         self.SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+        self.DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "20"))
+        self.DB_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("DB_MAX_KEEPALIVE_CONNECTIONS", "10"))
+        self.DB_KEEPALIVE_EXPIRY = float(os.getenv("DB_KEEPALIVE_EXPIRY", "30"))
+        self.DB_TIMEOUT = float(os.getenv("DB_TIMEOUT", "10"))
+        self.QUESTION_BANK_ENABLED = os.getenv("QUESTION_BANK_ENABLED", "true").lower() == "true"
+        self.QUIZ_STREAMING = os.getenv("QUIZ_STREAMING", "true").lower() == "true"
+        self.QUIZ_NEXT_QUESTION_TIMEOUT = float(os.getenv("QUIZ_NEXT_QUESTION_TIMEOUT", "30"))
+        self.QUIZ_SESSION_STORE = os.getenv("QUIZ_SESSION_STORE", "sqlite").lower()
+        self.QUIZ_SESSION_SQLITE_PATH = os.getenv("QUIZ_SESSION_SQLITE_PATH", "data/quiz_sessions.db")
+        self.QUIZ_SESSION_TTL = float(os.getenv("QUIZ_SESSION_TTL", "86400"))
+        self.REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.TOPIC_CACHE_TTL = float(os.getenv("TOPIC_CACHE_TTL", "60"))
+        self.USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+        self.USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "3600"))
+        self.ANSWER_FLUSH_INTERVAL = float(os.getenv("ANSWER_FLUSH_INTERVAL", "2"))
+        self.ANSWER_BATCH_SIZE = int(os.getenv("ANSWER_BATCH_SIZE", "50"))
+        self.ANSWER_SPILL_PATH = os.getenv("ANSWER_SPILL_PATH", "data/answer_spill.jsonl")
         self.GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+        self.AI_WORKERS = int(os.getenv("AI_WORKERS", "0"))
+        self.GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "8"))
+        self.GROQ_REQUESTS_PER_MINUTE = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+        self.GROQ_TOKENS_PER_MINUTE = int(os.getenv("GROQ_TOKENS_PER_MINUTE", "12000"))
+        self.GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "3"))
+        self.GROQ_BACKOFF_MAX = float(os.getenv("GROQ_BACKOFF_MAX", "30"))
+        self.GROQ_BREAKER_THRESHOLD = int(os.getenv("GROQ_BREAKER_THRESHOLD", "5"))
+        self.GROQ_BREAKER_RESET = float(os.getenv("GROQ_BREAKER_RESET", "30"))
+        self.AI_QUIZ_CONCURRENCY = int(os.getenv("AI_QUIZ_CONCURRENCY", "6"))
+        self.AI_BACKGROUND_CONCURRENCY = int(os.getenv("AI_BACKGROUND_CONCURRENCY", "2"))
+        self.AI_QUEUE_LIMIT = int(os.getenv("AI_QUEUE_LIMIT", "20"))
+        self.AI_BACKGROUND_DEADLINE = float(os.getenv("AI_BACKGROUND_DEADLINE", "30"))
+        self.STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.0"))
+        self.RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", "5000000"))
+        self.RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "604800"))
+        self.RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.9"))
+        self.RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "data/response_cache.json")
+        self.TOPIC_MATCH_THRESHOLD = float(os.getenv("TOPIC_MATCH_THRESHOLD", "0.8"))
+        self.TOPIC_MATCH_MARGIN = float(os.getenv("TOPIC_MATCH_MARGIN", "0.15"))
+        self.TOPIC_MATCH_MIN_SCORE = float(os.getenv("TOPIC_MATCH_MIN_SCORE", "0.3"))
 
 config = Config()
\ No newline at end of file
@@ -1,7 +1,14 @@
-from supabase import create_client, Client
-from typing import Dict, List, Optional
+import asyncio
+from collections import OrderedDict
+from supabase import AsyncClient, AsyncClientOptions
+import httpx
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
 import datetime
+import inspect
+import time
+import uuid
 from .config import config
+from .topic_matcher import TopicMatcher
 
 from enum import Enum
 
@@ -11,17 +18,117 @@ class StudySessionState(Enum):
     COMPLETED = "completed"
     CANCELLED = "cancelled"
 
-class DatabaseManager:
+def aggregate_learning_history(performance: List[Dict], study_sessions: List[Dict],
+                               topic_totals: Optional[List[Dict]] = None) -> Dict:
+    """
+    Group performance rows and study sessions per topic in one pass over each list.
+
+    avg_score is weighted by the number of questions answered at each difficulty.
+    When server-side per-topic totals are given they are used for study counts and
+    time; otherwise those are summed from study_sessions.
+    """
+    topics_data: Dict[str, Dict] = {}
+
+    def topic_entry(topic: str) -> Dict:
+        if topic not in topics_data:
+            topics_data[topic] = {
+                "quiz_attempts": 0,
+                "avg_score": 0,
+                "total_questions": 0,
+                "study_sessions": 0,
+                "total_study_time": 0,
+                "difficulty_levels": set()
+            }
+        return topics_data[topic]
+
+    # Process quiz performance
+    weighted_scores: Dict[str, float] = {}
+    for perf in performance:
+        data = topic_entry(perf["topic"])
+        data["quiz_attempts"] += 1
+        data["total_questions"] += perf["total_questions"]
+        data["difficulty_levels"].add(perf["difficulty"])
+        weighted_scores[perf["topic"]] = weighted_scores.get(perf["topic"], 0) + perf["avg_score"] * perf["total_questions"]
+
+    for topic, weighted in weighted_scores.items():
+        data = topics_data[topic]
+        data["avg_score"] = weighted / data["total_questions"] if data["total_questions"] else 0
+
+    # Process study sessions
+    if topic_totals is not None:
+        for totals in topic_totals:
+            data = topic_entry(totals["topic"])
+            data["study_sessions"] += totals["study_sessions"]
+            data["total_study_time"] += totals["total_study_time"] or 0
+    else:
+        for session in study_sessions:
+            data = topic_entry(session["topic"])
+            data["study_sessions"] += 1
+            data["total_study_time"] += session.get("total_duration") or 0
+
+    # Convert sets to lists for JSON serialization
+    for topic_data in topics_data.values():
+        topic_data["difficulty_levels"] = sorted(topic_data["difficulty_levels"])
+
+    return {
+        "topics_data": topics_data,
+        "recent_study_sessions": study_sessions[:5],
+        "recent_performance": performance[:5]
+    }
+
+# How many recently saved questions are remembered for de-duplication
+QUESTION_ID_CACHE_SIZE = 10000
+# Incremental topic refreshes re-read this many seconds before the newest row
+# seen, so rows that committed after a later-timestamped row are not missed
+TOPIC_CURSOR_OVERLAP = 60
+
+class AsyncDatabaseManager:
+    """Supabase access for the bot, run as coroutines inside its event loop.
+
+    Each instance builds its own Supabase ``AsyncClient`` on top of its own
+    keep-alive ``httpx.AsyncClient``, so consecutive queries reuse pooled
+    connections instead of opening a new one each time. The bot uses the
+    module-level ``db`` instance.
+    """
     def __init__(self):
-        self.supabase: Client = create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=config.DB_MAX_CONNECTIONS,
+                max_keepalive_connections=config.DB_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=config.DB_KEEPALIVE_EXPIRY,
+            ),
+            timeout=config.DB_TIMEOUT,
+            follow_redirects=True,
+        )
+        self.supabase: AsyncClient = AsyncClient(
+            config.SUPABASE_URL,
+            config.SUPABASE_KEY,
+            AsyncClientOptions(httpx_client=self.http_client),
+        )
+        # difficulty -> known topics, with refresh bookkeeping for incremental reloads
+        self.topic_cache: Dict[str, Set[str]] = {}
+        self.topic_cache_refreshed: Dict[str, float] = {}
+        self.topic_cache_cursor: Dict[str, str] = {}
+        # Called with a user_id whenever that user's performance rows change
+        self.performance_listeners: List[Callable[[str], Optional[Awaitable[None]]]] = []
+        # (topic, difficulty, normalized text) -> future of the saved question's id
+        self.question_ids: "OrderedDict[Tuple[str, str, str], asyncio.Future]" = OrderedDict()
+
+    def add_performance_listener(self, listener: Callable[[str], Optional[Awaitable[None]]]) -> None:
+        """Register a callback (plain or async) for changes to a user's performance rows."""
+        self.performance_listeners.append(listener)
+
+    async def close(self) -> None:
+        """Close pooled HTTP connections."""
+        await self.http_client.aclose()
 
-    def upsert_user(self, user_id: str, username: str) -> None:
+    async def upsert_user(self, user_id: str, username: str) -> None:
         """Create or update user in database."""
-        self.supabase.table("users").upsert({"id": user_id, "username": username}).execute()
+        await self.supabase.table("users").upsert({"id": user_id, "username": username}).execute()
 
-    def create_quiz_session(self, session_id: str, user_id: str, topic: str, difficulty: str, total_questions: int) -> None:
+    async def create_quiz_session(self, session_id: str, user_id: str, topic: str, difficulty: str, total_questions: int) -> None:
         """Create a new quiz session."""
-        self.supabase.table("quiz_sessions").insert({
+        await self.supabase.table("quiz_sessions").insert({
             "id": session_id,
             "user_id": user_id,
             "topic": topic,
@@ -29,10 +136,16 @@ class DatabaseManager:
             "total_questions": total_questions
         }).execute()
 
-    def save_question(self, qid: str, topic: str, difficulty: str, question_text: str, 
+    async def update_quiz_session_total(self, session_id: str, total_questions: int) -> None:
+        """Correct a quiz session's question count once background generation is done."""
+        await self.supabase.table("quiz_sessions").update({
+            "total_questions": total_questions
+        }).eq("id", session_id).execute()
+
+    async def save_question(self, qid: str, topic: str, difficulty: str, question_text: str, 
                      correct_answer: str, explanation: str) -> None:
         """Save a question to the database."""
-        self.supabase.table("questions").insert({
+        await self.supabase.table("questions").insert({
             "id": qid,
             "topic": topic,
             "difficulty": difficulty,
@@ -41,9 +154,9 @@ class DatabaseManager:
             "explanation": explanation
         }).execute()
 
-    def save_quiz_question(self, session_id: str, question_id: str, sequence: int) -> Optional[str]:
+    async def save_quiz_question(self, session_id: str, question_id: str, sequence: int) -> Optional[str]:
         """Save quiz question and return its ID."""
-        result = self.supabase.table("quiz_questions").insert({
+        result = await self.supabase.table("quiz_questions").insert({
             "session_id": session_id,
             "question_id": question_id,
             "sequence": sequence
@@ -53,10 +166,89 @@ class DatabaseManager:
             return result.data[0]["id"]
         return None
 
-    def save_answer(self, quiz_question_id: str, user_id: str, user_answer: str, 
+    async def save_questions_bulk(self, topic: str, difficulty: str, questions: List[Dict]) -> List[str]:
+        """Save several questions in one request and return their IDs in order.
+
+        A question recently saved for the same topic and difficulty with the same
+        text, option order and answer, e.g. by another quiz that shared the same
+        generation, reuses that row.
+        """
+        loop = asyncio.get_running_loop()
+        futures, rows = [], []
+        for q in questions:
+            # Options are shuffled per quiz, so a reordered copy needs its own row
+            key = (topic, difficulty, TopicMatcher.normalize(q["question"]), tuple(q["options"]), q["answer"])
+            future = self.question_ids.get(key)
+            if future is None:
+                future = self.question_ids[key] = loop.create_future()
+                rows.append(({
+                    "id": str(uuid.uuid4()),
+                    "topic": topic,
+                    "difficulty": difficulty,
+                    "question_text": q["question"],
+                    "correct_answer": q["answer"],
+                    "explanation": q["explanation"],
+                    "options": q["options"]
+                }, key, future))
+            else:
+                self.question_ids.move_to_end(key)
+            futures.append(future)
+        while len(self.question_ids) > QUESTION_ID_CACHE_SIZE:
+            self.question_ids.popitem(last=False)
+
+        if rows:
+            try:
+                await self.supabase.table("questions").insert([row for row, _, _ in rows]).execute()
+            except BaseException:
+                # Also on cancellation, so later quizzes never wait on these rows forever
+                for _, key, future in rows:
+                    if self.question_ids.get(key) is future:
+                        del self.question_ids[key]
+                    future.set_result(None)
+                raise
+            for row, _, future in rows:
+                future.set_result(row["id"])
+
+        # Shielded so a cancelled caller does not cancel a row other quizzes wait for
+        question_ids = [await asyncio.shield(future) for future in futures]
+        if None in question_ids:
+            raise RuntimeError("Gagal menyimpan soal yang sama dari kuis lain")
+        return question_ids
+
+    async def get_unseen_questions(self, user_id: str, topic: str, difficulty: str, limit: int) -> List[Dict]:
+        """Get stored questions for a topic that the user has not been given yet (see sql/question_bank.sql)."""
+        result = await self.supabase.rpc("get_unseen_questions", {
+            "p_user_id": user_id,
+            "p_topic": topic,
+            "p_difficulty": difficulty,
+            "p_limit": limit
+        }).execute()
+        return [{
+            "id": row["id"],
+            "question": row["question_text"],
+            "options": row["options"],
+            "answer": row["correct_answer"],
+            "explanation": row["explanation"] or ""
+        } for row in (result.data or [])]
+
+    async def save_quiz_questions_bulk(self, session_id: str, question_ids: List[str], start_sequence: int = 1) -> List[str]:
+        """Link questions to a quiz session in one request and return the link IDs in sequence order."""
+        rows = [{
+            "session_id": session_id,
+            "question_id": question_id,
+            "sequence": start_sequence + i
+        } for i, question_id in enumerate(question_ids)]
+        if not rows:
+            return []
+
+        result = await self.supabase.table("quiz_questions").insert(rows).execute()
+        ids_by_sequence = {row["sequence"]: row["id"] for row in (result.data or [])}
+        return [ids_by_sequence[row["sequence"]] for row in rows if row["sequence"] in ids_by_sequence]
+
+    async def save_answer(self, quiz_question_id: str, user_id: str, user_answer: str, 
                    is_correct: bool, duration_seconds: float) -> None:
         """Save user's answer."""
-        self.supabase.table("quiz_answers").insert({
+        await self.supabase.table("quiz_answers").insert({
             "quiz_question_id": quiz_question_id,
             "user_id": user_id,
             "user_answer": user_answer,
@@ -64,144 +256,152 @@ class DatabaseManager:
             "duration_seconds": duration_seconds
         }).execute()
 
-    def update_performance(self, user_id: str, topic: str, difficulty: str, is_correct: bool) -> None:
+    async def save_answers_bulk(self, answers: List[Dict]) -> None:
+        """Save several answers in one request, skipping rows whose ID already exists."""
+        if answers:
+            await self.supabase.table("quiz_answers").upsert(answers, on_conflict="id", ignore_duplicates=True).execute()
+
+    async def update_performance(self, user_id: str, topic: str, difficulty: str, is_correct: bool) -> None:
         """Update user's performance summary."""
-        perf = self.supabase.table("performance_summary").select("*").eq("user_id", user_id).eq("topic", topic).execute()
-        
-        if perf.data:
-            data = perf.data[0]
-            total_correct = data["total_correct"] + (1 if is_correct else 0)
-            total_questions = data["total_questions"] + 1
-            avg_score = total_correct / total_questions * 100
-            
-            self.supabase.table("performance_summary").update({
-                "total_questions": total_questions,
-                "total_correct": total_correct,
-                "avg_score": avg_score,
-                "last_updated": datetime.datetime.now().isoformat()
-            }).eq("id", data["id"]).execute()
-        else:
-            self.supabase.table("performance_summary").insert({
-                "user_id": user_id,
-                "topic": topic,
-                "difficulty": difficulty,
-                "total_sessions": 1,
-                "total_questions": 1,
-                "total_correct": (1 if is_correct else 0),
-                "avg_score": (100 if is_correct else 0)
-            }).execute()
-
-    def get_performance_summary(self, user_id: str) -> List[Dict]:
+        await self.increment_performance(user_id, topic, difficulty, 1, 1 if is_correct else 0)
+
+    async def increment_performance(self, user_id: str, topic: str, difficulty: str,
+                                    questions: int, correct: int) -> None:
+        """Atomically add answer counts to a performance row (see sql/increment_performance.sql)."""
+        await self.supabase.rpc("increment_performance", {
+            "p_user_id": user_id,
+            "p_topic": topic,
+            "p_difficulty": difficulty,
+            "p_questions": questions,
+            "p_correct": correct
+        }).execute()
+        for listener in self.performance_listeners:
+            result = listener(user_id)
+            if inspect.isawaitable(result):
+                await result
+
+    async def get_performance_summary(self, user_id: str) -> List[Dict]:
         """Get user's performance summary."""
-        result = self.supabase.table("performance_summary").select("*").eq("user_id", user_id).execute()
+        result = await self.supabase.table("performance_summary").select("*").eq("user_id", user_id).execute()
         return result.data if result.data else []
         
-    def get_study_history(self, user_id: str, limit: int = 10) -> List[Dict]:
-        """Get user's recent study sessions with summaries and intervals."""
-        query = self.supabase.table("study_sessions")\
-            .select(
-                """
-                *,
-                study_summaries(summary),
-                study_intervals(
-                    id,
-                    sequence,
-                    duration_minutes,
-                    break_duration,
-                    focus
-                )
-                """
-            )\
+    async def get_study_history(self, user_id: str, limit: int = 10) -> List[Dict]:
+        """Get user's recent study sessions with interval totals (see sql/learning_history.sql).
+
+        Summary text and individual intervals are not included; use get_study_summary
+        and get_study_intervals when they are actually needed.
+        """
+        result = await self.supabase.table("study_session_totals")\
+            .select("*")\
             .eq("user_id", user_id)\
             .order("created_at", desc=True)\
-            .limit(limit)
-        
-        result = query.execute()
-        
-        # Process and structure the data
-        if result.data:
-            for session in result.data:
-                # Convert intervals to sorted list if present
-                if "study_intervals" in session:
-                    intervals = session["study_intervals"]
-                    session["study_intervals"] = sorted(
-                        intervals,
-                        key=lambda x: x["sequence"]
-                    ) if intervals else []
-                    
-                    # Calculate actual study time from intervals
-                    session["actual_duration"] = sum(
-                        interval["duration_minutes"]
-                        for interval in session["study_intervals"]
-                    )
-                else:
-                    session["study_intervals"] = []
-                    session["actual_duration"] = 0
-                    
+            .limit(limit)\
+            .execute()
+        return result.data if result.data else []
+
+    async def get_topic_study_totals(self, user_id: str) -> List[Dict]:
+        """Get per-topic study session counts and total study time."""
+        result = await self.supabase.table("topic_study_totals").select("*").eq("user_id", user_id).execute()
         return result.data if result.data else []
 
-    def get_user_learning_history(self, user_id: str) -> Dict:
+    async def get_study_summary(self, session_id: str) -> Optional[str]:
+        """Load the summary text of one study session."""
+        result = await self.supabase.table("study_summaries")\
+            .select("summary")\
+            .eq("session_id", session_id)\
+            .order("created_at", desc=True)\
+            .limit(1)\
+            .execute()
+        return result.data[0]["summary"] if result.data else None
+
+    async def get_study_intervals(self, session_id: str) -> List[Dict]:
+        """Load the intervals of one study session in sequence order."""
+        result = await self.supabase.table("study_intervals")\
+            .select("id, sequence, duration_minutes, break_duration, focus")\
+            .eq("session_id", session_id)\
+            .order("sequence")\
+            .execute()
+        return result.data if result.data else []
+
+    async def get_user_learning_history(self, user_id: str) -> Dict:
         """Get comprehensive user learning history including both quiz performance and study sessions."""
-        performance = self.get_performance_summary(user_id)
-        study_sessions = self.get_study_history(user_id)
-        
-        # Aggregate topics and their stats
-        topics_data = {}
-        
-        # Process quiz performance
-        for perf in performance:
-            topic = perf["topic"]
-            if topic not in topics_data:
-                topics_data[topic] = {
-                    "quiz_attempts": 0,
-                    "avg_score": 0,
-                    "total_questions": 0,
-                    "study_sessions": 0,
-                    "total_study_time": 0,
-                    "difficulty_levels": set()
-                }
-            
-            data = topics_data[topic]
-            data["quiz_attempts"] += 1
-            data["avg_score"] = perf["avg_score"]
-            data["total_questions"] += perf["total_questions"]
-            data["difficulty_levels"].add(perf["difficulty"])
-        
-            # Process study sessions
-            for session in study_sessions:
-                topic = session["topic"]
-                if topic not in topics_data:
-                    topics_data[topic] = {
-                        "quiz_attempts": 0,
-                        "avg_score": 0,
-                        "total_questions": 0,
-                        "study_sessions": 0,
-                        "total_study_time": 0,
-                        "difficulty_levels": set()
-                    }
-                
-                data = topics_data[topic]
-                data["study_sessions"] += 1
-                data["total_study_time"] += session.get("total_duration", 0)  # Use new total_duration field        # Convert sets to lists for JSON serialization
-        for topic_data in topics_data.values():
-            topic_data["difficulty_levels"] = list(topic_data["difficulty_levels"])
-        
-        return {
-            "topics_data": topics_data,
-            "recent_study_sessions": study_sessions[:5],
-            "recent_performance": performance[:5]
-        }
-
-    def get_existing_topics(self, difficulty: str) -> List[str]:
-        """Get existing topics for a given difficulty level."""
-        res = self.supabase.table("performance_summary").select("topic").eq("difficulty", difficulty).execute()
-        return list(set([row['topic'] for row in res.data]))
-
-    def create_study_session(self, session_id: str, user_id: str, topic: str, 
-                           study_plan: dict) -> None:
+        performance, study_sessions, topic_totals = await asyncio.gather(
+            self.get_performance_summary(user_id),
+            self.get_study_history(user_id, limit=5),
+            self.get_topic_study_totals(user_id)
+        )
+        return aggregate_learning_history(performance, study_sessions, topic_totals)
+
+    async def get_recommendation(self, user_id: str) -> Optional[Dict]:
+        """Get a user's precomputed recommendations (see sql/user_recommendations.sql)."""
+        result = await self.supabase.table("user_recommendations").select("*").eq("user_id", user_id).execute()
+        return result.data[0] if result.data else None
+
+    async def save_recommendation(self, user_id: str, content: str, fingerprint: str) -> None:
+        """Store fresh recommendations for a user."""
+        await self.supabase.table("user_recommendations").upsert({
+            "user_id": user_id,
+            "content": content,
+            "fingerprint": fingerprint,
+            "stale": False,
+            "updated_at": datetime.datetime.now().isoformat()
+        }).execute()
+
+    async def mark_recommendation_stale(self, user_id: str) -> None:
+        """Flag a user's recommendations as out of date."""
+        await self.supabase.table("user_recommendations").update({"stale": True}).eq("user_id", user_id).execute()
+
+    async def get_existing_topics(self, difficulty: str) -> List[str]:
+        """Get existing topics for a given difficulty level.
+
+        Served from an in-memory copy of the topics catalogue. The first call per
+        difficulty loads it in full; after TOPIC_CACHE_TTL seconds only rows
+        created since shortly before the last refresh are fetched.
+        """
+        topics = self.topic_cache.get(difficulty)
+        if topics is None:
+            res = await self.supabase.table("topics").select("topic, created_at")\
+                .eq("difficulty", difficulty).execute()
+            topics = self.topic_cache[difficulty] = set()
+            self._merge_topic_rows(difficulty, res.data or [])
+        elif time.monotonic() - self.topic_cache_refreshed[difficulty] > config.TOPIC_CACHE_TTL:
+            query = self.supabase.table("topics").select("topic, created_at").eq("difficulty", difficulty)
+            if self.topic_cache_cursor.get(difficulty):
+                since = datetime.datetime.fromisoformat(self.topic_cache_cursor[difficulty]) \
+                    - datetime.timedelta(seconds=TOPIC_CURSOR_OVERLAP)
+                # Rows in the overlap are read again; the cache is a set, so that is harmless
+                query = query.gte("created_at", since.isoformat())
+            res = await query.execute()
+            self._merge_topic_rows(difficulty, res.data or [])
+        return sorted(topics)
+
+    async def register_topic(self, topic: str, difficulty: str) -> None:
+        """Add a topic to the catalogue and the local cache if it is not there yet."""
+        if topic in self.topic_cache.get(difficulty, ()):
+            return
+        await self.supabase.table("topics").upsert(
+            {"topic": topic, "difficulty": difficulty},
+            on_conflict="difficulty,topic",
+            ignore_duplicates=True
+        ).execute()
+        # Difficulties that were never loaded pick the topic up on their first full load
+        if difficulty in self.topic_cache:
+            self.topic_cache[difficulty].add(topic)
+
+    def _merge_topic_rows(self, difficulty: str, rows: List[Dict]) -> None:
+        """Add fetched catalogue rows to the cache and advance the refresh cursor."""
+        self.topic_cache[difficulty].update(row["topic"] for row in rows)
+        created = [row["created_at"] for row in rows if row.get("created_at")]
+        if created:
+            self.topic_cache_cursor[difficulty] = max(created + [self.topic_cache_cursor.get(difficulty, "")])
+        self.topic_cache_refreshed[difficulty] = time.monotonic()
+
+    async def create_study_session(self, session_id: str, user_id: str, topic: str, 
+                           study_plan: dict, channel_id: Optional[str] = None,
+                           guild_id: Optional[str] = None) -> None:
         """Create a new study session with intervals."""
         # Create main session
-        self.supabase.table("study_sessions").insert({
+        await self.supabase.table("study_sessions").insert({
             "id": session_id,
             "user_id": user_id,
             "topic": topic,
@@ -210,42 +410,58 @@ class DatabaseManager:
             "start_time": datetime.datetime.now().isoformat(),
             "completed_intervals": 0,
             "current_interval": 0,
-            "description": study_plan.get("description", "")
+            "description": study_plan.get("description", ""),
+            "channel_id": channel_id,
+            "guild_id": guild_id
         }).execute()
         
-        # Create study intervals
-        for i, interval in enumerate(study_plan["sessions"]):
-            self.supabase.table("study_intervals").insert({
-                "session_id": session_id,
-                "sequence": i + 1,
-                "duration_minutes": interval["duration"],
-                "break_duration": interval["break"],
-                "focus": interval["focus"]
-            }).execute()
-
-    def update_study_session_state(self, session_id: str, state: StudySessionState, 
-                                 completed_intervals: int = None) -> None:
-        """Update study session state."""
+        # Create all study intervals in a single multi-row insert
+        intervals = [{
+            "session_id": session_id,
+            "sequence": i + 1,
+            "duration_minutes": interval["duration"],
+            "break_duration": interval["break"],
+            "focus": interval["focus"]
+        } for i, interval in enumerate(study_plan["sessions"])]
+        if intervals:
+            await self.supabase.table("study_intervals").insert(intervals).execute()
+
+    async def update_study_session_state(self, session_id: str, state: StudySessionState, 
+                                 completed_intervals: int = None, current_interval: int = None,
+                                 phase_ends_at: float = None) -> None:
+        """Update study session state, optionally with the running interval and its deadline."""
         data = {"state": state.value}
         if completed_intervals is not None:
             data["completed_intervals"] = completed_intervals
+        if current_interval is not None:
+            data["current_interval"] = current_interval
+        if phase_ends_at is not None:
+            data["phase_ends_at"] = datetime.datetime.fromtimestamp(phase_ends_at, datetime.timezone.utc).isoformat()
         
-        self.supabase.table("study_sessions").update(data).eq("id", session_id).execute()
+        await self.supabase.table("study_sessions").update(data).eq("id", session_id).execute()
 
-    def save_study_summary(self, session_id: str, summary: str) -> None:
+    async def save_study_summary(self, session_id: str, summary: str) -> None:
         """Save study session summary."""
-        self.supabase.table("study_summaries").insert({
+        await self.supabase.table("study_summaries").insert({
             "session_id": session_id,
             "summary": summary,
             "created_at": datetime.datetime.now().isoformat()
         }).execute()
 
-    def get_active_study_session(self, user_id: str) -> Optional[Dict]:
+    async def get_active_study_session(self, user_id: str) -> Optional[Dict]:
         """Get user's active study session if any."""
-        res = self.supabase.table("study_sessions").select("*")\
+        res = await self.supabase.table("study_sessions").select("*")\
             .eq("user_id", user_id)\
             .in_("state", [StudySessionState.ACTIVE.value, StudySessionState.RESTING.value])\
             .execute()
         return res.data[0] if res.data else None
 
-db = DatabaseManager()
\ No newline at end of file
+    async def get_active_study_sessions(self) -> List[Dict]:
+        """Get every active or resting study session with its intervals, for restoring timers."""
+        res = await self.supabase.table("study_sessions")\
+            .select("*, study_intervals(sequence, duration_minutes, break_duration, focus)")\
+            .in_("state", [StudySessionState.ACTIVE.value, StudySessionState.RESTING.value])\
+            .execute()
+        return res.data if res.data else []
+
+db = AsyncDatabaseManager()
\ No newline at end of file
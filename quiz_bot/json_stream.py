@@ -0,0 +1,58 @@
+import json
+from typing import Dict, List
+
+class JsonObjectStream:
+    """
+    Incrementally pull complete objects out of a streamed JSON document.
+
+    Feed text chunks as they arrive; every object that closes at ``depth``
+    (2 for the items of ``{"questions": [{...}, {...}]}``) is returned as soon
+    as its closing brace is seen, without waiting for the rest of the document.
+    """
+    def __init__(self, depth: int = 2):
+        self.depth = depth
+        self.buffer = ""
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escaped = False
+        self.object_start = None
+        self.position = 0
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """Consume a chunk and return the objects it completed."""
+        self.buffer += chunk
+        completed = []
+        while self.position < len(self.buffer):
+            char = self.buffer[self.position]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                if char == "{" and len(self.stack) == self.depth:
+                    self.object_start = self.position
+                self.stack.append(char)
+            elif char in "}]":
+                if self.stack:
+                    self.stack.pop()
+                if char == "}" and len(self.stack) == self.depth and self.object_start is not None:
+                    text = self.buffer[self.object_start:self.position + 1]
+                    self.object_start = None
+                    try:
+                        completed.append(json.loads(text))
+                    except json.JSONDecodeError:
+                        pass
+            self.position += 1
+
+        # Drop text that can no longer be part of a pending object
+        keep_from = self.object_start if self.object_start is not None else self.position
+        self.buffer = self.buffer[keep_from:]
+        self.position -= keep_from
+        if self.object_start is not None:
+            self.object_start = 0
+        return completed
@@ -0,0 +1,62 @@
+import sqlite3
+import threading
+from typing import Dict, List
+
+class LocalPerformanceStore:
+    """SQLite stand-in for the performance_summary table.
+
+    Runs the same single-statement upsert as sql/increment_performance.sql, so
+    counter updates can be exercised in tests and offline runs without Supabase.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connect().execute("""
+            CREATE TABLE IF NOT EXISTS performance_summary (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                total_sessions INTEGER NOT NULL DEFAULT 1,
+                total_questions INTEGER NOT NULL DEFAULT 0,
+                total_correct INTEGER NOT NULL DEFAULT 0,
+                avg_score REAL NOT NULL DEFAULT 0,
+                last_updated TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (user_id, topic)
+            )
+        """)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def update_performance(self, user_id: str, topic: str, difficulty: str, is_correct: bool) -> None:
+        """Update user's performance summary."""
+        self.increment_performance(user_id, topic, difficulty, 1, 1 if is_correct else 0)
+
+    def increment_performance(self, user_id: str, topic: str, difficulty: str,
+                              questions: int, correct: int) -> None:
+        """Atomically add answer counts to a performance row."""
+        self._connect().execute("""
+            INSERT INTO performance_summary
+                (user_id, topic, difficulty, total_sessions, total_questions, total_correct, avg_score)
+            VALUES (?, ?, ?, 1, ?, ?, ? * 100.0 / MAX(?, 1))
+            ON CONFLICT (user_id, topic) DO UPDATE SET
+                total_questions = total_questions + excluded.total_questions,
+                total_correct = total_correct + excluded.total_correct,
+                avg_score = (total_correct + excluded.total_correct) * 100.0
+                            / MAX(total_questions + excluded.total_questions, 1),
+                last_updated = CURRENT_TIMESTAMP
+        """, (user_id, topic, difficulty, questions, correct, correct, questions))
+
+    def get_performance_summary(self, user_id: str) -> List[Dict]:
+        """Get user's performance summary."""
+        rows = self._connect().execute(
+            "SELECT * FROM performance_summary WHERE user_id = ?", (user_id,)
+        ).fetchall()
+        return [dict(row) for row in rows]
@@ -0,0 +1,78 @@
+import re
+from typing import Optional, Tuple
+
+DEFAULT_DIFFICULTY = "sedang"
+DEFAULT_QUESTION_COUNT = 5
+# Larger requests are cut down to this many questions
+MAX_QUESTION_COUNT = 20
+MAX_TOPIC_WORDS = 5
+
+DIFFICULTY_WORDS = {
+    "mudah": "mudah", "gampang": "mudah", "ringan": "mudah", "easy": "mudah",
+    "sedang": "sedang", "menengah": "sedang", "medium": "sedang", "normal": "sedang",
+    "sulit": "sulit", "susah": "sulit", "sukar": "sulit", "berat": "sulit", "hard": "sulit",
+}
+
+# Only these count as a difficulty on their own; synonyms such as "berat" or
+# "normal" need a marker word in front, since they are common in topics too
+CANONICAL_DIFFICULTIES = {"mudah", "sedang", "sulit"}
+DIFFICULTY_MARKERS = {"kesulitan", "tingkat", "level"}
+
+NUMBER_WORDS = {
+    "satu": 1, "dua": 2, "tiga": 3, "empat": 4, "lima": 5,
+    "enam": 6, "tujuh": 7, "delapan": 8, "sembilan": 9, "sepuluh": 10,
+}
+
+FILLER_WORDS = {
+    "kuis", "quiz", "soal", "pertanyaan", "butir", "nomor", "buat", "buatkan", "bikin",
+    "bikinin", "berikan", "kasih", "tolong", "minta", "mau", "ingin", "saya", "aku",
+    "tentang", "mengenai", "seputar", "topik", "materi", "kesulitan", "tingkat", "level",
+    "jumlah", "sebanyak", "total", "dengan", "yang", "dan", "untuk", "ya", "dong",
+    "please", "about", "on", "questions", "question",
+}
+
+_NUMBER = r"(\d+|" + "|".join(NUMBER_WORDS) + r")"
+COUNT_PATTERNS = [
+    re.compile(r"\b(?:jumlah|sebanyak|total)\s*(?:soal\s*|pertanyaan\s*)?[:=]?\s*" + _NUMBER + r"\b"),
+    re.compile(r"\b" + _NUMBER + r"\s*(?:soal|pertanyaan|butir|nomor|questions?)\b"),
+]
+
+def _to_int(token: str) -> int:
+    return int(token) if token.isdigit() else NUMBER_WORDS[token]
+
+def parse_quiz_prompt(prompt: str) -> Optional[Tuple[str, str, int]]:
+    """
+    Extract (topic, difficulty, question count) from a quiz prompt with plain rules.
+
+    Handles prompts like "kuis integral kesulitan mudah jumlah 3" or
+    "buatkan 5 soal sulit tentang hukum newton". Numbers that are not a question
+    count stay in the topic ("perang dunia 2"). Returns None when no clean topic
+    keyword is left or a word could be either topic or difficulty ("kuis gaya
+    berat"), so the caller can fall back to a model. Counts above
+    MAX_QUESTION_COUNT are clamped to it.
+    """
+    text = re.sub(r"[^\w\s]", " ", prompt.lower())
+
+    count = DEFAULT_QUESTION_COUNT
+    for pattern in COUNT_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            count = min(_to_int(match.group(1)), MAX_QUESTION_COUNT)
+            text = text[:match.start()] + " " + text[match.end():]
+            break
+
+    difficulty = DEFAULT_DIFFICULTY
+    topic_words = []
+    previous = ""
+    for word in text.split():
+        if word in DIFFICULTY_WORDS:
+            if word not in CANONICAL_DIFFICULTIES and previous not in DIFFICULTY_MARKERS:
+                return None
+            difficulty = DIFFICULTY_WORDS[word]
+        elif word not in FILLER_WORDS:
+            topic_words.append(word)
+        previous = word
+
+    if not topic_words or len(topic_words) > MAX_TOPIC_WORDS or count < 1:
+        return None
+    return " ".join(topic_words), difficulty, count
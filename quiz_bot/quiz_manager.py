@@ -1,8 +1,17 @@
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
+import asyncio
 import datetime
+import json
+import time
 import uuid
+from .session_store import MemorySessionStore, create_session_store
+from .sharding import PROCESS_ID
 
 class QuizSession:
+    # Background generation that shows no progress for this many seconds is
+    # treated as dead, e.g. because its bot process crashed or restarted
+    GENERATION_TIMEOUT = 60
+
     def __init__(self, user_id: str, session_id: str, questions: List[Dict], 
                  quiz_question_ids: List[str], topic: str, difficulty: str):
         self.user_id = user_id
@@ -15,6 +24,99 @@ class QuizSession:
         self.score = 0
         self.start_time = datetime.datetime.now()
         self.question_start_time = datetime.datetime.now()
+        self._generating = False
+        # Wall-clock time background generation last made progress
+        self.heartbeat = 0.0
+        self._question_added = asyncio.Event()
+        # Bot process that created the session and runs its background generation
+        self.owner = PROCESS_ID
+        # Replaced with a fresh id on every save so other copies can tell they are outdated
+        self.version = ""
+
+    @property
+    def generating(self) -> bool:
+        """True while more questions are still being generated in the background."""
+        return self._generating and time.time() - self.heartbeat < self.GENERATION_TIMEOUT
+
+    @generating.setter
+    def generating(self, value: bool) -> None:
+        self._generating = value
+        if value:
+            self.heartbeat = time.time()
+
+    @property
+    def remote(self) -> bool:
+        """Whether another bot process generates this session's remaining questions."""
+        return self.owner != PROCESS_ID
+
+    def to_dict(self) -> Dict:
+        """Serialize to a compact dict; questions become [question, options, answer, explanation]."""
+        return {
+            "id": self.session_id,
+            "u": self.user_id,
+            "t": self.topic,
+            "d": self.difficulty,
+            "q": [[q["question"], q["options"], q["answer"], q.get("explanation", "")] for q in self.questions],
+            "qq": self.quiz_question_ids,
+            "c": self.current,
+            "s": self.score,
+            "st": self.start_time.timestamp(),
+            "qt": self.question_start_time.timestamp(),
+            "g": self.generating,
+            "gh": self.heartbeat,
+            "o": self.owner,
+            "v": self.version,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "QuizSession":
+        """Rebuild a session saved with to_dict."""
+        questions = [
+            {"question": q, "options": options, "answer": answer, "explanation": explanation}
+            for q, options, answer, explanation in data["q"]
+        ]
+        session = cls(data["u"], data["id"], questions, list(data["qq"]), data["t"], data["d"])
+        session.current = data["c"]
+        session.score = data["s"]
+        session.start_time = datetime.datetime.fromtimestamp(data["st"])
+        session.question_start_time = datetime.datetime.fromtimestamp(data["qt"])
+        session.generating = data.get("g", False)
+        session.heartbeat = data.get("gh", 0.0)
+        session.owner = data.get("o", session.owner)
+        session.version = data["v"]
+        return session
+
+    def append_question(self, question: Dict, quiz_question_id: str) -> None:
+        """Add a question that finished generating after the quiz started."""
+        self.questions.append(question)
+        self.quiz_question_ids.append(quiz_question_id)
+        self.heartbeat = time.time()
+        self._question_added.set()
+
+    def finish_generating(self) -> None:
+        """Mark background generation as done so waiters stop waiting."""
+        self.generating = False
+        self._question_added.set()
+
+    async def wait_for_current_question(self, timeout: float) -> Optional[Dict]:
+        """Get the current question, waiting for it if it is still being generated."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        waited = False
+        while self.current >= len(self.questions) and self.generating:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            waited = True
+            self._question_added.clear()
+            try:
+                await asyncio.wait_for(self._question_added.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        if waited:
+            # Time spent waiting for generation should not count as answering time
+            self.question_start_time = datetime.datetime.now()
+        return self.get_current_question()
 
     def get_current_question(self) -> Optional[Dict]:
         """Get the current question."""
@@ -46,7 +148,7 @@ class QuizSession:
 
     def is_finished(self) -> bool:
         """Check if the quiz is finished."""
-        return self.current >= len(self.questions)
+        return self.current >= len(self.questions) and not self.generating
 
     def get_final_stats(self) -> Dict:
         """Get final quiz statistics."""
@@ -68,24 +170,120 @@ class QuizSession:
         }
 
 class QuizManager:
-    def __init__(self):
+    """Tracks active quizzes in a pluggable session store.
+
+    Deserialized sessions are cached per user and reused while their version
+    matches the stored one, so the same object is returned between saves.
+    Saves only succeed against the version that was loaded, so bot processes
+    sharing the store cannot overwrite each other's changes; ``update_session``
+    retries a change on a fresh copy when that happens.
+    """
+    # How often a session generated by another process is re-read while waiting
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, store=None):
+        self.store = store or MemorySessionStore()
         self.active_sessions: Dict[str, QuizSession] = {}
 
-    def create_session(self, user_id: str, questions: List[Dict], topic: str, 
-                      difficulty: str, quiz_question_ids: List[str]) -> QuizSession:
-        """Create a new quiz session."""
-        session_id = str(uuid.uuid4())
+    async def create_session(self, user_id: str, questions: List[Dict], topic: str, 
+                      difficulty: str, quiz_question_ids: List[str],
+                      session_id: Optional[str] = None, generating: bool = False) -> QuizSession:
+        """Create a new quiz session, replacing any previous one of the user."""
+        session_id = session_id or str(uuid.uuid4())
         session = QuizSession(user_id, session_id, questions, quiz_question_ids, topic, difficulty)
+        session.generating = generating
+        session.version = uuid.uuid4().hex
         self.active_sessions[user_id] = session
+        await self.store.set(user_id, self._dump(session))
         return session
 
-    def get_session(self, user_id: str) -> Optional[QuizSession]:
+    async def save_session(self, session: QuizSession) -> bool:
+        """Persist a session after it changed.
+
+        Returns False without saving if another process saved the session
+        since it was loaded.
+        """
+        expected = session.version
+        session.version = uuid.uuid4().hex
+        if await self.store.compare_and_set(session.user_id, expected, self._dump(session)):
+            return True
+        session.version = expected
+        if self.active_sessions.get(session.user_id) is session:
+            del self.active_sessions[session.user_id]
+        return False
+
+    async def update_session(self, user_id: str, session_id: str,
+                             change: Callable[[QuizSession], None]) -> Optional[QuizSession]:
+        """Apply ``change`` to the stored session and save it.
+
+        On a conflicting save the session is reloaded and the change applied
+        again. Returns the saved session, or None if the quiz has ended or was
+        replaced by a new one.
+        """
+        while True:
+            session = await self.get_session(user_id)
+            if session is None or session.session_id != session_id:
+                return None
+            change(session)
+            if await self.save_session(session):
+                return session
+
+    async def get_session(self, user_id: str) -> Optional[QuizSession]:
         """Get an active quiz session for a user."""
-        return self.active_sessions.get(user_id)
+        data = await self.store.get(user_id)
+        if data is None:
+            self.active_sessions.pop(user_id, None)
+            return None
 
-    def end_session(self, user_id: str) -> None:
+        data = json.loads(data)
+        cached = self.active_sessions.get(user_id)
+        if cached and cached.session_id == data["id"] and cached.version == data["v"]:
+            return cached
+        session = QuizSession.from_dict(data)
+        self.active_sessions[user_id] = session
+        return session
+
+    async def wait_for_current_question(self, session: QuizSession, timeout: float) -> Optional[Dict]:
+        """Get the session's current question, waiting while it is still being generated.
+
+        Questions generated by this process wake the waiter through the
+        session's own event; the store is also polled, since the question may
+        have been appended to another copy of the session.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        waited = False
+        while session.current >= len(session.questions) and session.generating:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            waited = True
+            if session.remote:
+                await asyncio.sleep(min(self.POLL_INTERVAL, remaining))
+            else:
+                session._question_added.clear()
+                try:
+                    await asyncio.wait_for(session._question_added.wait(), min(self.POLL_INTERVAL, remaining))
+                except asyncio.TimeoutError:
+                    pass
+            stored = await self.get_session(session.user_id)
+            if stored is None or stored.session_id != session.session_id:
+                break
+            session.questions = stored.questions
+            session.quiz_question_ids = stored.quiz_question_ids
+            session.generating = stored.generating
+            session.heartbeat = stored.heartbeat
+        if waited:
+            session.question_start_time = datetime.datetime.now()
+        return session.get_current_question()
+
+    async def end_session(self, user_id: str) -> None:
         """End a quiz session."""
-        if user_id in self.active_sessions:
-            del self.active_sessions[user_id]
+        self.active_sessions.pop(user_id, None)
+        await self.store.delete(user_id)
+
+    @staticmethod
+    def _dump(session: QuizSession) -> str:
+        return json.dumps(session.to_dict(), separators=(",", ":"))
 
-quiz_manager = QuizManager()
\ No newline at end of file
+quiz_manager = QuizManager(create_session_store())
\ No newline at end of file
@@ -0,0 +1,116 @@
+import asyncio
+import hashlib
+import json
+from typing import Awaitable, Callable, Dict, Optional
+from .ai_service import ai_service, RECOMMENDATIONS_ERROR
+from .answer_buffer import answer_buffer
+from .database import db
+
+class RecommendationEngine:
+    """Precomputes /ilham recommend results in the background.
+
+    Recommendations are refreshed after a quiz or study session ends and stored
+    per user with the fingerprint of the learning history they were built from.
+    The command serves the stored result right away; the model is only called
+    again when the fingerprint shows the history has materially changed. The
+    stale flag lives in the database so every bot process sees it.
+    """
+    def __init__(self, database, ai, before_refresh: Optional[Callable[[], Awaitable[None]]] = None):
+        self.database = database
+        self.ai = ai
+        self.before_refresh = before_refresh
+        # user_id -> {"content", "fingerprint", "stale"}, last read or written;
+        # served when the database cannot be reached
+        self.records: Dict[str, Dict] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+
+    async def get(self, user_id: str) -> Optional[str]:
+        """Return the latest recommendations, computing them now only if none exist."""
+        record = await self._load(user_id)
+        if record is None:
+            record = await self.schedule_refresh(user_id)
+            return record["content"] if record else None
+
+        if record["stale"]:
+            self.schedule_refresh(user_id)
+        return record["content"]
+
+    async def mark_stale(self, user_id: str) -> None:
+        """Flag stored recommendations as possibly out of date."""
+        record = self.records.get(user_id)
+        if record:
+            record["stale"] = True
+        try:
+            await self.database.mark_recommendation_stale(user_id)
+        except Exception as e:
+            print(f"❌ Error marking recommendations stale: {e}")
+
+    def schedule_refresh(self, user_id: str) -> asyncio.Task:
+        """Start a background refresh for the user unless one is already running."""
+        task = self.tasks.get(user_id)
+        if task is None:
+            task = asyncio.create_task(self.refresh(user_id))
+            self.tasks[user_id] = task
+            task.add_done_callback(lambda _: self.tasks.pop(user_id, None))
+        return task
+
+    async def refresh(self, user_id: str) -> Optional[Dict]:
+        """Rebuild recommendations if the learning history changed since the last run."""
+        try:
+            if self.before_refresh:
+                await self.before_refresh()
+            history = await self.database.get_user_learning_history(user_id)
+            if not history["topics_data"]:
+                return None
+
+            current = await self._load(user_id)
+            fingerprint = self.fingerprint(history)
+            if current and current["fingerprint"] == fingerprint:
+                if current["stale"]:
+                    current["stale"] = False
+                    await self.database.save_recommendation(user_id, current["content"], fingerprint)
+                return current
+
+            if current:
+                await self.database.mark_recommendation_stale(user_id)
+            content = await self.ai.generate_recommendations(history)
+            if content == RECOMMENDATIONS_ERROR:
+                return current or {"content": content, "fingerprint": None, "stale": True}
+
+            record = {"content": content, "fingerprint": fingerprint, "stale": False}
+            self.records[user_id] = record
+            await self.database.save_recommendation(user_id, content, fingerprint)
+            return record
+        except Exception as e:
+            print(f"❌ Error refreshing recommendations: {e}")
+            return self.records.get(user_id)
+
+    @staticmethod
+    def fingerprint(history: Dict) -> str:
+        """Hash the learning history coarsely so small score changes do not trigger a refresh."""
+        topics = sorted(
+            (
+                topic,
+                round(float(data["avg_score"]) / 5),  # 5% score buckets
+                data["total_questions"] // 5,
+                data["study_sessions"],
+                sorted(data["difficulty_levels"]),
+            )
+            for topic, data in history["topics_data"].items()
+        )
+        return hashlib.sha256(json.dumps(topics).encode()).hexdigest()
+
+    async def _load(self, user_id: str) -> Optional[Dict]:
+        """Read the stored recommendations, including a stale flag set by another bot process."""
+        try:
+            row = await self.database.get_recommendation(user_id)
+        except Exception as e:
+            print(f"❌ Error loading recommendations: {e}")
+            return self.records.get(user_id)
+        if not row:
+            return self.records.get(user_id)
+        record = {"content": row["content"], "fingerprint": row["fingerprint"], "stale": row["stale"]}
+        self.records[user_id] = record
+        return record
+
+recommendation_engine = RecommendationEngine(db, ai_service, before_refresh=answer_buffer.flush)
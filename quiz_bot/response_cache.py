@@ -0,0 +1,165 @@
+import json
+import os
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Optional, Set, Tuple
+import numpy as np
+from .topic_matcher import TopicMatcher
+
+CacheKey = Tuple[str, str]  # (topic, normalized question)
+
+# Conversational filler that does not change what is being asked
+FILLER_WORDS = frozenset({"ya", "yah", "sih", "dong", "deh", "nih", "kah", "tolong", "please", "pls"})
+
+class ResponseCache:
+    """LRU + TTL cache of study answers with near-duplicate lookup.
+
+    Answers are keyed on (topic, normalized question). A miss on the exact key
+    falls back to comparing hashed character n-gram vectors of the questions
+    cached for the same topic, so "apa itu turunan?" and "apa itu turunan ya"
+    share one answer. Only questions with the same words apart from filler
+    are compared, since a single digit or negation ("newton 1" vs "newton 3",
+    "integral tentu" vs "integral tak tentu") changes the answer while barely
+    moving the vector. Entries are evicted least-recently-used first once the
+    cache grows past ``max_bytes`` and expire after ``ttl`` seconds.
+    """
+    def __init__(self, max_bytes: int = 5_000_000, ttl: float = 7 * 24 * 3600,
+                 similarity: float = 0.9, path: Optional[str] = None, dimensions: int = 2048):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.similarity = similarity
+        self.path = path
+        self.dimensions = dimensions
+        self.entries: "OrderedDict[CacheKey, Dict]" = OrderedDict()
+        self.by_topic: Dict[str, Set[CacheKey]] = {}
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, topic: str, question: str) -> Optional[str]:
+        """Return a cached answer for the question or a near-duplicate of it."""
+        key = self._key(topic, question)
+        self._drop_if_expired(key)
+        if key not in self.entries:
+            key = self._nearest(key)
+
+        if key is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]["answer"]
+
+    def put(self, topic: str, question: str, answer: str, created: Optional[float] = None) -> None:
+        """Cache an answer, evicting least recently used entries past the byte cap."""
+        key = self._key(topic, question)
+        self._remove(key)
+        vector = self.vectorize(key[1])
+        entry = {
+            "answer": answer,
+            "vector": vector,
+            "words": self.content_words(key[1]),
+            "created": created if created is not None else time.time(),
+            "size": len(key[0].encode()) + len(key[1].encode()) + len(answer.encode()) + vector.nbytes,
+        }
+        if entry["size"] > self.max_bytes:
+            return
+
+        self.entries[key] = entry
+        self.by_topic.setdefault(key[0], set()).add(key)
+        self.size_bytes += entry["size"]
+        while self.size_bytes > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+
+    def stats(self) -> Dict[str, float]:
+        """Return entry count, size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "size_bytes": self.size_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def vectorize(self, text: str) -> np.ndarray:
+        """Embed text as an L2-normalized vector of hashed character n-grams."""
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        padded = f" {text} "
+        for n in (2, 3, 4):
+            for i in range(len(padded) - n + 1):
+                # crc32 is stable across processes, unlike hash(), so vectors match after reload
+                vector[zlib.crc32(padded[i:i + n].encode()) % self.dimensions] += 1
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def content_words(text: str) -> FrozenSet[str]:
+        """Words of a normalized question that matter for its meaning."""
+        return frozenset(text.split()) - FILLER_WORDS
+
+    def load(self) -> None:
+        """Load persisted entries, skipping expired ones."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                rows = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"❌ Error loading response cache: {e}")
+            return
+
+        now = time.time()
+        for row in rows:
+            if now - row["created"] < self.ttl:
+                self.put(row["topic"], row["question"], row["answer"], created=row["created"])
+        print(f"♻️ Memuat {len(self.entries)} jawaban dari cache")
+
+    def save(self) -> None:
+        """Persist entries in LRU order so a reload keeps the same recency."""
+        if not self.path:
+            return
+        rows = [
+            {"topic": topic, "question": question, "answer": e["answer"], "created": e["created"]}
+            for (topic, question), e in self.entries.items()
+        ]
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _key(topic: str, question: str) -> CacheKey:
+        return TopicMatcher.normalize(topic), TopicMatcher.normalize(question)
+
+    def _nearest(self, key: CacheKey) -> Optional[CacheKey]:
+        """Find the most similar live question with the same content words cached for the topic."""
+        for candidate in list(self.by_topic.get(key[0], ())):
+            self._drop_if_expired(candidate)
+        words = self.content_words(key[1])
+        candidates = [c for c in self.by_topic.get(key[0], ()) if self.entries[c]["words"] == words]
+        if not candidates:
+            return None
+
+        matrix = np.stack([self.entries[c]["vector"] for c in candidates])
+        scores = matrix @ self.vectorize(key[1])
+        best = int(np.argmax(scores))
+        return candidates[best] if scores[best] >= self.similarity else None
+
+    def _drop_if_expired(self, key: CacheKey) -> None:
+        entry = self.entries.get(key)
+        if entry and time.time() - entry["created"] >= self.ttl:
+            self._remove(key)
+
+    def _remove(self, key: CacheKey) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self.size_bytes -= entry["size"]
+        topic_keys = self.by_topic.get(key[0])
+        if topic_keys is not None:
+            topic_keys.discard(key)
+            if not topic_keys:
+                del self.by_topic[key[0]]
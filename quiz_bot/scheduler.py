@@ -0,0 +1,93 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+TimerCallback = Callable[[], Awaitable[None]]
+
+class TimerScheduler:
+    """Fires callbacks at wall-clock deadlines from a single background task.
+
+    Timers live in one min-heap keyed by deadline, so thousands of pending
+    timers cost one sleeping task instead of one task each. Scheduling a key
+    again replaces its previous timer; replaced and cancelled entries are
+    skipped lazily when they reach the top of the heap.
+    """
+    # Re-check the wall clock at least this often so clock jumps or host
+    # suspends do not delay timers for long
+    MAX_SLEEP = 60.0
+
+    def __init__(self):
+        self.heap: List[Tuple[float, int, str]] = []
+        self.timers: Dict[str, Tuple[float, int, TimerCallback]] = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.timers)
+
+    def schedule(self, key: str, deadline: float, callback: TimerCallback) -> None:
+        """Run ``callback`` at ``deadline`` (a time.time() timestamp), replacing any timer for ``key``."""
+        seq = next(self._counter)
+        self.timers[key] = (deadline, seq, callback)
+        heapq.heappush(self.heap, (deadline, seq, key))
+        self._wakeup.set()
+
+    def cancel(self, key: str) -> None:
+        """Drop the pending timer for ``key``, if any."""
+        self.timers.pop(key, None)
+
+    def deadline(self, key: str) -> Optional[float]:
+        timer = self.timers.get(key)
+        return timer[0] if timer else None
+
+    def pop_due(self, now: float) -> List[TimerCallback]:
+        """Remove and return the callbacks whose deadline has passed."""
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            _, seq, key = heapq.heappop(self.heap)
+            timer = self.timers.get(key)
+            if timer and timer[1] == seq:
+                del self.timers[key]
+                due.append(timer[2])
+        return due
+
+    async def start(self) -> None:
+        """Start the scheduler task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the scheduler task; pending timers are kept in memory."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            for callback in self.pop_due(time.time()):
+                asyncio.create_task(self._fire(callback))
+
+            self._wakeup.clear()
+            timeout = self.MAX_SLEEP
+            if self.heap:
+                timeout = min(timeout, max(0.0, self.heap[0][0] - time.time()))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    @staticmethod
+    async def _fire(callback: TimerCallback) -> None:
+        try:
+            await callback()
+        except Exception as e:
+            print(f"❌ Error running timer: {e}")
+
+study_scheduler = TimerScheduler()
@@ -0,0 +1,180 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from .config import config
+
+try:
+    from redis.exceptions import WatchError
+except ImportError:  # redis is only needed for QUIZ_SESSION_STORE=redis
+    class WatchError(Exception):
+        """Stand-in so this module imports without the optional redis package."""
+
+def _version(data: Optional[str]) -> Optional[str]:
+    """Version ("v") of a stored session, or None if there is none."""
+    return json.loads(data).get("v") if data else None
+
+class MemorySessionStore:
+    """Process-local session store; sessions are lost on restart.
+
+    Every store also offers ``compare_and_set``, which only writes when the
+    stored session still has the version ("v") the caller loaded, or when
+    there is no stored session and ``expected_version`` is None.
+    """
+    def __init__(self, ttl: float = 86400):
+        self.ttl = ttl
+        self.entries: Dict[str, Tuple[str, float]] = {}
+
+    async def get(self, user_id: str) -> Optional[str]:
+        entry = self.entries.get(user_id)
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            del self.entries[user_id]
+            return None
+        return entry[0]
+
+    async def set(self, user_id: str, data: str) -> None:
+        self.entries[user_id] = (data, time.time() + self.ttl)
+
+    async def compare_and_set(self, user_id: str, expected_version: Optional[str], data: str) -> bool:
+        if _version(await self.get(user_id)) != expected_version:
+            return False
+        await self.set(user_id, data)
+        return True
+
+    async def delete(self, user_id: str) -> None:
+        self.entries.pop(user_id, None)
+
+class SQLiteSessionStore:
+    """Session store in a local SQLite file.
+
+    Survives restarts and can be shared by several bot processes on the same host.
+    Queries run in worker threads so a locked database never blocks the event loop.
+    """
+    def __init__(self, path: str, ttl: float = 86400, table: str = "quiz_sessions"):
+        self.path = path
+        self.ttl = ttl
+        self.table = table
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it and creating the table on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    user_id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            self._local.conn = conn
+        return conn
+
+    async def get(self, user_id: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get, user_id)
+
+    async def set(self, user_id: str, data: str) -> None:
+        await asyncio.to_thread(self._set, user_id, data)
+
+    async def compare_and_set(self, user_id: str, expected_version: Optional[str], data: str) -> bool:
+        return await asyncio.to_thread(self._compare_and_set, user_id, expected_version, data)
+
+    async def delete(self, user_id: str) -> None:
+        await asyncio.to_thread(self._delete, user_id)
+
+    def _get(self, user_id: str) -> Optional[str]:
+        row = self._connect().execute(
+            f"SELECT data FROM {self.table} WHERE user_id = ? AND expires_at > ?",
+            (user_id, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set(self, user_id: str, data: str) -> None:
+        self._connect().execute(
+            f"INSERT INTO {self.table} (user_id, data, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (user_id) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at",
+            (user_id, data, time.time() + self.ttl)
+        )
+
+    def _compare_and_set(self, user_id: str, expected_version: Optional[str], data: str) -> bool:
+        now = time.time()
+        if expected_version is None:
+            # Insert, or replace a row that has already expired
+            cursor = self._connect().execute(
+                f"INSERT INTO {self.table} (user_id, data, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (user_id) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at "
+                f"WHERE {self.table}.expires_at <= ?",
+                (user_id, data, now + self.ttl, now)
+            )
+        else:
+            cursor = self._connect().execute(
+                f"UPDATE {self.table} SET data = ?, expires_at = ? "
+                "WHERE user_id = ? AND expires_at > ? AND json_extract(data, '$.v') = ?",
+                (data, now + self.ttl, user_id, now, expected_version)
+            )
+        return cursor.rowcount == 1
+
+    def _delete(self, user_id: str) -> None:
+        self._connect().execute(f"DELETE FROM {self.table} WHERE user_id = ?", (user_id,))
+
+class RedisSessionStore:
+    """Session store on an asyncio Redis client (``redis.asyncio``).
+
+    Shares sessions between bot processes on different hosts; expiry is left to Redis.
+    """
+    def __init__(self, client, ttl: float = 86400, prefix: str = "quiz_session:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, user_id: str) -> Optional[str]:
+        data = await self.client.get(self.prefix + user_id)
+        if isinstance(data, bytes):
+            data = data.decode()
+        return data
+
+    async def set(self, user_id: str, data: str) -> None:
+        await self.client.set(self.prefix + user_id, data, ex=int(self.ttl))
+
+    async def compare_and_set(self, user_id: str, expected_version: Optional[str], data: str) -> bool:
+        key = self.prefix + user_id
+        async with self.client.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(key)
+                current = await pipe.get(key)
+                if isinstance(current, bytes):
+                    current = current.decode()
+                if _version(current) != expected_version:
+                    return False
+                pipe.multi()
+                pipe.set(key, data, ex=int(self.ttl))
+                await pipe.execute()
+                return True
+            except WatchError:
+                return False  # Changed by another process between WATCH and EXEC
+
+    async def delete(self, user_id: str) -> None:
+        await self.client.delete(self.prefix + user_id)
+
+def create_session_store(namespace: str = "quiz"):
+    """Build the session store selected by QUIZ_SESSION_STORE; namespaces keep quiz and study sessions apart."""
+    backend = config.QUIZ_SESSION_STORE
+    if backend == "sqlite":
+        return SQLiteSessionStore(config.QUIZ_SESSION_SQLITE_PATH, ttl=config.QUIZ_SESSION_TTL,
+                                  table=f"{namespace}_sessions")
+    if backend == "redis":
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise ImportError("QUIZ_SESSION_STORE=redis membutuhkan paket 'redis' (pip install redis)") from e
+        return RedisSessionStore(redis.Redis.from_url(config.REDIS_URL), ttl=config.QUIZ_SESSION_TTL,
+                                 prefix=f"{namespace}_session:")
+    return MemorySessionStore(ttl=config.QUIZ_SESSION_TTL)
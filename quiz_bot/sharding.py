@@ -0,0 +1,41 @@
+import os
+import socket
+from typing import List, Optional
+import requests
+
+# Identifies this bot process in shared session snapshots
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+def shard_for_guild(guild_id: Optional[int], shard_count: int) -> int:
+    """Discord's shard routing: (guild_id >> 22) % shard_count; DMs go to shard 0."""
+    if guild_id is None:
+        return 0
+    return (guild_id >> 22) % shard_count
+
+def split_shards(shard_count: int, processes: int) -> List[List[int]]:
+    """Spread shard ids over processes round-robin, dropping processes left without shards."""
+    groups = [list(range(shard_count))[i::processes] for i in range(processes)]
+    return [group for group in groups if group]
+
+def owns_guild(bot, guild_id: Optional[int]) -> bool:
+    """Whether events for the guild (None for DMs) are delivered to this process's shards."""
+    shard_ids = getattr(bot, "shard_ids", None)
+    shard_count = getattr(bot, "shard_count", None)
+    if not shard_ids or not shard_count:
+        return True  # Unsharded or a single process handling every shard
+    return shard_for_guild(guild_id, shard_count) in shard_ids
+
+def owns_channel(bot, channel) -> bool:
+    """Whether events for ``channel`` are delivered to this process's shards."""
+    guild = getattr(channel, "guild", None)
+    return owns_guild(bot, guild.id if guild else None)
+
+def recommended_shard_count(token: str) -> int:
+    """Ask Discord how many shards the bot should use."""
+    response = requests.get(
+        "https://discord.com/api/v10/gateway/bot",
+        headers={"Authorization": f"Bot {token}"},
+        timeout=10
+    )
+    response.raise_for_status()
+    return response.json()["shards"]
@@ -0,0 +1,80 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Tuple
+
+class SharedStream:
+    """Fans one async iterator out to several consumers.
+
+    A background task drains the source; consumers that join late replay the
+    items produced so far and then follow live. The source is cancelled once
+    every consumer has stopped reading.
+    """
+    def __init__(self, source: AsyncIterator):
+        self.items: List[Any] = []
+        self.done = False
+        self.abandoned = False
+        self.consumers = 0
+        self._changed = asyncio.Event()
+        self.task = asyncio.create_task(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator) -> None:
+        try:
+            async for item in source:
+                self.items.append(item)
+                self._notify()
+        finally:
+            self.done = True
+            self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def consume(self) -> AsyncIterator:
+        self.consumers += 1
+        index = 0
+        try:
+            while True:
+                if index < len(self.items):
+                    yield self.items[index]
+                    index += 1
+                elif self.done:
+                    return
+                else:
+                    await self._changed.wait()
+        finally:
+            self.consumers -= 1
+            if self.consumers == 0 and not self.done:
+                self.abandoned = True
+                self.task.cancel()
+
+class SingleFlight:
+    """Lets identical concurrent requests share one upstream call.
+
+    The first caller for a key starts the call; callers arriving while it is
+    still running wait for the same result. Both helpers also report whether
+    the caller joined someone else's call.
+    """
+    def __init__(self):
+        self.calls: Dict[Hashable, asyncio.Task] = {}
+        self.streams: Dict[Hashable, SharedStream] = {}
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        task = self.calls.get(key)
+        shared = task is not None
+        if not shared:
+            task = asyncio.create_task(call())
+            self.calls[key] = task
+            task.add_done_callback(lambda _: self.calls.pop(key, None))
+        # Shielded so one caller giving up does not cancel the call for the others
+        return await asyncio.shield(task), shared
+
+    def stream(self, key: Hashable, factory: Callable[[], AsyncIterator]) -> Tuple[AsyncIterator, bool]:
+        stream = self.streams.get(key)
+        shared = stream is not None and not stream.done and not stream.abandoned
+        if not shared:
+            stream = SharedStream(factory())
+            self.streams[key] = stream
+            stream.task.add_done_callback(
+                lambda _: self.streams.pop(key, None) if self.streams.get(key) is stream else None
+            )
+        return stream.consume(), shared
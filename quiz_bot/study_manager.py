@@ -2,14 +2,28 @@ import asyncio
 import discord
 from typing import Dict, Optional
 import datetime
+import json
+import time
 import uuid
 from enum import Enum
 from .database import db, StudySessionState
 from .ai_service import ai_service
+from .recommendations import recommendation_engine
+from .scheduler import study_scheduler
+from .session_store import MemorySessionStore, create_session_store
+from .sharding import PROCESS_ID, owns_channel, owns_guild
 
 from .utils import split_into_chunks
 
 class StudySession:
+    """A Pomodoro-style study session.
+
+    Interval and break deadlines are wall-clock timestamps kept in the shared
+    study_scheduler and persisted with each state change, so a restarted bot
+    can restore the session and fire the next transition on time. Sessions
+    owned by another bot process are rebuilt from their shared snapshot
+    (``remote``); they have no timers and no channel.
+    """
     def __init__(self, user_id: str, session_id: str, topic: str, 
                  intervals: list, channel: discord.TextChannel, focus: str = None):
         self.user_id = user_id
@@ -20,91 +34,131 @@ class StudySession:
         self.channel = channel
         self.state = StudySessionState.ACTIVE
         self.focus = focus
-        self.study_timer = None
-        self.break_timer = None
+        self.phase_ends_at: Optional[float] = None
+        self.manager: Optional["StudySessionManager"] = None
+        self.owner = PROCESS_ID
         self.questions = []
         self.start_time = datetime.datetime.now()
+        # Version of the snapshot this copy was loaded from or last saved as
+        self.version = ""
+
+    @property
+    def remote(self) -> bool:
+        """Whether another bot process runs this session's timers."""
+        return self.owner != PROCESS_ID
+
+    def to_dict(self) -> Dict:
+        """Serialize the shared part of the session into a compact snapshot."""
+        return {
+            "id": self.session_id,
+            "u": self.user_id,
+            "t": self.topic,
+            "iv": self.intervals,
+            "ci": self.current_interval,
+            "s": self.state.value,
+            "pe": self.phase_ends_at,
+            "q": self.questions,
+            "o": self.owner,
+            "st": self.start_time.timestamp(),
+            "v": self.version,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, channel: Optional[discord.TextChannel] = None) -> "StudySession":
+        """Rebuild a session from a snapshot written by to_dict."""
+        session = cls(data["u"], data["id"], data["t"], data["iv"], channel)
+        session.current_interval = data["ci"]
+        session.state = StudySessionState(data["s"])
+        session.phase_ends_at = data["pe"]
+        session.questions = data["q"]
+        session.owner = data["o"]
+        session.start_time = datetime.datetime.fromtimestamp(data["st"])
+        session.version = data["v"]
+        return session
+
+    async def _save(self) -> None:
+        if self.manager:
+            await self.manager.save_snapshot(self)
 
     @property
     def total_intervals(self) -> int:
         """Get total number of intervals in the session."""
         return len(self.intervals)
 
-    async def start_study_interval(self):
-        """Start a study interval."""
+    async def start_study_interval(self, started_at: Optional[float] = None):
+        """Start a study interval, optionally backdated to when the previous phase ended."""
         if self.current_interval >= len(self.intervals):
             await self.end_session()
             return
 
         interval = self.intervals[self.current_interval]
         self.state = StudySessionState.ACTIVE
-        db.update_study_session_state(self.session_id, self.state)
+        self.phase_ends_at = (started_at or time.time()) + interval['duration'] * 60
+        await db.update_study_session_state(self.session_id, self.state,
+                                            current_interval=self.current_interval,
+                                            phase_ends_at=self.phase_ends_at)
+        await self._save()
         
-        await self.channel.send(
-            f"📚 **Study Interval {self.current_interval + 1} Started**\n"
-            f"Topic: **{self.topic}**\n"
-            f"Fokus: **{interval.get('focus', 'General study')}**\n"
-            f"Durasi: **{interval['duration']}** menit\n\n"
-            f"Anda dapat mengajukan pertanyaan tentang topik ini selama sesi belajar!"
-        )
+        # Phases that already ended while the bot was offline are skipped silently
+        if self.phase_ends_at > time.time():
+            await self.channel.send(
+                f"📚 **Study Interval {self.current_interval + 1} Started**\n"
+                f"Topic: **{self.topic}**\n"
+                f"Fokus: **{interval.get('focus', 'General study')}**\n"
+                f"Durasi: **{interval['duration']}** menit\n\n"
+                f"Anda dapat mengajukan pertanyaan tentang topik ini selama sesi belajar!"
+            )
 
-        # Start the timer
-        self.study_timer = asyncio.create_task(self._study_timer())
+        study_scheduler.schedule(self.session_id, self.phase_ends_at, self._on_phase_end)
 
-    async def _study_timer(self):
-        """Internal timer for study interval."""
-        try:
-            interval = self.intervals[self.current_interval]
-            await asyncio.sleep(interval['duration'] * 60)
-            db.update_study_session_state(self.session_id, self.state, self.current_interval)
-            
-            # Start break if not the last interval
-            if self.current_interval < len(self.intervals):
-                await self.start_break()
-        except asyncio.CancelledError:
-            pass
-
-    async def start_break(self):
-        """Start a break interval."""
+    async def start_break(self, started_at: Optional[float] = None):
+        """Start a break interval, optionally backdated to when the study interval ended."""
         interval = self.intervals[self.current_interval]
         self.state = StudySessionState.RESTING
-        db.update_study_session_state(self.session_id, self.state)
+        self.phase_ends_at = (started_at or time.time()) + interval['break'] * 60
+        await db.update_study_session_state(self.session_id, self.state,
+                                            completed_intervals=self.current_interval + 1,
+                                            phase_ends_at=self.phase_ends_at)
+        await self._save()
         
-        await self.channel.send(
-            f"☕ **Break Time!**\n"
-            f"Istirahat selama **{interval['break']}** menit.\n"
-            f"Pertanyaan akan dijeda selama istirahat."
-        )
+        if self.phase_ends_at > time.time():
+            await self.channel.send(
+                f"☕ **Break Time!**\n"
+                f"Istirahat selama **{interval['break']}** menit.\n"
+                f"Pertanyaan akan dijeda selama istirahat."
+            )
 
-        # Start the break timer
-        self.break_timer = asyncio.create_task(self._break_timer())
+        study_scheduler.schedule(self.session_id, self.phase_ends_at, self._on_phase_end)
 
-    async def _break_timer(self):
-        """Internal timer for break interval."""
-        try:
-            interval = self.intervals[self.current_interval]
-            await asyncio.sleep(interval['break'] * 60)
-            
-            # Move to next interval
-            self.current_interval += 1
-            
-            # Start next study interval or end session if done
-            if self.current_interval < len(self.intervals):
-                await self.start_study_interval()
-            else:
-                await self.end_session()
-        except asyncio.CancelledError:
-            pass
+    async def _on_phase_end(self):
+        """Scheduler callback: move from study to break, or from break to the next interval."""
+        if self.manager and not await self.manager.is_current(self):
+            self.manager.active_sessions.pop(self.user_id, None)
+            return  # Ended from another bot process
+
+        ended_at = self.phase_ends_at
+        if self.state == StudySessionState.ACTIVE:
+            await self.start_break(started_at=ended_at)
+            return
+
+        # Move to next interval
+        self.current_interval += 1
+        
+        # Start next study interval or end session if done
+        if self.current_interval < len(self.intervals):
+            await self.start_study_interval(started_at=ended_at)
+        else:
+            await self.end_session()
 
     async def end_session(self):
         """End the study session."""
-        if self.study_timer:
-            self.study_timer.cancel()
-        if self.break_timer:
-            self.break_timer.cancel()
+        study_scheduler.cancel(self.session_id)
 
         self.state = StudySessionState.COMPLETED
-        db.update_study_session_state(self.session_id, self.state)
+        await db.update_study_session_state(self.session_id, self.state)
+        if self.manager:
+            # Include questions asked through other bot processes
+            await self.manager.merge_questions(self)
 
         # Generate and save summary
         duration = (datetime.datetime.now() - self.start_time).total_seconds() / 60
@@ -114,7 +168,8 @@ class StudySession:
             self.current_interval,  # Use current_interval instead of completed_intervals
             self.questions
         )
-        db.save_study_summary(self.session_id, summary)
+        await db.save_study_summary(self.session_id, summary)
+        recommendation_engine.schedule_refresh(self.user_id)
 
         content = (
             f"🎉 **Study Session Completed!**\n"
@@ -125,27 +180,36 @@ class StudySession:
         )
         
         # Split and send long messages
-        if len(content) > 2000:
-            chunks = self.utils.split_into_chunks(content)
-            for chunk in chunks:
+        if self.channel:
+            for chunk in split_into_chunks(content):
                 await self.channel.send(chunk)
 
+        if self.manager:
+            await self.manager.end_session(self.user_id)
+
     def can_ask_questions(self) -> bool:
         """Check if questions can be asked in current state."""
         return self.state == StudySessionState.ACTIVE
 
-    def add_question(self, question: str, answer: str):
+    async def add_question(self, question: str, answer: str):
         """Add a question to the session history."""
         self.questions.append({"question": question, "answer": answer, "timestamp": datetime.datetime.now().isoformat()})
+        await self._save()
 
 class StudySessionManager:
-    def __init__(self):
+    """Tracks study sessions run by this process and shares snapshots of them.
+
+    Every state change is written to a session store, so with a shared store
+    (SQLite or Redis) a user's session is visible to every bot process.
+    """
+    def __init__(self, store=None):
+        self.store = store or MemorySessionStore()
         self.active_sessions: Dict[str, StudySession] = {}
 
-    def create_session(self, user_id: str, topic: str, study_plan: dict, 
+    async def create_session(self, user_id: str, topic: str, study_plan: dict, 
                       channel: discord.TextChannel) -> StudySession:
         """Create a new study session with multiple intervals."""
-        if user_id in self.active_sessions:
+        if user_id in self.active_sessions or await self.store.get(user_id):
             raise ValueError("User already has an active study session")
 
         session_id = str(uuid.uuid4())
@@ -161,20 +225,152 @@ class StudySessionManager:
         ]
         
         session = StudySession(user_id, session_id, topic, intervals, channel)
+        session.manager = self
         self.active_sessions[user_id] = session
+        await self.save_snapshot(session)
         
         # Save to database
-        db.create_study_session(session_id, user_id, topic, study_plan)
+        channel_id = str(channel.id) if getattr(channel, "id", None) is not None else None
+        guild = getattr(channel, "guild", None)
+        guild_id = str(guild.id) if guild is not None else None
+        await db.create_study_session(session_id, user_id, topic, study_plan, channel_id, guild_id)
         
         return session
 
-    def get_session(self, user_id: str) -> Optional[StudySession]:
-        """Get an active study session for a user."""
-        return self.active_sessions.get(user_id)
+    async def save_snapshot(self, session: StudySession) -> None:
+        """Share the session's current state, keeping changes saved by other processes.
 
-    def end_session(self, user_id: str) -> None:
+        The write only succeeds against the snapshot version it was merged
+        with; if another process saved first, the merge is redone. Copies of
+        sessions run by another process adopt its timer state and only add
+        their questions.
+        """
+        while True:
+            data = await self._load(session.user_id)
+            if data is not None and data["id"] != session.session_id:
+                return  # Replaced by a new session
+            if data is None and session.version:
+                return  # Ended from another bot process
+            if data is not None:
+                self._merge(session, data)
+                if session.remote:
+                    session.current_interval = data["ci"]
+                    session.state = StudySessionState(data["s"])
+                    session.phase_ends_at = data["pe"]
+            expected = data["v"] if data is not None else None
+            session.version = uuid.uuid4().hex
+            snapshot = json.dumps(session.to_dict(), separators=(",", ":"))
+            if await self.store.compare_and_set(session.user_id, expected, snapshot):
+                return
+
+    async def merge_questions(self, session: StudySession) -> None:
+        """Add questions from the shared snapshot that this copy has not seen yet."""
+        data = await self._load(session.user_id)
+        if data and data["id"] == session.session_id:
+            self._merge(session, data)
+
+    @staticmethod
+    def _merge(session: StudySession, data: Dict) -> None:
+        seen = {(q["timestamp"], q["question"]) for q in session.questions}
+        missing = [q for q in data["q"] if (q["timestamp"], q["question"]) not in seen]
+        if missing:
+            session.questions = sorted(session.questions + missing, key=lambda q: q["timestamp"])
+
+    async def is_current(self, session: StudySession) -> bool:
+        """Whether the shared snapshot still refers to this session."""
+        data = await self._load(session.user_id)
+        return data is not None and data["id"] == session.session_id
+
+    async def restore_sessions(self, bot: discord.Client) -> int:
+        """Rebuild active study sessions from the database and reschedule their timers."""
+        restored = 0
+        try:
+            rows = await db.get_active_study_sessions()
+        except Exception as e:
+            print(f"❌ Error loading active study sessions: {e}")
+            return restored
+
+        # Sessions in guilds on another process's shards are left to that process
+        rows = [
+            row for row in rows
+            if row.get("channel_id") and row["user_id"] not in self.active_sessions
+            and (not row.get("guild_id") or owns_guild(bot, int(row["guild_id"])))
+        ]
+        channels = await asyncio.gather(*(_get_channel(bot, int(row["channel_id"])) for row in rows),
+                                        return_exceptions=True)
+
+        for row, channel in zip(rows, channels):
+            try:
+                if isinstance(channel, BaseException):
+                    raise channel
+                if not owns_channel(bot, channel):
+                    continue  # Saved without guild_id; another bot process handles this channel's shard
+
+                intervals = [
+                    {"duration": i["duration_minutes"], "break": i["break_duration"], "focus": i["focus"]}
+                    for i in sorted(row.get("study_intervals") or [], key=lambda i: i["sequence"])
+                ]
+                session = StudySession(row["user_id"], row["id"], row["topic"], intervals, channel)
+                session.manager = self
+                session.current_interval = row.get("current_interval") or 0
+                session.state = StudySessionState(row["state"])
+                if row.get("start_time"):
+                    session.start_time = _to_local_naive(row["start_time"])
+                self.active_sessions[session.user_id] = session
+                await self.merge_questions(session)
+
+                if row.get("phase_ends_at"):
+                    session.phase_ends_at = _to_local_naive(row["phase_ends_at"]).timestamp()
+                    await self.save_snapshot(session)
+                    study_scheduler.schedule(session.session_id, session.phase_ends_at, session._on_phase_end)
+                elif session.state == StudySessionState.RESTING:
+                    await session.start_break()
+                else:
+                    await session.start_study_interval()
+                restored += 1
+            except Exception as e:
+                print(f"❌ Error restoring study session {row.get('id')}: {e}")
+
+        if restored:
+            print(f"♻️ Memulihkan {restored} sesi belajar aktif")
+        return restored
+
+    async def get_session(self, user_id: str) -> Optional[StudySession]:
+        """Get an active study session for a user, including ones run by another process."""
+        data = await self._load(user_id)
+        session = self.active_sessions.get(user_id)
+        if session is not None:
+            if data is not None and data["id"] == session.session_id:
+                return session
+            # Ended from another bot process
+            self.active_sessions.pop(user_id)
+            study_scheduler.cancel(session.session_id)
+
+        if data is None:
+            return None
+        session = StudySession.from_dict(data)
+        session.manager = self
+        return session
+
+    async def end_session(self, user_id: str) -> None:
         """End a study session."""
-        if user_id in self.active_sessions:
-            del self.active_sessions[user_id]
+        session = self.active_sessions.pop(user_id, None)
+        if session is not None:
+            study_scheduler.cancel(session.session_id)
+        await self.store.delete(user_id)
+
+    async def _load(self, user_id: str) -> Optional[Dict]:
+        data = await self.store.get(user_id)
+        return json.loads(data) if data else None
+
+async def _get_channel(bot: discord.Client, channel_id: int):
+    return bot.get_channel(channel_id) or await bot.fetch_channel(channel_id)
+
+def _to_local_naive(value: str) -> datetime.datetime:
+    """Parse a database timestamp into a naive local datetime."""
+    parsed = datetime.datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
 
-study_manager = StudySessionManager()
\ No newline at end of file
+study_manager = StudySessionManager(create_session_store("study"))
\ No newline at end of file
@@ -0,0 +1,93 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, FrozenSet, List, Optional, Tuple
+import numpy as np
+
+class TopicMatcher:
+    """Character n-gram TF-IDF matcher for normalizing quiz topics locally.
+
+    Topics are embedded once into an L2-normalized matrix; a query is matched by
+    a single matrix-vector product, so lookups stay in the millisecond range even
+    for large catalogues.
+    """
+    def __init__(self, ngram_range: Tuple[int, int] = (2, 4)):
+        self.ngram_range = ngram_range
+        self.topics: List[str] = []
+        self.vocabulary: Dict[str, int] = {}
+        self.idf: Optional[np.ndarray] = None
+        self.matrix: Optional[np.ndarray] = None
+        self._fitted_on: FrozenSet[str] = frozenset()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Lowercase, drop punctuation and collapse whitespace."""
+        text = re.sub(r"[^\w\s]", " ", text.lower())
+        return re.sub(r"\s+", " ", text).strip()
+
+    def _ngrams(self, text: str) -> Counter:
+        padded = f" {self.normalize(text)} "
+        low, high = self.ngram_range
+        return Counter(
+            padded[i:i + n]
+            for n in range(low, high + 1)
+            for i in range(len(padded) - n + 1)
+        )
+
+    def fit(self, topics: List[str]) -> None:
+        """Build the vocabulary, IDF weights and topic matrix."""
+        self.topics = list(topics)
+        self._fitted_on = frozenset(topics)
+        counts = [self._ngrams(t) for t in self.topics]
+
+        document_frequency: Counter = Counter()
+        for c in counts:
+            document_frequency.update(c.keys())
+        self.vocabulary = {gram: i for i, gram in enumerate(document_frequency)}
+
+        n = len(self.topics)
+        self.idf = np.array(
+            [math.log((1 + n) / (1 + document_frequency[g])) + 1 for g in self.vocabulary],
+            dtype=np.float32
+        )
+        self.matrix = np.zeros((n, len(self.vocabulary)), dtype=np.float32)
+        for row, c in enumerate(counts):
+            for gram, tf in c.items():
+                self.matrix[row, self.vocabulary[gram]] = tf
+        self.matrix *= self.idf
+        norms = np.linalg.norm(self.matrix, axis=1, keepdims=True)
+        self.matrix /= np.where(norms == 0, 1, norms)
+
+    def ensure_fitted(self, topics: List[str]) -> None:
+        """Refit only when the topic set has changed."""
+        if frozenset(topics) != self._fitted_on:
+            self.fit(topics)
+
+    def vectorize(self, text: str) -> np.ndarray:
+        """Embed text in the fitted vocabulary space.
+
+        N-grams outside the vocabulary have no column, but they still count
+        towards the norm (with the highest IDF) so extra unseen words lower
+        the similarity instead of being silently ignored.
+        """
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        unseen_weight = math.log(1 + len(self.topics)) + 1
+        unseen_sq = 0.0
+        for gram, tf in self._ngrams(text).items():
+            index = self.vocabulary.get(gram)
+            if index is not None:
+                vector[index] = tf * self.idf[index]
+            else:
+                unseen_sq += (tf * unseen_weight) ** 2
+        norm = math.sqrt(float(vector @ vector) + unseen_sq)
+        return vector / norm if norm else vector
+
+    def top_matches(self, text: str, k: int = 5) -> List[Tuple[str, float]]:
+        """Return up to k (topic, cosine similarity) pairs, best first."""
+        if not self.topics:
+            return []
+        scores = self.matrix @ self.vectorize(text)
+        k = min(k, len(self.topics))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(self.topics[i], float(scores[i])) for i in best]
@@ -1,14 +1,60 @@
-from typing import List, Callable, Any
+from typing import List, Callable, Any, AsyncIterator, Dict, Tuple
+import asyncio
+from collections import OrderedDict
+import time
 import discord
 from discord.webhook import WebhookMessage
 from functools import wraps
 import re
+from .config import config
 from .database import db
 
+class UserRegistrationCache:
+    """
+    TTL/LRU cache of (user_id, username) pairs that are already in the database.
+    Lets ensure_user_registered skip the upsert for users seen recently.
+    """
+    def __init__(self, max_size: int = 10000, ttl: float = 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def needs_upsert(self, user_id: str, username: str) -> bool:
+        """Return True if the user is unknown, expired, or has changed username."""
+        entry = self.entries.get(user_id)
+        if entry and entry[0] == username and time.monotonic() - entry[1] < self.ttl:
+            self.entries.move_to_end(user_id)
+            self.hits += 1
+            return False
+        self.misses += 1
+        return True
+
+    def mark_registered(self, user_id: str, username: str) -> None:
+        """Remember that the user row is up to date."""
+        self.entries[user_id] = (username, time.monotonic())
+        self.entries.move_to_end(user_id)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        """Return cache size, hit/miss counts and hit rate."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+user_cache = UserRegistrationCache(config.USER_CACHE_SIZE, config.USER_CACHE_TTL)
+
 def ensure_user_registered():
     """
     Decorator to ensure user is registered in database before command execution.
     Use this decorator on command methods that need user registration.
+    Known users are served from user_cache so most commands skip the upsert.
     """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
@@ -17,8 +63,10 @@ def ensure_user_registered():
             user_id = str(interaction.user.id)
             username = interaction.user.name
             
-            # Upsert user
-            db.upsert_user(user_id, username)
+            # Upsert user only on first sight or username change
+            if user_cache.needs_upsert(user_id, username):
+                await db.upsert_user(user_id, username)
+                user_cache.mark_registered(user_id, username)
             
             # Call the original function
             return await func(self, interaction, *args, **kwargs)
@@ -49,6 +97,46 @@ async def send_long_message(interaction: discord.Interaction, content: str, chun
     
     return messages
 
+async def send_streamed_message(interaction: discord.Interaction, deltas: AsyncIterator[str], prefix: str = "",
+                                chunk_size: int = 1900, edit_interval: float = 1.0) -> str:
+    """
+    Send text as it streams in by progressively editing follow-up messages.
+    
+    Args:
+        interaction: Discord interaction object
+        deltas: Async iterator of text pieces
+        prefix: Text shown before the streamed content
+        chunk_size: Maximum size of each message; overflow rolls over to a new message
+        edit_interval: Minimum seconds between edits, to stay within Discord's rate limit
+    
+    Returns:
+        The full streamed text (without the prefix)
+    """
+    loop = asyncio.get_running_loop()
+    text = ""
+    messages: List[WebhookMessage] = []
+    shown: List[str] = []
+    last_render = None
+
+    async def render() -> None:
+        chunks = [c for c in split_into_chunks(prefix + text, chunk_size) if c]
+        for i, chunk in enumerate(chunks):
+            if i >= len(messages):
+                messages.append(await interaction.followup.send(chunk))
+                shown.append(chunk)
+            elif shown[i] != chunk:
+                await messages[i].edit(content=chunk)
+                shown[i] = chunk
+
+    async for delta in deltas:
+        text += delta
+        if last_render is None or loop.time() - last_render >= edit_interval:
+            await render()
+            last_render = loop.time()
+
+    await render()
+    return text
+
 def split_into_chunks(content: str, chunk_size: int = 1900) -> List[str]:
     """
     Split content into chunks while preserving markdown code blocks and structure.
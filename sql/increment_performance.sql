@@ -0,0 +1,27 @@
+-- Atomic counter update for performance_summary.
+-- Run once in the Supabase SQL editor. Called by DatabaseManager.increment_performance.
+
+create unique index if not exists performance_summary_user_topic_key
+    on performance_summary (user_id, topic);
+
+create or replace function increment_performance(
+    p_user_id text,
+    p_topic text,
+    p_difficulty text,
+    p_questions integer,
+    p_correct integer
+) returns void
+language sql
+as $$
+    insert into performance_summary as ps
+        (user_id, topic, difficulty, total_sessions, total_questions, total_correct, avg_score, last_updated)
+    values
+        (p_user_id, p_topic, p_difficulty, 1, p_questions, p_correct,
+         p_correct * 100.0 / greatest(p_questions, 1), now())
+    on conflict (user_id, topic) do update set
+        total_questions = ps.total_questions + excluded.total_questions,
+        total_correct = ps.total_correct + excluded.total_correct,
+        avg_score = (ps.total_correct + excluded.total_correct) * 100.0
+                    / greatest(ps.total_questions + excluded.total_questions, 1),
+        last_updated = now();
+$$;
@@ -0,0 +1,38 @@
+-- Lean, server-side aggregates for learning history.
+-- get_study_history reads study_session_totals instead of embedding every
+-- interval and the full summary text; get_user_learning_history reads the
+-- per-topic totals from topic_study_totals. Summary bodies are fetched
+-- separately, per session, only when needed.
+
+create index if not exists study_sessions_user_created_idx
+    on study_sessions (user_id, created_at desc);
+create index if not exists study_intervals_session_idx
+    on study_intervals (session_id);
+create index if not exists study_summaries_session_idx
+    on study_summaries (session_id);
+
+create or replace view study_session_totals with (security_invoker = true) as
+select
+    s.id,
+    s.user_id,
+    s.topic,
+    s.state,
+    s.total_duration,
+    s.completed_intervals,
+    s.start_time,
+    s.created_at,
+    count(i.id) as interval_count,
+    coalesce(sum(i.duration_minutes), 0) as actual_duration,
+    exists (select 1 from study_summaries m where m.session_id = s.id) as has_summary
+from study_sessions s
+left join study_intervals i on i.session_id = s.id
+group by s.id;
+
+create or replace view topic_study_totals with (security_invoker = true) as
+select
+    user_id,
+    topic,
+    count(*) as study_sessions,
+    coalesce(sum(total_duration), 0) as total_study_time
+from study_sessions
+group by user_id, topic;
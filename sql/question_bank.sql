@@ -0,0 +1,35 @@
+-- Question bank: reuse stored questions before generating new ones.
+-- Called by DatabaseManager.get_unseen_questions.
+
+alter table questions add column if not exists options jsonb;
+
+create index if not exists questions_topic_difficulty_idx
+    on questions (topic, difficulty);
+
+create index if not exists quiz_questions_question_id_idx
+    on quiz_questions (question_id);
+
+create or replace function get_unseen_questions(
+    p_user_id text,
+    p_topic text,
+    p_difficulty text,
+    p_limit integer
+) returns setof questions
+language sql
+stable
+as $$
+    select q.*
+    from questions q
+    where q.topic = p_topic
+      and q.difficulty = p_difficulty
+      and q.options is not null
+      and not exists (
+          select 1
+          from quiz_questions qq
+          join quiz_sessions s on s.id = qq.session_id
+          where qq.question_id = q.id
+            and s.user_id = p_user_id
+      )
+    order by random()
+    limit p_limit;
+$$;
@@ -0,0 +1,12 @@
+-- Durable study timers: the channel to post in and the wall-clock end of the
+-- current study interval or break, so a restarted bot can restore active
+-- sessions (see StudySessionManager.restore_sessions). guild_id lets each
+-- sharded bot process pick its own sessions without fetching every channel.
+
+alter table study_sessions add column if not exists channel_id text;
+alter table study_sessions add column if not exists guild_id text;
+alter table study_sessions add column if not exists phase_ends_at timestamptz;
+
+create index if not exists study_sessions_running_idx
+    on study_sessions (state)
+    where state in ('active', 'resting');
@@ -0,0 +1,34 @@
+-- Topic catalogue: one row per distinct (difficulty, topic).
+-- Replaces scanning performance_summary in DatabaseManager.get_existing_topics.
+
+create table if not exists topics (
+    topic text not null,
+    difficulty text not null,
+    created_at timestamptz not null default now(),
+    primary key (difficulty, topic)
+);
+
+create index if not exists topics_difficulty_created_at_idx
+    on topics (difficulty, created_at);
+
+-- Backfill from existing performance data
+insert into topics (topic, difficulty)
+select distinct topic, difficulty from performance_summary
+on conflict do nothing;
+
+-- Keep the catalogue in sync when performance rows are created elsewhere
+create or replace function register_performance_topic() returns trigger
+language plpgsql
+as $$
+begin
+    insert into topics (topic, difficulty)
+    values (new.topic, new.difficulty)
+    on conflict do nothing;
+    return new;
+end;
+$$;
+
+drop trigger if exists performance_summary_register_topic on performance_summary;
+create trigger performance_summary_register_topic
+    after insert on performance_summary
+    for each row execute function register_performance_topic();
@@ -0,0 +1,11 @@
+-- Precomputed /ilham recommend results, one row per user.
+-- fingerprint identifies the learning history the content was generated from;
+-- stale is set while a refresh for newer history is pending.
+
+create table if not exists user_recommendations (
+    user_id text primary key,
+    content text not null,
+    fingerprint text not null,
+    stale boolean not null default false,
+    updated_at timestamptz not null default now()
+);
@@ -57,7 +57,7 @@ class TestQuizWorkflow:
         difficulty = "sedang"
 
         # Act - Create quiz session
-        session = quiz_manager.create_session(
+        session = await quiz_manager.create_session(
             user_id=user_id,
             questions=mock_quiz_response["questions"],
             topic=topic,
@@ -88,8 +88,8 @@ class TestQuizWorkflow:
         assert stats["percentage"] == 100.0
 
         # End quiz
-        quiz_manager.end_session(user_id)
-        assert quiz_manager.get_session(user_id) is None
+        await quiz_manager.end_session(user_id)
+        assert await quiz_manager.get_session(user_id) is None
 
     async def test_quiz_workflow_with_wrong_answers(self, mock_ai_service, mock_quiz_response):
         """Test quiz workflow with incorrect answers."""
@@ -98,7 +98,7 @@ class TestQuizWorkflow:
         user_id = "test_user"
 
         # Act - Create quiz session
-        session = quiz_manager.create_session(
+        session = await quiz_manager.create_session(
             user_id=user_id,
             questions=mock_quiz_response["questions"],
             topic="Python",
@@ -129,7 +129,7 @@ class TestQuizWorkflow:
         user_id = "test_user"
 
         # Act - Create quiz session
-        session = quiz_manager.create_session(
+        session = await quiz_manager.create_session(
             user_id=user_id,
             questions=mock_quiz_response["questions"],
             topic="Python",
@@ -164,7 +164,7 @@ class TestQuizWorkflow:
         user_id = "test_user"
 
         # Test with empty questions
-        session = quiz_manager.create_session(
+        session = await quiz_manager.create_session(
             user_id=user_id,
             questions=[],
             topic="Python",
@@ -187,7 +187,7 @@ class TestQuizWorkflow:
         quiz_manager = QuizManager()
 
         # Create multiple sessions
-        session1 = quiz_manager.create_session(
+        session1 = await quiz_manager.create_session(
             user_id="user1",
             questions=mock_quiz_response["questions"],
             topic="Python",
@@ -195,7 +195,7 @@ class TestQuizWorkflow:
             quiz_question_ids=["q1", "q2", "q3"]
         )
 
-        session2 = quiz_manager.create_session(
+        session2 = await quiz_manager.create_session(
             user_id="user2",
             questions=mock_quiz_response["questions"],
             topic="Python",
@@ -204,8 +204,8 @@ class TestQuizWorkflow:
         )
 
         # Verify session isolation
-        assert quiz_manager.get_session("user1") == session1
-        assert quiz_manager.get_session("user2") == session2
+        assert await quiz_manager.get_session("user1") == session1
+        assert await quiz_manager.get_session("user2") == session2
 
         # Test independent progress tracking
         session1.check_answer("B")
@@ -220,9 +220,9 @@ class TestQuizWorkflow:
         assert session2.score == 0
 
         # End sessions independently
-        quiz_manager.end_session("user1")
-        assert quiz_manager.get_session("user1") is None
-        assert quiz_manager.get_session("user2") is session2
+        await quiz_manager.end_session("user1")
+        assert await quiz_manager.get_session("user1") is None
+        assert await quiz_manager.get_session("user2") is session2
 
-        quiz_manager.end_session("user2")
-        assert quiz_manager.get_session("user2") is None
+        await quiz_manager.end_session("user2")
+        assert await quiz_manager.get_session("user2") is None
@@ -50,8 +50,9 @@ class TestStudyWorkflow:
         mock_ai_service['answer_study_question'].return_value = mock_ai_responses["answer_response"]
 
         # Act - Create and start study session
-        with patch('quiz_bot.study_manager.db'):
-            session = study_manager.create_session(
+        with patch('quiz_bot.study_manager.db', new_callable=AsyncMock), \
+             patch('quiz_bot.study_manager.recommendation_engine') as mock_recommendations:
+            session = await study_manager.create_session(
                 user_id=user_id,
                 topic=topic,
                 study_plan=mock_ai_responses["study_plan"],
@@ -65,7 +66,7 @@ class TestStudyWorkflow:
 
             # Simulate asking a question during study
             assert session.can_ask_questions() is True
-            session.add_question(
+            await session.add_question(
                 "What is Python?",
                 mock_ai_responses["answer_response"]
             )
@@ -82,6 +83,7 @@ class TestStudyWorkflow:
             # End session
             await session.end_session()
             assert session.state == StudySessionState.COMPLETED
+            mock_recommendations.schedule_refresh.assert_called_once_with(user_id)
 
             # Verify final state
             assert session.questions[0]["question"] == "What is Python?"
@@ -102,9 +104,9 @@ class TestStudyWorkflow:
         }
 
         # Act & Assert
-        with patch('quiz_bot.study_manager.db'):
+        with patch('quiz_bot.study_manager.db', new_callable=AsyncMock):
             # Create first session
-            session1 = study_manager.create_session(
+            session1 = await study_manager.create_session(
                 user_id="user1",
                 topic="Python",
                 study_plan=study_plan,
@@ -112,7 +114,7 @@ class TestStudyWorkflow:
             )
 
             # Create second session
-            session2 = study_manager.create_session(
+            session2 = await study_manager.create_session(
                 user_id="user2",
                 topic="JavaScript",
                 study_plan=study_plan,
@@ -120,13 +122,13 @@ class TestStudyWorkflow:
             )
 
             # Verify both sessions are independent
-            assert study_manager.get_session("user1") == session1
-            assert study_manager.get_session("user2") == session2
+            assert await study_manager.get_session("user1") == session1
+            assert await study_manager.get_session("user2") == session2
             assert session1.user_id != session2.user_id
 
             # Test session isolation
-            session1.add_question("Python Q?", "Python A")
-            session2.add_question("JS Q?", "JS A")
+            await session1.add_question("Python Q?", "Python A")
+            await session2.add_question("JS Q?", "JS A")
 
             assert len(session1.questions) == 1
             assert len(session2.questions) == 1
@@ -146,9 +148,10 @@ class TestStudyWorkflow:
             "description": "Test state transitions"
         }
 
-        with patch('quiz_bot.study_manager.db'):
+        with patch('quiz_bot.study_manager.db', new_callable=AsyncMock), \
+             patch('quiz_bot.study_manager.recommendation_engine'):
             # Create session
-            session = study_manager.create_session(
+            session = await study_manager.create_session(
                 user_id="user1",
                 topic="States",
                 study_plan=study_plan,
@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+from quiz_bot.ai_scheduler import AIOverloaded, AIRequestScheduler, Priority
+
+pytestmark = pytest.mark.asyncio
+
+class TestAIRequestScheduler:
+    """Test suite for the priority-aware AI request scheduler."""
+
+    async def test_freed_slot_goes_to_highest_priority(self):
+        """Test that a waiting interactive request beats earlier queued background work."""
+        scheduler = AIRequestScheduler(1)
+        order = []
+        await scheduler.acquire(Priority.QUIZ)
+
+        async def request(priority):
+            async with scheduler.slot(priority):
+                order.append(priority)
+
+        tasks = [asyncio.create_task(request(p)) for p in (Priority.BACKGROUND, Priority.QUIZ, Priority.INTERACTIVE)]
+        await asyncio.sleep(0)
+        assert scheduler.queued() == 3
+
+        scheduler.release(Priority.QUIZ)
+        await asyncio.gather(*tasks)
+
+        assert order == [Priority.INTERACTIVE, Priority.QUIZ, Priority.BACKGROUND]
+        assert scheduler.stats()["interactive"]["completed"] == 1
+
+    async def test_class_cap_leaves_room_for_other_classes(self):
+        """Test that background work cannot take more than its own cap."""
+        scheduler = AIRequestScheduler(3, caps={Priority.BACKGROUND: 1})
+        await scheduler.acquire(Priority.BACKGROUND)
+
+        waiting = asyncio.create_task(scheduler.acquire(Priority.BACKGROUND))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(scheduler.acquire(Priority.INTERACTIVE), 0.1)
+
+        assert not waiting.done()
+        assert scheduler.stats()["background"] == {
+            "running": 1, "queued": 1, "completed": 0, "shed": 0, "max_wait": 0.0
+        }
+        waiting.cancel()
+
+    async def test_background_shed_when_queue_full(self):
+        """Test that background work is rejected once the queue is saturated."""
+        scheduler = AIRequestScheduler(1, queue_limit=1)
+        await scheduler.acquire(Priority.QUIZ)
+        queued = asyncio.create_task(scheduler.acquire(Priority.QUIZ))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AIOverloaded):
+            await scheduler.acquire(Priority.BACKGROUND)
+
+        assert scheduler.stats()["background"]["shed"] == 1
+        queued.cancel()
+
+    async def test_background_dropped_after_deadline(self):
+        """Test that queued background work gives up after its deadline and leaves the queue."""
+        scheduler = AIRequestScheduler(1, background_deadline=0.01)
+        await scheduler.acquire(Priority.QUIZ)
+
+        with pytest.raises(AIOverloaded):
+            await scheduler.acquire(Priority.BACKGROUND)
+
+        assert scheduler.queued() == 0
+        scheduler.release(Priority.QUIZ)
+        assert scheduler.stats()["quiz"]["running"] == 0
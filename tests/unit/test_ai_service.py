@@ -1,7 +1,11 @@
 import pytest
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 import json
-from quiz_bot.ai_service import AIService
+import asyncio
+import httpx
+from groq import RateLimitError
+from quiz_bot.ai_service import AIService, STUDY_ANSWER_ERROR
+from quiz_bot.ai_scheduler import AIRequestScheduler
 
 pytestmark = pytest.mark.asyncio
 
@@ -65,6 +69,132 @@ class TestAIService:
         assert num_questions == 0
         assert questions == []
 
+    async def test_parse_quiz_request_local_rules(self, mock_ai_service, mock_groq_client):
+        """Test that common prompt shapes are parsed without calling the LLM."""
+        # Act
+        result = await mock_ai_service.parse_quiz_request("kuis integral kesulitan mudah jumlah 3")
+
+        # Assert
+        assert result == ("integral", "mudah", 3)
+        mock_groq_client.chat.completions.create.assert_not_called()
+
+    async def test_parse_quiz_request_uses_fast_model(self, mock_ai_service, mock_groq_client):
+        """Test that prompts the rules cannot handle fall back to the small model."""
+        # Arrange
+        mock_groq_client.chat.completions.create.return_value.choices = [
+            MagicMock(message=MagicMock(content=json.dumps({"topic": "integral", "difficulty": "Mudah", "jumlah_soal": 3})))
+        ]
+
+        # Act
+        result = await mock_ai_service.parse_quiz_request("aku mau kuis tentang sejarah dunia, perang dingin, dan revolusi industri di eropa")
+
+        # Assert
+        assert result == ("integral", "mudah", 3)
+        assert mock_groq_client.chat.completions.create.call_args.kwargs["model"] == "llama-3.1-8b-instant"
+
+    async def test_generate_questions_for_shortfall(self, mock_ai_service, mock_groq_client, mock_groq_response):
+        """Test that only the requested number of questions is asked for."""
+        # Arrange
+        mock_groq_client.chat.completions.create.return_value = mock_groq_response
+
+        # Act
+        questions = await mock_ai_service.generate_questions("Python", "sedang", 2)
+
+        # Assert
+        assert len(questions) == 2
+        prompt = mock_groq_client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+        assert "Buat 2 soal" in prompt
+
+    async def test_identical_requests_share_one_call(self, mock_ai_service, mock_groq_client, mock_groq_response):
+        """Test that concurrent identical quiz requests make one call and get consistent shuffled copies."""
+        # Arrange
+        async def slow_create(**kwargs):
+            await asyncio.sleep(0.01)
+            return mock_groq_response
+        mock_groq_client.chat.completions.create.side_effect = slow_create
+
+        # Act
+        results = await asyncio.gather(*[
+            mock_ai_service.generate_questions("Integral", "mudah", 2) for _ in range(5)
+        ])
+
+        # Assert
+        assert mock_groq_client.chat.completions.create.await_count == 1
+        for questions in results:
+            correct = questions[0]["options"][ord(questions[0]["answer"]) - 65]
+            assert correct == "A programming language"
+
+    async def test_shuffle_options_keeps_unlettered_answer(self):
+        """Test that questions whose answer is not an option letter are left as they are."""
+        q = {"question": "Q", "options": ["x", "y"], "answer": "Semua benar", "explanation": ""}
+
+        assert AIService.shuffle_options(q) == q
+
+    async def test_stream_questions_yields_each_question(self, mock_ai_service, mock_groq_client, mock_groq_response):
+        """Test that streamed questions are yielded as soon as each object is complete."""
+        # Arrange
+        content = mock_groq_response.choices[0].message.content
+        chunks = [content[i:i + 7] for i in range(0, len(content), 7)]
+
+        async def token_stream():
+            for chunk in chunks:
+                yield MagicMock(choices=[MagicMock(delta=MagicMock(content=chunk))])
+
+        mock_groq_client.chat.completions.create.return_value = token_stream()
+
+        # Act
+        questions = [q async for q in mock_ai_service.stream_questions("Python", "sedang", 2)]
+
+        # Assert
+        assert [q["answer"] for q in questions] == ["B", "A"]
+        assert mock_groq_client.chat.completions.create.call_args.kwargs["stream"] is True
+
+    async def test_stream_study_answer_falls_back_on_error(self, mock_ai_service, mock_groq_client):
+        """Test that a failed stream still yields an apology message."""
+        # Arrange
+        mock_groq_client.chat.completions.create.side_effect = Exception("API Error")
+
+        # Act
+        pieces = [p async for p in mock_ai_service.stream_study_answer("Python", "Apa itu list?")]
+
+        # Assert
+        assert pieces == ["Maaf, saya mengalami kesulitan dalam menghasilkan jawaban. Silakan coba lagi."]
+
+    async def test_study_answer_is_cached(self, mock_ai_service, mock_groq_client):
+        """Test that a repeated study question is answered from the cache."""
+        # Arrange
+        response = MagicMock()
+        response.choices = [MagicMock(message=MagicMock(content="Turunan adalah laju perubahan."))]
+        mock_groq_client.chat.completions.create.return_value = response
+
+        # Act
+        first = await mock_ai_service.answer_study_question("Kalkulus", "Apa itu turunan?")
+        streamed = [p async for p in mock_ai_service.stream_study_answer("Kalkulus", "apa itu turunan")]
+
+        # Assert
+        assert first == streamed[0] == "Turunan adalah laju perubahan."
+        assert mock_groq_client.chat.completions.create.call_count == 1
+
+    async def test_performance_suggestion_memoized(self, mock_ai_service, mock_groq_client):
+        """Test that unchanged performance data reuses the previous suggestion until invalidated."""
+        # Arrange
+        response = MagicMock()
+        response.choices = [MagicMock(message=MagicMock(content="## 🎯 Ringkasan & Saran Belajar"))]
+        mock_groq_client.chat.completions.create.return_value = response
+        performance = [{"topic": "integral", "difficulty": "mudah", "avg_score": 50.0,
+                        "total_questions": 4, "total_correct": 2, "last_updated": "2024-01-01"}]
+
+        # Act
+        await mock_ai_service.generate_performance_suggestion(performance, "user_1")
+        await mock_ai_service.generate_performance_suggestion(list(performance), "user_1")
+        changed = [dict(performance[0], total_questions=5, total_correct=3, avg_score=60.0)]
+        await mock_ai_service.generate_performance_suggestion(changed, "user_1")
+        mock_ai_service.invalidate_suggestion("user_1")
+        await mock_ai_service.generate_performance_suggestion(changed, "user_1")
+
+        # Assert
+        assert mock_groq_client.chat.completions.create.call_count == 3
+
     async def test_match_topic_exact_match(self, mock_ai_service):
         """Test topic matching with exact match."""
         # Arrange
@@ -92,6 +222,31 @@ class TestAIService:
         # Assert
         assert result == "new topic"
 
+    async def test_match_topic_clear_local_match_skips_llm(self, mock_ai_service, mock_groq_client):
+        """Test that a clear local match is resolved without calling the LLM."""
+        # Act
+        result = await mock_ai_service.match_topic("Turunan", "sedang", ["turunan", "integral", "limit fungsi"])
+
+        # Assert
+        assert result == "turunan"
+        mock_groq_client.chat.completions.create.assert_not_called()
+
+    async def test_match_topic_ambiguous_falls_back_to_llm(self, mock_ai_service, mock_groq_client):
+        """Test that ambiguous topics ask the LLM with only the closest candidates."""
+        # Arrange
+        existing_topics = ["integral", "integral tak tentu"] + [f"topik lain {i}" for i in range(20)]
+        mock_groq_client.chat.completions.create.return_value.choices = [
+            MagicMock(message=MagicMock(content=json.dumps({"matched_topic": "integral tak tentu"})))
+        ]
+
+        # Act
+        result = await mock_ai_service.match_topic("integral tentu", "sedang", existing_topics)
+
+        # Assert
+        assert result == "integral tak tentu"
+        prompt = mock_groq_client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+        assert prompt.count("topik lain") <= 3
+
     async def test_generate_performance_suggestion(self, mock_ai_service, mock_groq_client):
         """Test performance suggestion generation."""
         # Arrange
@@ -162,3 +317,56 @@ class TestAIService:
         assert len(normalized["options"]) == 4
         assert normalized["answer"] == "A"
         assert normalized["explanation"] == ""
+
+    async def test_chat_calls_overlap_up_to_concurrency_limit(self, mock_ai_service, mock_groq_client):
+        """Test that concurrent calls run in parallel but respect the semaphore limit."""
+        # Arrange
+        in_flight = 0
+        peak = 0
+
+        async def slow_create(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return MagicMock(choices=[MagicMock(message=MagicMock(content="ok"))])
+
+        mock_groq_client.chat.completions.create.side_effect = slow_create
+        mock_ai_service.scheduler = AIRequestScheduler(3)
+
+        # Act
+        results = await asyncio.gather(*[
+            mock_ai_service.answer_study_question("Python", f"Q{i}") for i in range(6)
+        ])
+
+        # Assert
+        assert results == ["ok"] * 6
+        assert peak == 3
+
+    async def test_rate_limited_call_retried_after_retry_after(self, mock_ai_service, mock_groq_client):
+        """Test that a 429 is retried after the Retry-After delay instead of failing."""
+        request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+        throttled = RateLimitError("rate limited", response=httpx.Response(429, headers={"retry-after": "2"}, request=request), body=None)
+        mock_groq_client.chat.completions.create.side_effect = [
+            throttled,
+            MagicMock(choices=[MagicMock(message=MagicMock(content="Jawaban"))])
+        ]
+
+        with patch("quiz_bot.ai_service.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            answer = await mock_ai_service.answer_study_question("Python", "Apa itu list?")
+
+        assert answer == "Jawaban"
+        mock_sleep.assert_awaited_once()
+        assert mock_sleep.await_args.args[0] == pytest.approx(2.0, abs=0.1)
+        assert mock_ai_service.circuit_breaker.failures == 0
+
+    async def test_open_circuit_fails_fast(self, mock_ai_service, mock_groq_client):
+        """Test that no request reaches Groq while the circuit breaker is open."""
+        for _ in range(mock_ai_service.circuit_breaker.failure_threshold):
+            mock_ai_service.circuit_breaker.record_failure()
+
+        answer = await mock_ai_service.answer_study_question("Python", "Apa itu tuple?")
+
+        assert answer == STUDY_ANSWER_ERROR
+        mock_groq_client.chat.completions.create.assert_not_called()
@@ -0,0 +1,85 @@
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import AsyncMock, MagicMock
+from quiz_bot.ai_service import AIService, RECOMMENDATIONS_ERROR
+from quiz_bot.ai_scheduler import AIRequestScheduler, Priority
+from quiz_bot.ai_workers import AIWorkerPool
+
+pytestmark = pytest.mark.asyncio
+
+class TestAIWorkerPool:
+    """Test suite for running AIService jobs in worker processes."""
+
+    @pytest.mark.slow
+    async def test_runs_job_in_worker_process(self):
+        """Test that a job runs on a real worker and its result comes back."""
+        pool = AIWorkerPool(1)
+        try:
+            await pool.start()
+            result = await pool.run("parse_quiz_request", "buat 3 soal mudah tentang python")
+        finally:
+            pool.stop()
+
+        assert result == ("python", "mudah", 3)
+
+    @pytest.mark.slow
+    async def test_stream_job_errors_come_back(self):
+        """Test that a streaming job's failure inside the worker is raised in the bot process."""
+        pool = AIWorkerPool(1)
+        try:
+            with pytest.raises(RuntimeError):
+                async for _ in pool.stream("no_such_method"):
+                    pass
+        finally:
+            pool.stop()
+
+    async def test_streamed_generation_uses_pool(self):
+        """Test that streamed quiz generation is read from the pool when workers are attached."""
+        service = AIService()
+        service.groq_client = MagicMock()
+
+        async def stream(method, *args):
+            assert method == "_stream_questions"
+            yield {"question": "Q1", "options": ["a", "b"], "answer": "A", "explanation": ""}
+        service.workers = MagicMock(stream=stream)
+
+        questions = [q async for q in service.stream_questions("Integral", "mudah", 1)]
+
+        assert [q["question"] for q in questions] == ["Q1"]
+        service.groq_client.chat.completions.create.assert_not_called()
+
+    async def test_offloadable_methods_use_pool(self):
+        """Test that offloadable methods are sent to the pool instead of calling Groq."""
+        service = AIService()
+        service.groq_client = MagicMock()
+        service.workers = MagicMock(run=AsyncMock(return_value={"topic": "Python"}))
+
+        plan = await service.generate_study_plan("belajar python 1 jam")
+
+        assert plan == {"topic": "Python"}
+        service.workers.run.assert_awaited_once_with("generate_study_plan", "belajar python 1 jam")
+        service.groq_client.chat.completions.create.assert_not_called()
+
+    async def test_broken_pool_falls_back_to_local(self):
+        """Test that a dead pool is detached and the job runs in the bot process."""
+        service = AIService()
+        service.workers = MagicMock(run=AsyncMock(side_effect=BrokenProcessPool("worker died")))
+        service._chat = AsyncMock(return_value="Ringkasan")
+
+        summary = await service.generate_study_summary("Python", 25, 1, [])
+
+        assert summary == "Ringkasan"
+        assert service.workers is None
+
+    async def test_offloaded_jobs_take_gateway_priority_slots(self):
+        """Test that pool jobs respect the scheduler's class caps and shedding."""
+        service = AIService()
+        service.scheduler = AIRequestScheduler(2, caps={Priority.BACKGROUND: 1}, queue_limit=0)
+        service.workers = MagicMock(run=AsyncMock(return_value="Rekomendasi"))
+        await service.scheduler.acquire(Priority.BACKGROUND)  # A background job is already running
+
+        result = await service.generate_recommendations({"topics_data": {}})
+
+        assert result == RECOMMENDATIONS_ERROR
+        service.workers.run.assert_not_called()
+        assert service.scheduler.stats()["background"]["shed"] == 1
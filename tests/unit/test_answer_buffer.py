@@ -0,0 +1,137 @@
+"""Unit tests for the write-behind answer buffer."""
+
+import os
+import pytest
+from unittest.mock import AsyncMock
+from quiz_bot.answer_buffer import AnswerBuffer
+
+pytestmark = pytest.mark.asyncio
+
+class TestAnswerBuffer:
+    """Test suite for AnswerBuffer."""
+
+    @pytest.fixture
+    def mock_db(self):
+        """Create a mocked async database manager."""
+        return AsyncMock()
+
+    @pytest.fixture
+    def spill_path(self, tmp_path):
+        """Return a temporary spill file path."""
+        return str(tmp_path / "answers.jsonl")
+
+    @pytest.fixture
+    def buffer(self, mock_db, spill_path):
+        """Create an answer buffer with a large batch size so only explicit flushes run."""
+        return AnswerBuffer(mock_db, spill_path, flush_interval=60, max_batch=1000)
+
+    def add(self, buffer, user_id="123", topic="integral", is_correct=True):
+        buffer.add_answer("qq1", user_id, "A", is_correct, 3.5, topic, "mudah")
+
+    async def test_add_answer_does_not_touch_database(self, buffer, mock_db, spill_path):
+        """Test that answers are acknowledged without a DB round trip."""
+        # Act
+        self.add(buffer)
+
+        # Assert
+        mock_db.save_answers_bulk.assert_not_called()
+        with open(spill_path) as f:
+            assert len(f.readlines()) == 1
+
+    async def test_flush_coalesces_performance_deltas(self, buffer, mock_db, spill_path):
+        """Test that one bulk insert and one increment per user/topic are issued."""
+        # Arrange
+        self.add(buffer, is_correct=True)
+        self.add(buffer, is_correct=False)
+        self.add(buffer, is_correct=True)
+        self.add(buffer, user_id="456")
+
+        # Act
+        await buffer.flush()
+
+        # Assert
+        rows = mock_db.save_answers_bulk.call_args[0][0]
+        assert len(rows) == 4
+        assert "topic" not in rows[0]
+        calls = {c.args for c in mock_db.increment_performance.call_args_list}
+        assert calls == {("123", "integral", "mudah", 3, 2), ("456", "integral", "mudah", 1, 1)}
+        assert not buffer.answers
+
+    async def test_failed_flush_keeps_answers(self, buffer, mock_db, spill_path):
+        """Test that answers are kept in memory and on disk when the insert fails."""
+        # Arrange
+        mock_db.save_answers_bulk.side_effect = Exception("DB down")
+        self.add(buffer)
+
+        # Act
+        await buffer.flush()
+
+        # Assert
+        assert len(buffer.answers) == 1
+        mock_db.increment_performance.assert_not_called()
+        with open(spill_path) as f:
+            assert len(f.readlines()) == 1
+
+    async def test_failed_performance_update_is_retried_without_duplicate_answers(self, buffer, mock_db):
+        """Test that a failed increment is retried on the next flush without re-inserting answers."""
+        # Arrange
+        mock_db.increment_performance.side_effect = [Exception("timeout"), None]
+        self.add(buffer)
+
+        # Act
+        await buffer.flush()
+        await buffer.flush()
+
+        # Assert
+        mock_db.save_answers_bulk.assert_called_once()
+        assert mock_db.increment_performance.call_args_list[1].args == ("123", "integral", "mudah", 1, 1)
+
+    async def test_crash_during_performance_updates_replays_only_remaining_deltas(self, buffer, mock_db, spill_path):
+        """Test that a restart after a partial flush neither re-inserts answers nor re-applies done deltas."""
+        # Arrange
+        self.add(buffer, user_id="123")
+        self.add(buffer, user_id="456")
+
+        async def crash_on_second(user_id, *args):
+            if user_id == "456":
+                raise KeyboardInterrupt  # Process dies mid-flush
+        mock_db.increment_performance.side_effect = crash_on_second
+
+        # Act
+        with pytest.raises(KeyboardInterrupt):
+            await buffer.flush()
+        restarted = AnswerBuffer(AsyncMock(), spill_path, flush_interval=60, max_batch=1000)
+        await restarted.start()
+        await restarted.stop()
+
+        # Assert
+        restarted.database.save_answers_bulk.assert_not_called()
+        restarted.database.increment_performance.assert_awaited_once_with("456", "integral", "mudah", 1, 1)
+
+    async def test_spilled_answers_replayed_on_start(self, mock_db, spill_path):
+        """Test that answers left in the spill file by a crash are flushed after restart."""
+        # Arrange
+        crashed = AnswerBuffer(mock_db, spill_path, flush_interval=60, max_batch=1000)
+        self.add(crashed)
+        self.add(crashed, is_correct=False)
+
+        # Act
+        restarted = AnswerBuffer(mock_db, spill_path, flush_interval=60, max_batch=1000)
+        await restarted.start()
+        await restarted.stop()
+
+        # Assert
+        assert len(mock_db.save_answers_bulk.call_args[0][0]) == 2
+        mock_db.increment_performance.assert_called_once_with("123", "integral", "mudah", 2, 1)
+        assert restarted.answers == []
+
+    async def test_spill_file_removed_after_successful_flush(self, buffer, spill_path):
+        """Test that the spill file only holds unflushed work."""
+        # Arrange
+        self.add(buffer)
+
+        # Act
+        await buffer.flush()
+
+        # Assert
+        assert not os.path.exists(spill_path)
@@ -0,0 +1,375 @@
+"""Unit tests for the async database manager."""
+
+import asyncio
+import os
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from quiz_bot.database import AsyncDatabaseManager, aggregate_learning_history
+
+pytestmark = pytest.mark.asyncio
+
+class TestAsyncDatabaseManager:
+    """Test suite for AsyncDatabaseManager batched operations."""
+
+    @pytest.fixture
+    def mock_supabase(self):
+        """Create a mocked async Supabase client."""
+        client = MagicMock()
+        client.table.return_value.insert.return_value.execute = AsyncMock(
+            return_value=MagicMock(data=[])
+        )
+        return client
+
+    @pytest.fixture
+    def database(self, mock_supabase):
+        """Create a database manager using the mocked client."""
+        manager = AsyncDatabaseManager()
+        manager.supabase = mock_supabase
+        return manager
+
+    async def test_save_questions_bulk_single_request(self, database, mock_supabase, sample_quiz_questions):
+        """Test that all questions are inserted in one request."""
+        # Act
+        question_ids = await database.save_questions_bulk("geografi", "mudah", sample_quiz_questions)
+
+        # Assert
+        mock_supabase.table.assert_called_once_with("questions")
+        rows = mock_supabase.table.return_value.insert.call_args[0][0]
+        assert len(rows) == 2
+        assert [row["id"] for row in rows] == question_ids
+        assert rows[0]["question_text"] == "What is the capital of France?"
+
+    async def test_save_questions_bulk_reuses_identical_questions(self, database, mock_supabase, sample_quiz_questions):
+        """Test that concurrent quizzes saving the same generated questions share one row each."""
+        # Act
+        first, second = await asyncio.gather(
+            database.save_questions_bulk("geografi", "mudah", sample_quiz_questions),
+            database.save_questions_bulk("geografi", "mudah", [dict(q) for q in sample_quiz_questions])
+        )
+
+        # Assert
+        assert first == second
+        mock_supabase.table.return_value.insert.assert_called_once()
+
+    async def test_save_questions_bulk_keeps_reordered_options_apart(self, database, mock_supabase, sample_quiz_questions):
+        """Test that a copy with shuffled options and answer letter gets its own row."""
+        # Arrange
+        q = sample_quiz_questions[0]
+        shuffled = {**q, "options": list(reversed(q["options"])), "answer": "B"}  # C reversed
+
+        # Act
+        first, second = await asyncio.gather(
+            database.save_questions_bulk("geografi", "mudah", [q]),
+            database.save_questions_bulk("geografi", "mudah", [shuffled])
+        )
+
+        # Assert
+        assert first != second
+        inserted = [c[0][0][0] for c in mock_supabase.table.return_value.insert.call_args_list]
+        assert [(row["options"], row["correct_answer"]) for row in inserted] == [
+            (q["options"], "C"), (shuffled["options"], "B")
+        ]
+
+    async def test_save_questions_bulk_cancelled_insert_releases_waiters(self, database, mock_supabase, sample_quiz_questions):
+        """Test that cancelling an insert does not leave later quizzes waiting on it."""
+        # Arrange
+        started = asyncio.Event()
+        async def slow_insert():
+            started.set()
+            await asyncio.sleep(10)
+        mock_supabase.table.return_value.insert.return_value.execute = AsyncMock(side_effect=slow_insert)
+        leader = asyncio.create_task(database.save_questions_bulk("geografi", "mudah", sample_quiz_questions))
+        await started.wait()
+        follower = asyncio.create_task(database.save_questions_bulk("geografi", "mudah", sample_quiz_questions))
+        await asyncio.sleep(0)
+
+        # Act
+        leader.cancel()
+
+        # Assert
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(follower, 1)
+        assert not database.question_ids
+
+    async def test_save_quiz_questions_bulk_returns_ids_in_sequence(self, database, mock_supabase):
+        """Test that link IDs are returned in sequence order regardless of response order."""
+        # Arrange
+        mock_supabase.table.return_value.insert.return_value.execute.return_value = MagicMock(data=[
+            {"id": "qq3", "sequence": 3},
+            {"id": "qq1", "sequence": 1},
+            {"id": "qq2", "sequence": 2},
+        ])
+
+        # Act
+        ids = await database.save_quiz_questions_bulk("session_1", ["a", "b", "c"])
+
+        # Assert
+        mock_supabase.table.assert_called_once_with("quiz_questions")
+        assert ids == ["qq1", "qq2", "qq3"]
+
+    async def test_save_questions_bulk_empty(self, database, mock_supabase):
+        """Test that no request is made for an empty batch."""
+        # Act
+        question_ids = await database.save_questions_bulk("geografi", "mudah", [])
+
+        # Assert
+        assert question_ids == []
+        mock_supabase.table.assert_not_called()
+
+    async def test_create_study_session_inserts_intervals_once(self, database, mock_supabase, sample_study_plan):
+        """Test that study intervals are written in a single multi-row insert."""
+        # Act
+        await database.create_study_session("session_1", "user_1", "Python", sample_study_plan)
+
+        # Assert
+        tables = [call.args[0] for call in mock_supabase.table.call_args_list]
+        assert tables == ["study_sessions", "study_intervals"]
+        intervals = mock_supabase.table.return_value.insert.call_args_list[1].args[0]
+        assert [i["sequence"] for i in intervals] == [1, 2]
+        assert intervals[1]["focus"] == "Functions and Classes"
+
+    async def test_update_performance_single_rpc(self, database, mock_supabase):
+        """Test that performance updates are a single atomic RPC call."""
+        # Arrange
+        mock_supabase.rpc.return_value.execute = AsyncMock()
+
+        # Act
+        await database.update_performance("user_1", "integral", "mudah", True)
+
+        # Assert
+        mock_supabase.rpc.assert_called_once_with("increment_performance", {
+            "p_user_id": "user_1",
+            "p_topic": "integral",
+            "p_difficulty": "mudah",
+            "p_questions": 1,
+            "p_correct": 1
+        })
+        mock_supabase.table.assert_not_called()
+
+    async def test_increment_performance_notifies_listeners(self, database, mock_supabase):
+        """Test that performance listeners hear about the changed user."""
+        # Arrange
+        mock_supabase.rpc.return_value.execute = AsyncMock()
+        changed = []
+        database.add_performance_listener(changed.append)
+
+        # Act
+        await database.increment_performance("user_1", "integral", "mudah", 3, 2)
+
+        # Assert
+        assert changed == ["user_1"]
+
+    async def test_get_existing_topics_cached(self, database, mock_supabase):
+        """Test that topics are loaded once and then served from memory."""
+        # Arrange
+        select = mock_supabase.table.return_value.select.return_value
+        select.eq.return_value.execute = AsyncMock(return_value=MagicMock(data=[
+            {"topic": "integral", "created_at": "2024-01-01T00:00:00"},
+            {"topic": "turunan", "created_at": "2024-01-02T00:00:00"},
+        ]))
+
+        # Act
+        first = await database.get_existing_topics("mudah")
+        second = await database.get_existing_topics("mudah")
+
+        # Assert
+        assert first == second == ["integral", "turunan"]
+        mock_supabase.table.assert_called_once_with("topics")
+
+    async def test_get_existing_topics_incremental_refresh(self, database, mock_supabase, monkeypatch):
+        """Test that a stale cache only fetches topics from shortly before the last seen row."""
+        # Arrange
+        select = mock_supabase.table.return_value.select.return_value
+        select.eq.return_value.execute = AsyncMock(return_value=MagicMock(data=[
+            {"topic": "integral", "created_at": "2024-01-01T00:00:00"},
+        ]))
+        select.eq.return_value.gte.return_value.execute = AsyncMock(return_value=MagicMock(data=[
+            {"topic": "integral", "created_at": "2024-01-01T00:00:00"},
+            {"topic": "limit", "created_at": "2024-01-03T00:00:00"},
+        ]))
+        await database.get_existing_topics("mudah")
+        monkeypatch.setattr("quiz_bot.database.config.TOPIC_CACHE_TTL", -1)
+
+        # Act
+        topics = await database.get_existing_topics("mudah")
+
+        # Assert
+        select.eq.return_value.gte.assert_called_once_with("created_at", "2023-12-31T23:59:00")
+        assert topics == ["integral", "limit"]
+        assert database.topic_cache_cursor["mudah"] == "2024-01-03T00:00:00"
+
+    async def test_register_topic_updates_cache(self, database, mock_supabase):
+        """Test that registering a topic writes once and updates the loaded cache."""
+        # Arrange
+        select = mock_supabase.table.return_value.select.return_value
+        select.eq.return_value.execute = AsyncMock(return_value=MagicMock(data=[]))
+        mock_supabase.table.return_value.upsert.return_value.execute = AsyncMock()
+        await database.get_existing_topics("mudah")
+
+        # Act
+        await database.register_topic("integral", "mudah")
+        await database.register_topic("integral", "mudah")
+
+        # Assert
+        mock_supabase.table.return_value.upsert.assert_called_once()
+        assert await database.get_existing_topics("mudah") == ["integral"]
+
+    async def test_register_topic_before_first_load(self, database, mock_supabase):
+        """Test that registering into an unloaded difficulty leaves the full load to get_existing_topics."""
+        # Arrange
+        select = mock_supabase.table.return_value.select.return_value
+        select.eq.return_value.execute = AsyncMock(return_value=MagicMock(data=[
+            {"topic": "integral", "created_at": "2024-01-01T00:00:00"},
+            {"topic": "turunan", "created_at": "2024-01-02T00:00:00"},
+        ]))
+        mock_supabase.table.return_value.upsert.return_value.execute = AsyncMock()
+
+        # Act
+        await database.register_topic("integral", "sulit")
+        topics = await database.get_existing_topics("sulit")
+
+        # Assert
+        assert topics == ["integral", "turunan"]
+
+    async def test_get_unseen_questions_maps_rows(self, database, mock_supabase):
+        """Test that bank rows are returned in the question format used by quiz sessions."""
+        # Arrange
+        mock_supabase.rpc.return_value.execute = AsyncMock(return_value=MagicMock(data=[{
+            "id": "q1",
+            "question_text": "Berapa 2 + 2?",
+            "options": ["3", "4", "5", "6"],
+            "correct_answer": "B",
+            "explanation": None
+        }]))
+
+        # Act
+        questions = await database.get_unseen_questions("user_1", "aritmatika", "mudah", 5)
+
+        # Assert
+        assert mock_supabase.rpc.call_args.args[0] == "get_unseen_questions"
+        assert questions == [{
+            "id": "q1",
+            "question": "Berapa 2 + 2?",
+            "options": ["3", "4", "5", "6"],
+            "answer": "B",
+            "explanation": ""
+        }]
+
+
+class TestStudyHistoryQueries:
+    """Test suite for the lean study history queries."""
+
+    @pytest.fixture
+    def database(self):
+        manager = AsyncDatabaseManager()
+        manager.supabase = MagicMock()
+        return manager
+
+    async def test_study_history_reads_totals_view(self, database):
+        """Test that study history comes from the aggregated view without summary text."""
+        query = database.supabase.table.return_value.select.return_value.eq.return_value.order.return_value.limit.return_value
+        query.execute = AsyncMock(return_value=MagicMock(data=[{"id": "s1", "topic": "integral", "actual_duration": 50}]))
+
+        sessions = await database.get_study_history("user_1", limit=3)
+
+        database.supabase.table.assert_called_once_with("study_session_totals")
+        database.supabase.table.return_value.select.assert_called_once_with("*")
+        assert sessions[0]["actual_duration"] == 50
+
+    async def test_summary_loaded_on_demand(self, database):
+        """Test that a session summary is fetched by itself."""
+        query = database.supabase.table.return_value.select.return_value.eq.return_value.order.return_value.limit.return_value
+        query.execute = AsyncMock(return_value=MagicMock(data=[{"summary": "Ringkasan"}]))
+
+        summary = await database.get_study_summary("s1")
+
+        database.supabase.table.assert_called_once_with("study_summaries")
+        assert summary == "Ringkasan"
+
+
+class TestAggregateLearningHistory:
+    """Test suite for aggregate_learning_history."""
+
+    def test_per_topic_totals(self):
+        """Test that study time is counted once per session and scores are weighted."""
+        performance = [
+            {"topic": "integral", "difficulty": "mudah", "avg_score": 100.0, "total_questions": 3},
+            {"topic": "integral", "difficulty": "sulit", "avg_score": 0.0, "total_questions": 1},
+            {"topic": "turunan", "difficulty": "mudah", "avg_score": 50.0, "total_questions": 2},
+        ]
+        sessions = [
+            {"topic": "integral", "total_duration": 25},
+            {"topic": "integral", "total_duration": 50},
+            {"topic": "statistika", "total_duration": None},
+        ]
+
+        topics = aggregate_learning_history(performance, sessions)["topics_data"]
+
+        assert topics["integral"]["quiz_attempts"] == 2
+        assert topics["integral"]["total_questions"] == 4
+        assert topics["integral"]["avg_score"] == 75.0
+        assert topics["integral"]["difficulty_levels"] == ["mudah", "sulit"]
+        assert topics["integral"]["study_sessions"] == 2
+        assert topics["integral"]["total_study_time"] == 75
+        assert topics["turunan"]["study_sessions"] == 0
+        assert topics["statistika"]["study_sessions"] == 1
+
+    async def test_queries_run_concurrently(self):
+        """Test that performance, study history and topic totals are fetched together."""
+        database = AsyncDatabaseManager()
+        in_flight = 0
+        peak = 0
+
+        def query(result):
+            async def run(*args, **kwargs):
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+                return result
+            return AsyncMock(side_effect=run)
+
+        database.get_performance_summary = query([])
+        database.get_study_history = query([{"topic": "integral", "total_duration": 25}])
+        database.get_topic_study_totals = query([
+            {"topic": "integral", "study_sessions": 12, "total_study_time": 300}
+        ])
+
+        history = await database.get_user_learning_history("user_1")
+
+        assert peak == 3
+        database.get_performance_summary.assert_awaited_once_with("user_1")
+        database.get_study_history.assert_awaited_once_with("user_1", limit=5)
+        assert history["topics_data"]["integral"]["study_sessions"] == 12
+        assert history["topics_data"]["integral"]["total_study_time"] == 300
+        assert history["recent_study_sessions"] == [{"topic": "integral", "total_duration": 25}]
+
+    @pytest.mark.slow
+    @pytest.mark.skipif(not os.getenv("RUN_BENCHMARKS"), reason="timing benchmark; set RUN_BENCHMARKS=1 to run")
+    def test_scales_linearly(self):
+        """Benchmark: 10x more topics and sessions should cost roughly 10x, not 100x."""
+        def build(n):
+            performance = [
+                {"topic": f"topik {i % n}", "difficulty": d, "avg_score": 50.0, "total_questions": 10}
+                for i in range(n) for d in ("mudah", "sulit")
+            ]
+            sessions = [{"topic": f"topik {i % n}", "total_duration": 25} for i in range(2 * n)]
+            return performance, sessions
+
+        def best_time(n, repeats=5):
+            performance, sessions = build(n)
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                aggregate_learning_history(performance, sessions)
+                timings.append(time.perf_counter() - start)
+            return min(timings)
+
+        small, large = best_time(100), best_time(1000)
+        print(f"\n100 topik: {small * 1000:.2f} ms, 1000 topik: {large * 1000:.2f} ms")
+
+        assert large / small < 30
@@ -0,0 +1,32 @@
+"""Unit tests for the incremental JSON object parser."""
+
+import json
+from quiz_bot.json_stream import JsonObjectStream
+
+DOCUMENT = json.dumps({
+    "questions": [
+        {"question": "Apa itu {x}?", "options": ["A", "B \"kutip\"", "C", "D"], "answer": "A", "explanation": "]}"},
+        {"question": "Soal kedua", "options": ["1", "2", "3", "4"], "answer": "C", "explanation": "Karena..."},
+    ]
+})
+
+def test_objects_are_returned_as_soon_as_they_close():
+    """Test that the first object is available before the document ends."""
+    parser = JsonObjectStream()
+    first_end = DOCUMENT.index('"answer": "C"')
+
+    early = parser.feed(DOCUMENT[:first_end])
+    late = parser.feed(DOCUMENT[first_end:])
+
+    assert [q["answer"] for q in early] == ["A"]
+    assert [q["answer"] for q in late] == ["C"]
+
+def test_single_character_chunks():
+    """Test that braces inside strings and escaped quotes do not confuse the parser."""
+    parser = JsonObjectStream()
+    objects = []
+    for char in DOCUMENT:
+        objects.extend(parser.feed(char))
+
+    assert objects == json.loads(DOCUMENT)["questions"]
+    assert len(parser.buffer) < len(DOCUMENT)
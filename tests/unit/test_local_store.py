@@ -0,0 +1,53 @@
+"""Unit tests for the SQLite performance store."""
+
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from quiz_bot.local_store import LocalPerformanceStore
+
+class TestLocalPerformanceStore:
+    """Test suite for LocalPerformanceStore."""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        """Create a store backed by a temporary database file."""
+        return LocalPerformanceStore(str(tmp_path / "performance.db"))
+
+    def test_first_answer_creates_row(self, store):
+        """Test that the first answer inserts a new performance row."""
+        # Act
+        store.update_performance("123", "integral", "mudah", True)
+
+        # Assert
+        rows = store.get_performance_summary("123")
+        assert len(rows) == 1
+        assert rows[0]["total_questions"] == 1
+        assert rows[0]["total_correct"] == 1
+        assert rows[0]["avg_score"] == 100.0
+
+    def test_increment_updates_average(self, store):
+        """Test that subsequent answers accumulate counters and average."""
+        # Act
+        store.update_performance("123", "integral", "mudah", True)
+        store.update_performance("123", "integral", "mudah", False)
+        store.increment_performance("123", "integral", "mudah", 2, 1)
+
+        # Assert
+        row = store.get_performance_summary("123")[0]
+        assert row["total_questions"] == 4
+        assert row["total_correct"] == 2
+        assert row["avg_score"] == 50.0
+
+    def test_concurrent_answers_are_not_lost(self, store):
+        """Test that concurrent increments from many threads are all applied."""
+        # Arrange
+        answers = [i % 2 == 0 for i in range(200)]
+
+        # Act
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda ok: store.update_performance("123", "integral", "mudah", ok), answers))
+
+        # Assert
+        row = store.get_performance_summary("123")[0]
+        assert row["total_questions"] == 200
+        assert row["total_correct"] == 100
+        assert row["avg_score"] == 50.0
@@ -0,0 +1,41 @@
+"""Unit tests for the rule-based quiz prompt parser."""
+
+import pytest
+from quiz_bot.prompt_parser import MAX_QUESTION_COUNT, parse_quiz_prompt
+
+class TestParseQuizPrompt:
+    """Test suite for parse_quiz_prompt."""
+
+    @pytest.mark.parametrize("prompt, expected", [
+        ("kuis integral kesulitan mudah jumlah 3", ("integral", "mudah", 3)),
+        ("buatkan 5 soal sulit tentang hukum newton", ("hukum newton", "sulit", 5)),
+        ("Quiz: Sejarah Indonesia, level susah, 10 pertanyaan", ("sejarah indonesia", "sulit", 10)),
+        ("tolong buat lima soal persamaan kuadrat tingkat gampang", ("persamaan kuadrat", "mudah", 5)),
+        ("kuis integral 10", ("integral 10", "sedang", 5)),
+        ("kuis perang dunia 2 sulit", ("perang dunia 2", "sulit", 5)),
+        ("jumlah soal: 4 tentang aljabar linear", ("aljabar linear", "sedang", 4)),
+    ])
+    def test_common_prompts(self, prompt, expected):
+        """Test that common prompt shapes are parsed correctly."""
+        assert parse_quiz_prompt(prompt) == expected
+
+    def test_defaults(self):
+        """Test that difficulty and count fall back to the documented defaults."""
+        assert parse_quiz_prompt("kuis turunan") == ("turunan", "sedang", 5)
+
+    def test_count_is_clamped(self):
+        """Test that huge question counts are cut down to the maximum quiz size."""
+        assert parse_quiz_prompt("kuis integral 10000 soal") == ("integral", "sedang", MAX_QUESTION_COUNT)
+
+    def test_no_topic_returns_none(self):
+        """Test that prompts without a topic keyword defer to the model."""
+        assert parse_quiz_prompt("kuis sedang jumlah 3") is None
+
+    def test_long_free_text_returns_none(self):
+        """Test that free-form prompts with no clear keyword defer to the model."""
+        assert parse_quiz_prompt("aku mau belajar banyak hal tentang sejarah dunia dan perang dingin di eropa") is None
+
+    @pytest.mark.parametrize("prompt", ["kuis gaya berat", "quiz on normal distribution"])
+    def test_ambiguous_difficulty_word_returns_none(self, prompt):
+        """Test that difficulty synonyms without a marker word defer to the model."""
+        assert parse_quiz_prompt(prompt) is None
@@ -1,5 +1,6 @@
 """Unit tests for the quiz management module."""
 
+import asyncio
 import pytest
 from datetime import datetime, timedelta
 from quiz_bot.quiz_manager import QuizManager, QuizSession
@@ -105,6 +106,41 @@ class TestQuizSession:
         quiz_session.move_to_next_question()
         assert quiz_session.is_finished() is True
 
+    def test_not_finished_while_generating(self, quiz_session):
+        """Test that a quiz with questions still being generated is not finished."""
+        quiz_session.generating = True
+        quiz_session.current = 2
+        assert quiz_session.is_finished() is False
+
+        quiz_session.finish_generating()
+        assert quiz_session.is_finished() is True
+
+    @pytest.mark.asyncio
+    async def test_wait_for_appended_question(self, quiz_session):
+        """Test waiting for a question that is appended in the background."""
+        quiz_session.generating = True
+        quiz_session.current = 2
+        extra = {"question": "Q3", "options": ["a", "b", "c", "d"], "answer": "C", "explanation": ""}
+
+        async def generate():
+            await asyncio.sleep(0.01)
+            quiz_session.append_question(extra, "q3")
+
+        asyncio.create_task(generate())
+        question = await quiz_session.wait_for_current_question(timeout=1)
+
+        assert question == extra
+        assert quiz_session.get_current_question_id() == "q3"
+
+    @pytest.mark.asyncio
+    async def test_wait_returns_none_when_generation_ends(self, quiz_session):
+        """Test that waiting stops once generation finishes without a new question."""
+        quiz_session.generating = True
+        quiz_session.current = 2
+        asyncio.get_running_loop().call_later(0.01, quiz_session.finish_generating)
+
+        assert await quiz_session.wait_for_current_question(timeout=1) is None
+
 
 class TestQuizManager:
     """Test suite for QuizManager class."""
@@ -126,10 +162,10 @@ class TestQuizManager:
             }
         ]
 
-    def test_create_session(self, quiz_manager, quiz_questions):
+    async def test_create_session(self, quiz_manager, quiz_questions):
         """Test creating a new quiz session."""
         # Act
-        session = quiz_manager.create_session(
+        session = await quiz_manager.create_session(
             user_id="123",
             questions=quiz_questions,
             topic="Python",
@@ -144,10 +180,10 @@ class TestQuizManager:
         assert session.difficulty == "sedang"
         assert "123" in quiz_manager.active_sessions
 
-    def test_get_session(self, quiz_manager, quiz_questions):
+    async def test_get_session(self, quiz_manager, quiz_questions):
         """Test getting an active quiz session."""
         # Arrange
-        session = quiz_manager.create_session(
+        session = await quiz_manager.create_session(
             user_id="123",
             questions=quiz_questions,
             topic="Python",
@@ -156,13 +192,13 @@ class TestQuizManager:
         )
         
         # Act & Assert
-        assert quiz_manager.get_session("123") == session
-        assert quiz_manager.get_session("456") is None
+        assert await quiz_manager.get_session("123") == session
+        assert await quiz_manager.get_session("456") is None
 
-    def test_end_session(self, quiz_manager, quiz_questions):
+    async def test_end_session(self, quiz_manager, quiz_questions):
         """Test ending a quiz session."""
         # Arrange
-        quiz_manager.create_session(
+        await quiz_manager.create_session(
             user_id="123",
             questions=quiz_questions,
             topic="Python",
@@ -171,7 +207,7 @@ class TestQuizManager:
         )
         
         # Act
-        quiz_manager.end_session("123")
+        await quiz_manager.end_session("123")
         
         # Assert
         assert "123" not in quiz_manager.active_sessions
\ No newline at end of file
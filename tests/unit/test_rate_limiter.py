@@ -0,0 +1,55 @@
+import pytest
+from unittest.mock import patch
+from quiz_bot.rate_limiter import (
+    CircuitBreaker, CircuitOpenError, RateLimiter, TokenBucket, backoff_delay
+)
+
+pytestmark = pytest.mark.asyncio
+
+class TestRateLimiter:
+    """Test suite for the Groq rate limiting primitives."""
+
+    async def test_bucket_waits_for_refill(self):
+        """Test that an empty bucket sleeps until enough units have refilled."""
+        bucket = TokenBucket(60)  # 1 unit per second
+        bucket.tokens = 0
+
+        with patch("quiz_bot.rate_limiter.asyncio.sleep") as mock_sleep:
+            async def refill(delay):
+                bucket.tokens += delay * bucket.rate
+            mock_sleep.side_effect = refill
+            await bucket.acquire(3)
+
+        assert mock_sleep.await_args_list[0].args[0] == pytest.approx(3, abs=0.1)
+        assert bucket.tokens < 1
+
+    async def test_usage_correction_can_put_bucket_in_debt(self):
+        """Test that real token usage above the estimate is charged afterwards."""
+        limiter = RateLimiter(0, 1000)
+        await limiter.acquire(100)
+        limiter.record_usage(100, 1500)
+
+        assert limiter.requests is None
+        assert limiter.tokens.tokens < 0
+
+    def test_circuit_breaker_opens_and_probes(self):
+        """Test that the breaker opens after consecutive failures and lets one probe through later."""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+        breaker.opened_at -= 31
+        breaker.before_call()  # probe
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_success()
+        assert breaker.is_open is False
+
+    def test_backoff_is_capped(self):
+        """Test that jittered backoff grows exponentially but never exceeds the cap."""
+        assert all(0 <= backoff_delay(0, base=1) <= 1 for _ in range(20))
+        assert all(0 <= backoff_delay(10, base=1, cap=5) <= 5 for _ in range(20))
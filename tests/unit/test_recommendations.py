@@ -0,0 +1,105 @@
+"""Unit tests for the background recommendation engine."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from quiz_bot.recommendations import RecommendationEngine
+
+pytestmark = pytest.mark.asyncio
+
+def make_history(avg_score=60.0, total_questions=10):
+    return {
+        "topics_data": {
+            "integral": {
+                "quiz_attempts": 1, "avg_score": avg_score, "total_questions": total_questions,
+                "study_sessions": 0, "total_study_time": 0, "difficulty_levels": ["mudah"]
+            }
+        },
+        "recent_study_sessions": [],
+        "recent_performance": []
+    }
+
+class TestRecommendationEngine:
+    """Test suite for RecommendationEngine class."""
+
+    @pytest.fixture
+    def database(self):
+        """Mocked database keeping user_recommendations rows in a dict."""
+        rows = {}
+        async def save_recommendation(user_id, content, fingerprint):
+            rows[user_id] = {"content": content, "fingerprint": fingerprint, "stale": False}
+        async def mark_recommendation_stale(user_id):
+            if user_id in rows:
+                rows[user_id]["stale"] = True
+
+        database = MagicMock()
+        database.get_user_learning_history = AsyncMock(return_value=make_history())
+        database.get_recommendation = AsyncMock(side_effect=lambda user_id: dict(rows[user_id]) if user_id in rows else None)
+        database.save_recommendation = AsyncMock(side_effect=save_recommendation)
+        database.mark_recommendation_stale = AsyncMock(side_effect=mark_recommendation_stale)
+        return database
+
+    @pytest.fixture
+    def ai(self):
+        ai = MagicMock()
+        ai.generate_recommendations = AsyncMock(return_value="## Rekomendasi")
+        return ai
+
+    async def test_first_request_computes_and_stores(self, database, ai):
+        """Test that a user without stored recommendations gets them computed once."""
+        engine = RecommendationEngine(database, ai)
+
+        first = await engine.get("user_1")
+        second = await engine.get("user_1")
+
+        assert first == second == "## Rekomendasi"
+        ai.generate_recommendations.assert_called_once()
+        database.save_recommendation.assert_called_once()
+
+    async def test_unchanged_history_skips_model(self, database, ai):
+        """Test that a refresh with only minor history changes does not call the model."""
+        engine = RecommendationEngine(database, ai)
+        await engine.get("user_1")
+
+        database.get_user_learning_history.return_value = make_history(avg_score=61.0, total_questions=11)
+        await engine.schedule_refresh("user_1")
+
+        assert ai.generate_recommendations.call_count == 1
+        assert engine.records["user_1"]["stale"] is False
+
+    async def test_stale_result_served_while_refreshing(self, database, ai):
+        """Test that stale recommendations are returned immediately and refreshed in the background."""
+        engine = RecommendationEngine(database, ai)
+        await engine.get("user_1")
+        database.get_user_learning_history.return_value = make_history(avg_score=90.0, total_questions=30)
+        ai.generate_recommendations.return_value = "## Rekomendasi baru"
+
+        await engine.mark_stale("user_1")
+        served = await engine.get("user_1")
+        await engine.tasks["user_1"]
+
+        assert served == "## Rekomendasi"
+        assert await engine.get("user_1") == "## Rekomendasi baru"
+        assert engine.tasks == {}
+
+    async def test_staleness_shared_between_processes(self, database, ai):
+        """Test that a performance update handled by another process triggers a refresh here."""
+        engine, other = RecommendationEngine(database, ai), RecommendationEngine(database, ai)
+        await engine.get("user_1")
+        database.get_user_learning_history.return_value = make_history(avg_score=90.0, total_questions=30)
+        ai.generate_recommendations.return_value = "## Rekomendasi baru"
+
+        await other.mark_stale("user_1")
+        await engine.get("user_1")
+        await engine.tasks["user_1"]
+
+        assert await engine.get("user_1") == "## Rekomendasi baru"
+
+    async def test_no_history_returns_none(self, database, ai):
+        """Test that users without any history get no recommendations."""
+        database.get_user_learning_history.return_value = {
+            "topics_data": {}, "recent_study_sessions": [], "recent_performance": []
+        }
+        engine = RecommendationEngine(database, ai)
+
+        assert await engine.get("user_1") is None
+        ai.generate_recommendations.assert_not_called()
@@ -0,0 +1,71 @@
+"""Unit tests for the study answer cache."""
+
+from unittest.mock import patch
+from quiz_bot.response_cache import ResponseCache
+
+class TestResponseCache:
+    """Test suite for ResponseCache class."""
+
+    def test_exact_and_near_duplicate_hits(self):
+        """Test that normalized and near-identical questions share an answer."""
+        cache = ResponseCache()
+        cache.put("Kalkulus", "Apa itu turunan?", "Turunan adalah laju perubahan.")
+
+        assert cache.get("kalkulus", "apa itu turunan") == "Turunan adalah laju perubahan."
+        assert cache.get("Kalkulus", "apa itu turunan ya?") == "Turunan adalah laju perubahan."
+        assert cache.stats()["hits"] == 2
+
+    def test_different_question_or_topic_misses(self):
+        """Test that unrelated questions and other topics are not served."""
+        cache = ResponseCache()
+        cache.put("Kalkulus", "Apa itu turunan?", "Turunan adalah laju perubahan.")
+
+        assert cache.get("Kalkulus", "Apa itu integral?") is None
+        assert cache.get("Fisika", "Apa itu turunan?") is None
+        assert cache.stats()["misses"] == 2
+
+    def test_near_match_requires_same_numbers_and_negations(self):
+        """Test that similar-looking questions with a different number or negation are not served."""
+        cache = ResponseCache()
+        cache.put("Kalkulus", "apa itu integral tentu", "Integral tentu punya batas.")
+        cache.put("Fisika", "jelaskan hukum newton 1", "Hukum inersia.")
+        cache.put("Kalkulus", "apa itu turunan", "Turunan adalah laju perubahan.")
+
+        assert cache.get("Kalkulus", "apa itu integral tak tentu") is None
+        assert cache.get("Fisika", "jelaskan hukum newton 3") is None
+        assert cache.get("Kalkulus", "apa itu turunan kedua") is None
+        assert cache.stats()["hits"] == 0
+
+    def test_entries_expire(self):
+        """Test that entries older than the TTL are dropped."""
+        cache = ResponseCache(ttl=10)
+        with patch("quiz_bot.response_cache.time.time", return_value=1000):
+            cache.put("Kalkulus", "Apa itu turunan?", "jawaban")
+        with patch("quiz_bot.response_cache.time.time", return_value=1011):
+            assert cache.get("Kalkulus", "Apa itu turunan?") is None
+        assert cache.stats()["entries"] == 0
+
+    def test_byte_cap_evicts_least_recently_used(self):
+        """Test that the oldest unused entry is evicted when over the byte cap."""
+        cache = ResponseCache()
+        cache.put("t", "pertanyaan satu", "a" * 1000)
+        cache.max_bytes = cache.size_bytes * 2 + 100
+        cache.put("t", "soal kedua berbeda", "b" * 1000)
+        cache.get("t", "pertanyaan satu")
+        cache.put("t", "hal ketiga lain", "c" * 1000)
+
+        assert cache.get("t", "pertanyaan satu") == "a" * 1000
+        assert cache.get("t", "soal kedua berbeda") is None
+        assert cache.size_bytes <= cache.max_bytes
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test that saved entries are available after a reload."""
+        path = str(tmp_path / "cache.json")
+        cache = ResponseCache(path=path)
+        cache.put("Kalkulus", "Apa itu turunan?", "Turunan adalah laju perubahan.")
+        cache.save()
+
+        reloaded = ResponseCache(path=path)
+        reloaded.load()
+
+        assert reloaded.get("Kalkulus", "apa itu turunan ya") == "Turunan adalah laju perubahan."
@@ -0,0 +1,68 @@
+"""Unit tests for the timer scheduler."""
+
+import asyncio
+import time
+import pytest
+from quiz_bot.scheduler import TimerScheduler
+
+pytestmark = pytest.mark.asyncio
+
+async def noop():
+    pass
+
+class TestTimerScheduler:
+    """Test suite for TimerScheduler class."""
+
+    async def test_pop_due_in_deadline_order(self):
+        """Test that only due timers are returned, earliest first."""
+        scheduler = TimerScheduler()
+        fired = []
+
+        def make(name):
+            async def callback():
+                fired.append(name)
+            return callback
+
+        scheduler.schedule("b", 20, make("b"))
+        scheduler.schedule("a", 10, make("a"))
+        scheduler.schedule("c", 30, make("c"))
+
+        for callback in scheduler.pop_due(25):
+            await callback()
+
+        assert fired == ["a", "b"]
+        assert len(scheduler) == 1
+
+    async def test_reschedule_and_cancel(self):
+        """Test that rescheduling replaces a timer and cancelled timers never fire."""
+        scheduler = TimerScheduler()
+        scheduler.schedule("a", 10, noop)
+        scheduler.schedule("a", 50, noop)
+        scheduler.schedule("b", 10, noop)
+        scheduler.cancel("b")
+
+        assert scheduler.pop_due(20) == []
+        assert scheduler.deadline("a") == 50
+        assert len(scheduler.pop_due(60)) == 1
+
+    async def test_single_task_fires_many_timers(self):
+        """Test that thousands of timers fire from one scheduler task."""
+        scheduler = TimerScheduler()
+        fired = []
+        done = asyncio.Event()
+
+        async def callback():
+            fired.append(1)
+            if len(fired) == 2000:
+                done.set()
+
+        await scheduler.start()
+        deadline = time.time() + 0.05
+        for i in range(2000):
+            scheduler.schedule(f"session-{i}", deadline, callback)
+
+        await asyncio.wait_for(done.wait(), timeout=5)
+        await scheduler.stop()
+
+        assert len(fired) == 2000
+        assert len(scheduler) == 0
@@ -0,0 +1,276 @@
+"""Unit tests for the quiz session stores."""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from quiz_bot.commands import continue_quiz_generation
+from quiz_bot.quiz_manager import QuizManager, QuizSession
+from quiz_bot.session_store import MemorySessionStore, RedisSessionStore, SQLiteSessionStore, WatchError
+
+class FakeRedis:
+    """Local stand-in for a redis.asyncio client (get/set with ex/delete and WATCH pipelines)."""
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+        self.writes = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value.encode()
+        self.expiry[key] = ex
+        self.writes[key] = self.writes.get(key, 0) + 1
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+        self.writes[key] = self.writes.get(key, 0) + 1
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+class FakePipeline:
+    """WATCH/MULTI/EXEC on FakeRedis; EXEC fails if a watched key was written since WATCH."""
+    def __init__(self, client):
+        self.client = client
+        self.watched = {}
+        self.queued = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def watch(self, key):
+        self.watched[key] = self.client.writes.get(key, 0)
+
+    async def get(self, key):
+        return await self.client.get(key)
+
+    def multi(self):
+        pass
+
+    def set(self, key, value, ex=None):
+        self.queued.append((key, value, ex))
+
+    async def execute(self):
+        if any(self.client.writes.get(key, 0) != count for key, count in self.watched.items()):
+            raise WatchError()
+        for key, value, ex in self.queued:
+            await self.client.set(key, value, ex=ex)
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemorySessionStore()
+    if request.param == "sqlite":
+        return SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    return RedisSessionStore(FakeRedis())
+
+def test_session_round_trip(sample_quiz_questions):
+    """Test that a session survives serialization with its progress."""
+    session = QuizSession("123", "quiz_1", sample_quiz_questions, ["qq1", "qq2"], "geografi", "mudah")
+    session.move_to_next_question()
+    session.score = 1
+    session.generating = True
+
+    restored = QuizSession.from_dict(session.to_dict())
+
+    assert restored.questions == sample_quiz_questions
+    assert restored.quiz_question_ids == ["qq1", "qq2"]
+    assert (restored.current, restored.score) == (1, 1)
+    assert restored.get_current_question_id() == "qq2"
+    assert restored.generating is True
+
+async def test_store_set_get_delete(store):
+    """Test the basic store contract for every backend."""
+    await store.set("123", '{"a":1}')
+    assert await store.get("123") == '{"a":1}'
+
+    await store.delete("123")
+    assert await store.get("123") is None
+
+async def test_manager_keeps_identity_between_saves(store, sample_quiz_questions):
+    """Test that unchanged sessions are served from the local cache."""
+    manager = QuizManager(store)
+    session = await manager.create_session("123", sample_quiz_questions, "geografi", "mudah", ["qq1", "qq2"])
+
+    assert await manager.get_session("123") is session
+
+async def test_session_survives_restart(tmp_path, sample_quiz_questions):
+    """Test that a new manager on the same SQLite file resumes the quiz."""
+    path = str(tmp_path / "sessions.db")
+    manager = QuizManager(SQLiteSessionStore(path))
+    session = await manager.create_session("123", sample_quiz_questions, "geografi", "mudah", ["qq1", "qq2"])
+    session.score += 1
+    session.move_to_next_question()
+    await manager.save_session(session)
+
+    restarted = QuizManager(SQLiteSessionStore(path))
+    resumed = await restarted.get_session("123")
+
+    assert resumed.session_id == session.session_id
+    assert resumed.current == 1
+    assert resumed.score == 1
+
+async def test_managers_share_updates(sample_quiz_questions):
+    """Test that a process sees progress saved by another process."""
+    store = RedisSessionStore(FakeRedis())
+    first, second = QuizManager(store), QuizManager(store)
+    session = await first.create_session("123", sample_quiz_questions, "geografi", "mudah", ["qq1", "qq2"])
+    assert (await second.get_session("123")).current == 0
+
+    session.move_to_next_question()
+    await first.save_session(session)
+    assert (await second.get_session("123")).current == 1
+
+    await first.end_session("123")
+    assert await second.get_session("123") is None
+
+async def test_expired_sessions_are_dropped(tmp_path):
+    """Test that sessions older than the TTL are not returned."""
+    for store in (MemorySessionStore(ttl=10), SQLiteSessionStore(str(tmp_path / "s.db"), ttl=10)):
+        with patch("quiz_bot.session_store.time.time", return_value=1000):
+            await store.set("123", "{}")
+        with patch("quiz_bot.session_store.time.time", return_value=1011):
+            assert await store.get("123") is None
+
+async def test_compare_and_set_checks_version(store):
+    """Test that every backend only writes over the version the caller loaded."""
+    assert await store.compare_and_set("123", None, '{"v":"a"}') is True
+    assert await store.compare_and_set("123", None, '{"v":"b"}') is False
+    assert await store.compare_and_set("123", "x", '{"v":"b"}') is False
+    assert await store.compare_and_set("123", "a", '{"v":"b"}') is True
+    assert await store.get("123") == '{"v":"b"}'
+
+async def test_redis_compare_and_set_detects_write_during_transaction():
+    """Test that a write between WATCH and EXEC makes the Redis save fail."""
+    client = FakeRedis()
+    store = RedisSessionStore(client)
+    await store.set("123", '{"v":"a"}')
+
+    original_get = FakePipeline.get
+    async def get_then_race(pipe, key):
+        value = await original_get(pipe, key)
+        await client.set(key, '{"v":"other"}')
+        return value
+
+    with patch.object(FakePipeline, "get", get_then_race):
+        assert await store.compare_and_set("123", "a", '{"v":"b"}') is False
+    assert await store.get("123") == '{"v":"other"}'
+
+async def test_stale_save_is_rejected(sample_quiz_questions):
+    """Test that a process cannot overwrite a save made by another process."""
+    store = RedisSessionStore(FakeRedis())
+    first, second = QuizManager(store), QuizManager(store)
+    mine = await first.create_session("123", sample_quiz_questions, "geografi", "mudah", ["qq1", "qq2"])
+    theirs = await second.get_session("123")
+
+    mine.move_to_next_question()
+    assert await first.save_session(mine) is True
+    theirs.score = 1
+    assert await second.save_session(theirs) is False
+
+    reloaded = await second.get_session("123")
+    assert reloaded is not theirs
+    assert (reloaded.current, reloaded.score) == (1, 0)
+
+async def test_update_session_reapplies_change_after_conflict(sample_quiz_questions):
+    """Test that an answer racing an appended question is re-applied instead of dropping the question."""
+    client = FakeRedis()
+    owner, other = QuizManager(RedisSessionStore(client)), QuizManager(RedisSessionStore(client))
+    session = await owner.create_session("123", sample_quiz_questions[:1], "geografi", "mudah", ["qq1"],
+                                         generating=True)
+
+    # The owner appends a question after the other process loaded the session
+    save = other.store.compare_and_set
+    owner_appended = []
+    async def append_first(*args):
+        if not owner_appended:
+            owner_appended.append(await owner.update_session(
+                "123", session.session_id, lambda s: s.append_question(sample_quiz_questions[1], "qq2")))
+        return await save(*args)
+
+    attempts = []
+    def record_answer(current):
+        attempts.append(current)
+        current.score += 1
+        current.move_to_next_question()
+
+    with patch.object(other.store, "compare_and_set", append_first):
+        saved = await other.update_session("123", session.session_id, record_answer)
+
+    assert len(attempts) == 2
+    assert (saved.current, saved.score) == (1, 1)
+    assert saved.quiz_question_ids == ["qq1", "qq2"]
+    assert (await owner.get_session("123")).quiz_question_ids == ["qq1", "qq2"]
+
+async def test_background_generation_keeps_progress_from_other_process(sample_quiz_questions):
+    """Test that appending a generated question does not undo answers saved elsewhere."""
+    store = RedisSessionStore(FakeRedis())
+    owner, other = QuizManager(store), QuizManager(store)
+    session = await owner.create_session("123", sample_quiz_questions[:1], "geografi", "mudah", ["qq1"],
+                                         generating=True)
+
+    def answer(current):
+        current.score += 1
+        current.move_to_next_question()
+    await other.update_session("123", session.session_id, answer)
+
+    async def stream():
+        yield sample_quiz_questions[1]
+
+    with patch("quiz_bot.commands.quiz_manager", owner), patch("quiz_bot.commands.db") as mock_db:
+        mock_db.save_questions_bulk = AsyncMock(return_value=["q2"])
+        mock_db.save_quiz_questions_bulk = AsyncMock(return_value=["qq2"])
+        mock_db.update_quiz_session_total = AsyncMock()
+        await continue_quiz_generation(session, stream(), 2)
+
+    stored = await other.get_session("123")
+    assert (stored.current, stored.score) == (1, 1)
+    assert stored.quiz_question_ids == ["qq1", "qq2"]
+    assert stored.generating is False
+
+async def test_remote_session_waits_by_polling_store(sample_quiz_questions):
+    """Test that a process waits for questions generated by another process."""
+    store = RedisSessionStore(FakeRedis())
+    owner, other = QuizManager(store), QuizManager(store)
+    other.POLL_INTERVAL = 0.01
+    session = await owner.create_session("123", sample_quiz_questions[:1], "geografi", "mudah", ["qq1"])
+    session.owner = "other-host:1"
+    session.generating = True
+    await owner.save_session(session)
+
+    remote = await other.get_session("123")
+    remote.move_to_next_question()
+    await other.save_session(remote)
+    assert remote.remote is True
+
+    async def append_later():
+        await asyncio.sleep(0.03)
+        current = await owner.get_session("123")
+        current.append_question(sample_quiz_questions[1], "qq2")
+        await owner.save_session(current)
+
+    asyncio.create_task(append_later())
+    question = await other.wait_for_current_question(remote, timeout=1)
+
+    assert question == sample_quiz_questions[1]
+
+async def test_generation_of_crashed_owner_expires(sample_quiz_questions):
+    """Test that a generating flag left by a dead process stops blocking answers."""
+    store = RedisSessionStore(FakeRedis())
+    owner, other = QuizManager(store), QuizManager(store)
+    session = await owner.create_session("123", sample_quiz_questions[:1], "geografi", "mudah", ["qq1"],
+                                         generating=True)
+    session.owner = "crashed-host:1"
+    session.heartbeat -= QuizSession.GENERATION_TIMEOUT + 1
+    await owner.save_session(session)
+
+    remote = await other.get_session("123")
+    remote.move_to_next_question()
+
+    assert remote.generating is False
+    assert remote.is_finished() is True
+    assert await other.wait_for_current_question(remote, timeout=5) is None
@@ -0,0 +1,28 @@
+"""Unit tests for shard routing helpers."""
+
+from unittest.mock import MagicMock
+from quiz_bot.sharding import owns_channel, shard_for_guild, split_shards
+
+def test_shard_for_guild():
+    """Test Discord's shard formula and DM routing."""
+    guild_id = 5 << 22
+    assert shard_for_guild(guild_id, 4) == 1
+    assert shard_for_guild(None, 4) == 0
+
+def test_split_shards_round_robin():
+    """Test that every shard goes to exactly one process."""
+    groups = split_shards(5, 2)
+
+    assert groups == [[0, 2, 4], [1, 3]]
+    assert split_shards(2, 4) == [[0], [1]]
+
+def test_owns_channel():
+    """Test that a process only owns channels of guilds on its shards."""
+    bot = MagicMock(shard_ids=[1, 3], shard_count=4)
+    channel = MagicMock()
+    channel.guild.id = 5 << 22  # shard 1
+    dm_channel = MagicMock(guild=None)
+
+    assert owns_channel(bot, channel) is True
+    assert owns_channel(bot, dm_channel) is False
+    assert owns_channel(MagicMock(shard_ids=None, shard_count=None), dm_channel) is True
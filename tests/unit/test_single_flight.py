@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from quiz_bot.single_flight import SingleFlight
+
+pytestmark = pytest.mark.asyncio
+
+class TestSingleFlight:
+    """Test suite for coalescing identical in-flight calls."""
+
+    async def test_concurrent_calls_share_one_upstream_call(self):
+        """Test that callers with the same key wait for the first caller's call."""
+        flight = SingleFlight()
+        calls = 0
+
+        async def call():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return ["soal"]
+
+        results = await asyncio.gather(*[flight.run("integral", call) for _ in range(5)])
+
+        assert calls == 1
+        assert [shared for _, shared in results] == [False, True, True, True, True]
+        assert flight.calls == {}
+
+    async def test_late_stream_consumer_replays_items(self):
+        """Test that a consumer joining a running stream gets every item from the start."""
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def source():
+            yield 1
+            await release.wait()
+            yield 2
+
+        first, _ = flight.stream("integral", source)
+        assert await anext(first) == 1
+        second, shared = flight.stream("integral", source)
+        release.set()
+
+        assert shared is True
+        assert [item async for item in first] == [2]
+        assert [item async for item in second] == [1, 2]
+
+    async def test_stream_cancelled_when_all_consumers_leave(self):
+        """Test that the source stops once nobody reads the shared stream anymore."""
+        flight = SingleFlight()
+
+        async def source():
+            yield 1
+            await asyncio.sleep(10)
+            yield 2
+
+        stream, _ = flight.stream("integral", source)
+        await anext(stream)
+        await stream.aclose()
+        await asyncio.sleep(0)
+
+        _, shared = flight.stream("integral", source)
+        assert shared is False
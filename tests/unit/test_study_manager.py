@@ -2,7 +2,11 @@
 
 import pytest
 import asyncio
+import datetime
+import time
 from unittest.mock import AsyncMock, MagicMock, patch
+from quiz_bot.scheduler import TimerScheduler
+from quiz_bot.session_store import SQLiteSessionStore
 from quiz_bot.study_manager import StudySession, StudySessionManager, StudySessionState
 
 pytestmark = pytest.mark.asyncio
@@ -40,8 +44,15 @@ class TestStudySession:
         """Test total intervals calculation."""
         assert study_session.total_intervals == 2
 
-    @patch('quiz_bot.study_manager.db')
-    async def test_start_study_interval(self, mock_db, study_session, mock_discord_channel):
+    @pytest.fixture(autouse=True)
+    def mock_scheduler(self):
+        """Use a fresh scheduler so timers do not leak between tests."""
+        scheduler = TimerScheduler()
+        with patch('quiz_bot.study_manager.study_scheduler', scheduler):
+            yield scheduler
+
+    @patch('quiz_bot.study_manager.db', new_callable=AsyncMock)
+    async def test_start_study_interval(self, mock_db, study_session, mock_discord_channel, mock_scheduler):
         """Test starting a study interval."""
         # Act
         await study_session.start_study_interval()
@@ -52,10 +63,13 @@ class TestStudySession:
         assert study_session.state == StudySessionState.ACTIVE
         mock_db.update_study_session_state.assert_called_once_with(
             study_session.session_id, 
-            StudySessionState.ACTIVE
+            StudySessionState.ACTIVE,
+            current_interval=0,
+            phase_ends_at=study_session.phase_ends_at
         )
+        assert mock_scheduler.deadline(study_session.session_id) == study_session.phase_ends_at
 
-    @patch('quiz_bot.study_manager.db')
+    @patch('quiz_bot.study_manager.db', new_callable=AsyncMock)
     async def test_start_break(self, mock_db, study_session, mock_discord_channel):
         """Test starting a break interval."""
         # Act
@@ -67,7 +81,9 @@ class TestStudySession:
         assert study_session.state == StudySessionState.RESTING
         mock_db.update_study_session_state.assert_called_once_with(
             study_session.session_id, 
-            StudySessionState.RESTING
+            StudySessionState.RESTING,
+            completed_intervals=1,
+            phase_ends_at=study_session.phase_ends_at
         )
 
     def test_can_ask_questions(self, study_session):
@@ -79,10 +95,10 @@ class TestStudySession:
         study_session.state = StudySessionState.RESTING
         assert study_session.can_ask_questions() is False
 
-    def test_add_question(self, study_session):
+    async def test_add_question(self, study_session):
         """Test adding a question to session history."""
         # Act
-        study_session.add_question("What is Python?", "A programming language")
+        await study_session.add_question("What is Python?", "A programming language")
 
         # Assert
         assert len(study_session.questions) == 1
@@ -111,11 +127,11 @@ class TestStudySessionManager:
             "description": "Comprehensive study plan"
         }
 
-    @patch('quiz_bot.study_manager.db')
-    def test_create_session(self, mock_db, study_manager, study_plan, mock_discord_channel):
+    @patch('quiz_bot.study_manager.db', new_callable=AsyncMock)
+    async def test_create_session(self, mock_db, study_manager, study_plan, mock_discord_channel):
         """Test creating a new study session."""
         # Act
-        session = study_manager.create_session(
+        session = await study_manager.create_session(
             user_id="123",
             topic="Python",
             study_plan=study_plan,
@@ -129,25 +145,26 @@ class TestStudySessionManager:
         assert "123" in study_manager.active_sessions
         mock_db.create_study_session.assert_called_once()
 
-    @patch('quiz_bot.study_manager.db')
-    def test_create_session_existing_user(self, mock_db, study_manager, study_plan, mock_discord_channel):
+    @patch('quiz_bot.study_manager.db', new_callable=AsyncMock)
+    async def test_create_session_existing_user(self, mock_db, study_manager, study_plan, mock_discord_channel):
         """Test creating a session for user with existing session."""
         # Arrange
         study_manager.active_sessions["123"] = "existing_session"
 
         # Act & Assert
         with pytest.raises(ValueError, match="User already has an active study session"):
-            study_manager.create_session(
+            await study_manager.create_session(
                 user_id="123",
                 topic="Python",
                 study_plan=study_plan,
                 channel=mock_discord_channel
             )
 
-    def test_get_session(self, study_manager, study_plan, mock_discord_channel):
+    @patch('quiz_bot.study_manager.db', new_callable=AsyncMock)
+    async def test_get_session(self, mock_db, study_manager, study_plan, mock_discord_channel):
         """Test getting an active session."""
         # Arrange
-        session = study_manager.create_session(
+        session = await study_manager.create_session(
             user_id="123",
             topic="Python",
             study_plan=study_plan,
@@ -155,5 +172,140 @@ class TestStudySessionManager:
         )
 
         # Act & Assert
-        assert study_manager.get_session("123") == session
-        assert study_manager.get_session("456") is None
\ No newline at end of file
+        assert await study_manager.get_session("123") == session
+        assert await study_manager.get_session("456") is None
+    @patch('quiz_bot.study_manager.db', new_callable=AsyncMock)
+    async def test_restore_sessions_reschedules_deadline(self, mock_db, study_manager, mock_discord_channel):
+        """Test that active sessions are rebuilt with their stored deadline after a restart."""
+        # Arrange
+        deadline = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=10)
+        mock_db.get_active_study_sessions.return_value = [{
+            "id": "session_1",
+            "user_id": "123",
+            "topic": "Python",
+            "state": "resting",
+            "current_interval": 1,
+            "channel_id": "42",
+            "start_time": "2024-01-01T10:00:00",
+            "phase_ends_at": deadline.isoformat(),
+            "study_intervals": [
+                {"sequence": 2, "duration_minutes": 45, "break_duration": 15, "focus": "Functions"},
+                {"sequence": 1, "duration_minutes": 45, "break_duration": 10, "focus": "Basic Syntax"},
+            ]
+        }]
+        bot = MagicMock(shard_ids=None)
+        bot.get_channel.return_value = mock_discord_channel
+        scheduler = TimerScheduler()
+
+        # Act
+        with patch('quiz_bot.study_manager.study_scheduler', scheduler):
+            restored = await study_manager.restore_sessions(bot)
+
+        # Assert
+        session = await study_manager.get_session("123")
+        assert restored == 1
+        assert session.state == StudySessionState.RESTING
+        assert session.current_interval == 1
+        assert [i["focus"] for i in session.intervals] == ["Basic Syntax", "Functions"]
+        assert scheduler.deadline("session_1") == pytest.approx(deadline.timestamp())
+        bot.get_channel.assert_called_once_with(42)
+
+    @patch('quiz_bot.study_manager.db', new_callable=AsyncMock)
+    async def test_restore_only_fetches_own_shard_channels(self, mock_db, study_manager, mock_discord_channel):
+        """Test that sessions in guilds on other shards are skipped before any channel is fetched."""
+        # Arrange
+        deadline = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=10)
+        def row(user_id, channel_id, guild_id):
+            return {
+                "id": f"session_{user_id}", "user_id": user_id, "topic": "Python", "state": "active",
+                "current_interval": 0, "channel_id": channel_id, "guild_id": guild_id,
+                "start_time": "2024-01-01T10:00:00", "phase_ends_at": deadline.isoformat(),
+                "study_intervals": [{"sequence": 1, "duration_minutes": 45, "break_duration": 10, "focus": "Basic Syntax"}],
+            }
+        own_guild, other_guild = 2 << 22, 1 << 22  # Shards 0 and 1 of 2
+        mock_db.get_active_study_sessions.return_value = [row("1", "41", str(other_guild)), row("2", "42", str(own_guild))]
+        mock_discord_channel.guild.id = own_guild
+        bot = MagicMock(shard_ids=[0], shard_count=2)
+        bot.get_channel.return_value = None
+        bot.fetch_channel = AsyncMock(return_value=mock_discord_channel)
+
+        # Act
+        with patch('quiz_bot.study_manager.study_scheduler', TimerScheduler()):
+            restored = await study_manager.restore_sessions(bot)
+
+        # Assert
+        assert restored == 1
+        assert list(study_manager.active_sessions) == ["2"]
+        bot.fetch_channel.assert_awaited_once_with(42)
+
+    @patch('quiz_bot.study_manager.db', new_callable=AsyncMock)
+    async def test_missed_phases_catch_up_silently(self, mock_db, mock_discord_channel):
+        """Test that a deadline missed while offline advances from the old deadline without announcing."""
+        # Arrange
+        session = StudySession("123", "session_1", "Python",
+                               [{"duration": 25, "break": 5, "focus": "Basics"}], mock_discord_channel)
+        session.phase_ends_at = time.time() - 3600
+        scheduler = TimerScheduler()
+
+        # Act
+        with patch('quiz_bot.study_manager.study_scheduler', scheduler):
+            await session._on_phase_end()
+
+        # Assert
+        assert session.state == StudySessionState.RESTING
+        assert session.phase_ends_at == pytest.approx(time.time() - 3600 + 5 * 60, abs=5)
+        mock_discord_channel.send.assert_not_called()
+        assert len(scheduler.pop_due(time.time())) == 1
+
+
+class TestSharedStudySessions:
+    """Test suite for study sessions shared between bot processes."""
+
+    @pytest.fixture
+    def managers(self, tmp_path):
+        """Two managers on one SQLite store, standing in for two bot processes."""
+        path = str(tmp_path / "sessions.db")
+        return (StudySessionManager(SQLiteSessionStore(path, table="study_sessions")),
+                StudySessionManager(SQLiteSessionStore(path, table="study_sessions")))
+
+    @patch('quiz_bot.study_manager.db', new_callable=AsyncMock)
+    async def test_session_visible_and_questions_merged(self, mock_db, managers, mock_discord_channel, sample_study_plan):
+        """Test that another process can ask questions that end up in the owner's history."""
+        owner, other = managers
+        session = await owner.create_session("123", "Python", sample_study_plan, mock_discord_channel)
+
+        remote = await other.get_session("123")
+        await remote.add_question("Apa itu list?", "List adalah ...")
+        await owner.merge_questions(session)
+
+        assert remote.session_id == session.session_id
+        assert remote.can_ask_questions() is True
+        assert [q["question"] for q in session.questions] == ["Apa itu list?"]
+
+    @patch('quiz_bot.study_manager.db', new_callable=AsyncMock)
+    async def test_session_ended_elsewhere(self, mock_db, managers, mock_discord_channel, sample_study_plan):
+        """Test that the owner drops a session ended by another process."""
+        owner, other = managers
+        await owner.create_session("123", "Python", sample_study_plan, mock_discord_channel)
+
+        await other.end_session("123")
+
+        assert await owner.get_session("123") is None
+        assert "123" not in owner.active_sessions
+
+    @patch('quiz_bot.study_manager.db', new_callable=AsyncMock)
+    async def test_stale_copy_does_not_overwrite_owner_state(self, mock_db, managers, mock_discord_channel, sample_study_plan):
+        """Test that a question saved from an outdated copy keeps the owner's newer timer state."""
+        owner, other = managers
+        session = await owner.create_session("123", "Python", sample_study_plan, mock_discord_channel)
+        remote = await other.get_session("123")
+
+        session.state = StudySessionState.RESTING
+        session.phase_ends_at = 1234.0
+        await owner.save_snapshot(session)
+        with patch('quiz_bot.study_manager.PROCESS_ID', "other-host:1"):
+            await remote.add_question("Apa itu list?", "List adalah ...")
+
+        stored = await owner._load("123")
+        assert (stored["s"], stored["pe"]) == (StudySessionState.RESTING.value, 1234.0)
+        assert [q["question"] for q in stored["q"]] == ["Apa itu list?"]
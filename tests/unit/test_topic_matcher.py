@@ -0,0 +1,50 @@
+"""Unit tests for the local topic matcher."""
+
+import pytest
+from quiz_bot.topic_matcher import TopicMatcher
+
+class TestTopicMatcher:
+    """Test suite for TopicMatcher."""
+
+    @pytest.fixture
+    def matcher(self):
+        """Create a matcher fitted on a small catalogue."""
+        matcher = TopicMatcher()
+        matcher.fit(["integral", "turunan", "persamaan kuadrat", "sejarah indonesia", "hukum newton"])
+        return matcher
+
+    def test_exact_match_scores_one(self, matcher):
+        """Test that case and punctuation differences still match exactly."""
+        topic, score = matcher.top_matches("Turunan!", k=1)[0]
+        assert topic == "turunan"
+        assert score == pytest.approx(1.0, abs=1e-5)
+
+    def test_partial_match_ranks_first(self, matcher):
+        """Test that a related keyword ranks the right topic first."""
+        topic, score = matcher.top_matches("kuadrat")[0]
+        assert topic == "persamaan kuadrat"
+        assert 0.3 < score < 1.0
+
+    def test_unrelated_topic_scores_low(self, matcher):
+        """Test that unrelated text has low similarity to every topic."""
+        assert matcher.top_matches("fotosintesis")[0][1] < 0.3
+
+    def test_results_sorted_and_limited(self, matcher):
+        """Test that results are best-first and capped at k."""
+        results = matcher.top_matches("integral", k=3)
+        assert len(results) == 3
+        scores = [score for _, score in results]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_ensure_fitted_refits_on_change(self, matcher):
+        """Test that the matrix is rebuilt only when the topic set changes."""
+        matrix = matcher.matrix
+        matcher.ensure_fitted(["hukum newton", "integral", "turunan", "persamaan kuadrat", "sejarah indonesia"])
+        assert matcher.matrix is matrix
+
+        matcher.ensure_fitted(["integral", "limit"])
+        assert matcher.topics == ["integral", "limit"]
+
+    def test_empty_catalogue(self):
+        """Test that an unfitted matcher returns no matches."""
+        assert TopicMatcher().top_matches("integral") == []
@@ -0,0 +1,145 @@
+"""Unit tests for utility helpers."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from quiz_bot.utils import UserRegistrationCache, ensure_user_registered, send_streamed_message, split_into_chunks
+
+pytestmark = pytest.mark.asyncio
+
+class TestUserRegistrationCache:
+    """Test suite for UserRegistrationCache."""
+
+    def test_first_sight_needs_upsert(self):
+        """Test that unknown users require an upsert."""
+        cache = UserRegistrationCache()
+        assert cache.needs_upsert("123", "ilham") is True
+        assert cache.stats()["misses"] == 1
+
+    def test_known_user_is_hit(self):
+        """Test that a registered user with the same name is served from cache."""
+        cache = UserRegistrationCache()
+        cache.mark_registered("123", "ilham")
+
+        assert cache.needs_upsert("123", "ilham") is False
+        assert cache.stats()["hit_rate"] == 1.0
+
+    def test_username_change_needs_upsert(self):
+        """Test that a username change triggers a new upsert."""
+        cache = UserRegistrationCache()
+        cache.mark_registered("123", "ilham")
+
+        assert cache.needs_upsert("123", "ilham_baru") is True
+
+    def test_expired_entry_needs_upsert(self):
+        """Test that entries older than the TTL are refreshed."""
+        cache = UserRegistrationCache(ttl=0)
+        cache.mark_registered("123", "ilham")
+
+        assert cache.needs_upsert("123", "ilham") is True
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted at capacity."""
+        cache = UserRegistrationCache(max_size=2)
+        cache.mark_registered("1", "a")
+        cache.mark_registered("2", "b")
+        cache.needs_upsert("1", "a")  # touch 1 so 2 becomes oldest
+        cache.mark_registered("3", "c")
+
+        assert set(cache.entries) == {"1", "3"}
+
+    @patch('quiz_bot.utils.db', new_callable=AsyncMock)
+    async def test_decorator_upserts_once(self, mock_db):
+        """Test that repeated commands from the same user upsert only once."""
+        # Arrange
+        cache = UserRegistrationCache()
+        handler = AsyncMock()
+        wrapped = ensure_user_registered()(handler)
+        interaction = MagicMock()
+        interaction.user.id = 123
+        interaction.user.name = "ilham"
+
+        # Act
+        with patch('quiz_bot.utils.user_cache', cache):
+            await wrapped(None, interaction)
+            await wrapped(None, interaction)
+
+        # Assert
+        mock_db.upsert_user.assert_called_once_with("123", "ilham")
+        assert handler.call_count == 2
+
+
+class TestSplitIntoChunks:
+    """Test suite for split_into_chunks."""
+
+    def test_short_content_single_chunk(self):
+        """Test that short content is returned unchanged."""
+        assert split_into_chunks("halo", 1900) == ["halo"]
+
+    def test_long_content_respects_chunk_size(self):
+        """Test that long content is split into chunks within the limit."""
+        content = "\n".join(["baris " * 10] * 100)
+        chunks = split_into_chunks(content, 200)
+
+        assert len(chunks) > 1
+        assert all(len(chunk) <= 200 for chunk in chunks)
+
+
+class TestSendStreamedMessage:
+    """Test suite for send_streamed_message."""
+
+    @staticmethod
+    def make_interaction():
+        interaction = MagicMock()
+        sent = []
+
+        async def send(content):
+            message = MagicMock()
+            message.content = content
+            message.edit = AsyncMock(side_effect=lambda content: setattr(message, "content", content))
+            sent.append(message)
+            return message
+
+        interaction.followup.send = AsyncMock(side_effect=send)
+        return interaction, sent
+
+    async def test_edits_message_as_text_arrives(self):
+        """Test that one message is sent and then edited with the growing text."""
+        interaction, sent = self.make_interaction()
+
+        async def deltas():
+            for piece in ["Halo", " dunia", "!"]:
+                yield piece
+
+        text = await send_streamed_message(interaction, deltas(), prefix="> ", edit_interval=0)
+
+        assert text == "Halo dunia!"
+        assert len(sent) == 1
+        assert sent[0].content == "> Halo dunia!"
+        assert sent[0].edit.call_count == 2
+
+    async def test_rolls_over_to_new_message(self):
+        """Test that text beyond the chunk size continues in a new message."""
+        interaction, sent = self.make_interaction()
+
+        async def deltas():
+            for _ in range(30):
+                yield "baris " * 5 + "\n"
+
+        await send_streamed_message(interaction, deltas(), chunk_size=200, edit_interval=0)
+
+        assert len(sent) > 1
+        assert all(len(message.content) <= 200 for message in sent)
+
+    async def test_edits_are_rate_limited(self):
+        """Test that fast deltas are batched into few edits."""
+        interaction, sent = self.make_interaction()
+
+        async def deltas():
+            for _ in range(50):
+                yield "a"
+
+        text = await send_streamed_message(interaction, deltas(), edit_interval=60)
+
+        assert text == "a" * 50
+        assert sent[0].content == "a" * 50
+        assert sent[0].edit.call_count == 1